@@ -1,30 +1,66 @@
 import os
 import sys
+import mmap
 import time
 import json
+import html
+import ctypes
+import ctypes.util
 import asyncio
 import fnmatch
+import glob
+import importlib.util
 import logging
+import logging.handlers
 import threading
+import queue
+import atexit
+import uuid
+import concurrent.futures
+from collections import OrderedDict, deque
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional, Any
-from contextlib import asynccontextmanager
+from typing import List, Dict, Optional, Any, Tuple
+from contextlib import asynccontextmanager, contextmanager
 
 import httpx
 import psutil
+try:
+    import websockets
+except ImportError:  # Optional: ohne websockets bleibt es beim Polling
+    websockets = None
 from fastapi import FastAPI, Request, BackgroundTasks, Form, Query
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
 # --- CONSTANTS ---
 VERSION = "1.0.0"
-CONFIG_FILE = "/config/config.json"
-LOG_FILE = "/config/preloader.log"
-HISTORY_FILE = "/config/history.json"
+# Im Container /config (Volume); abweichend z.B. für Benchmarks (bench/benchmark.py)
+CONFIG_DIR = os.environ.get("PRELOADER_CONFIG_DIR", "/config")
+CONFIG_FILE = os.path.join(CONFIG_DIR, "config.json")
+LOG_FILE = os.path.join(CONFIG_DIR, "preloader.log")
+HISTORY_FILE = os.path.join(CONFIG_DIR, "history.json")  # Altes Format, wird einmalig übernommen
+HISTORY_STORE_FILE = os.path.join(CONFIG_DIR, "history.jsonl")
+LEARNED_MAPPINGS_FILE = os.path.join(CONFIG_DIR, "learned_mappings.json")
+LIBRARY_SNAPSHOT_FILE = os.path.join(CONFIG_DIR, "library_snapshot.json")
+PRELOAD_LEDGER_FILE = os.path.join(CONFIG_DIR, "preload_ledger.json")
+WORK_QUEUE_FILE = os.path.join(CONFIG_DIR, "work_queue.json")
+EFFECTIVENESS_FILE = os.path.join(CONFIG_DIR, "effectiveness.json")
+PLUGIN_DIR = os.path.join(CONFIG_DIR, "plugins")
+
+# Prioritätsklassen für Warteschlange und Byte-Budget (höher = früher geladen, später verdrängt)
+PRIORITY_LIVE = 100.0
+PRIORITY_PLAY = 90.0
+PRIORITY_MANUAL = 80.0
+PRIORITY_PREDICTED = 60.0
+PRIORITY_STRATEGY = 50.0
+PRIORITY_ON_DECK = 40.0
+PRIORITY_SCAN = 20.0
 
 # --- TRANSLATIONS ---
 TRANSLATIONS = {
@@ -79,6 +115,11 @@ TRANSLATIONS = {
         "scheduler_active": "Scheduler active",
         "no_history": "No history yet",
         "loading_history": "Loading history...",
+        "forecast": "Viewing Forecast",
+        "forecast_expected": "Forecast",
+        "forecast_actual": "Actual",
+        "forecast_warmups": "Planned warm-ups",
+        "forecast_empty": "No forecast yet",
         "waiting_logs": "Waiting for logs...",
         "api_key": "API Key",
         "top_movies_count": "Top Movies Count",
@@ -222,6 +263,11 @@ TRANSLATIONS = {
         "scheduler_active": "Scheduler aktiv",
         "no_history": "Noch kein Verlauf",
         "loading_history": "Lade Verlauf...",
+        "forecast": "Sehprognose",
+        "forecast_expected": "Prognose",
+        "forecast_actual": "Ist",
+        "forecast_warmups": "Geplante Warm-ups",
+        "forecast_empty": "Noch keine Prognose",
         "waiting_logs": "Warte auf Logs...",
         "api_key": "API-Key",
         "nav_dashboard": "Dashboard",
@@ -318,27 +364,198 @@ TRANSLATIONS = {
     }
 }
 
+# --- EVENT BUS (SSE) ---
+
+# Keep-alive-Kommentar, damit Proxies ruhige Streams nicht schließen
+SSE_KEEPALIVE_SECONDS = 15
+
+
+class EventBus:
+    """
+    Verteilt Zustandsänderungen (Status, Stats, Log-Zeilen, Historie) an
+    alle SSE-Abonnenten.
+
+    Jedes Event wird einmal als SSE-Frame gerendert und derselbe String an
+    alle Abonnenten verteilt. Ohne Abonnenten macht publish() nichts (auch
+    die Daten werden dann nicht erzeugt). publish() ist threadsicher, da
+    Logs und Status auch aus Worker-Threads und anderen Loops kommen.
+    """
+
+    QUEUE_SIZE = 200  # Frames je Abonnent, darüber wird verworfen (langsamer Client)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: List[tuple] = []  # (Loop, Queue)
+        self.stats = {"published": 0, "dropped": 0}
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Registriert einen Abonnenten im laufenden Loop."""
+        queue: asyncio.Queue = asyncio.Queue(self.QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s[1] is not queue]
+
+    @staticmethod
+    def frame(event: str, data: Any) -> str:
+        """Rendert ein SSE-Frame (data als JSON)."""
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    def publish(self, event: str, data: Any):
+        """
+        Verteilt ein Event an alle Abonnenten.
+
+        Args:
+            event: status, stats, log oder history
+            data: JSON-fähige Daten oder Callable, das sie erst bei Bedarf erzeugt.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+        frame = self.frame(event, data() if callable(data) else data)
+        self.stats["published"] += 1
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, frame)
+            except RuntimeError:
+                # Loop bereits geschlossen
+                self.unsubscribe(queue)
+
+    def _deliver(self, queue: asyncio.Queue, frame: str):
+        try:
+            queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+
+
+event_bus = EventBus()
+
+
 # --- LOGGING SETUP ---
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Log-Datei rotiert ab dieser Größe, LOG_BACKUP_COUNT ältere Dateien bleiben
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+# Letzte Log-Einträge im Speicher (Dashboard / /api/logs)
+LOG_BUFFER_SIZE = 500
+
+
+def classify_log_message(message: str) -> str:
+    """Leitet den Ereignistyp einer Log-Nachricht ab (einmal beim Schreiben)."""
+    lower = message.lower()
+    if message.startswith("Loaded:"):
+        return "loaded"
+    if message.startswith("Skipped:") or "cached" in lower:
+        return "cached"
+    if "Preload finished" in message:
+        return "run_finished"
+    if "Starting Preload" in message:
+        return "run_started"
+    if "Scheduler" in message:
+        return "scheduler"
+    if "Tautulli" in message:
+        return "tautulli"
+    if "Plex" in message:
+        return "plex"
+    if "Live" in message:
+        return "live"
+    if "error" in lower:
+        return "error"
+    if "warning" in lower:
+        return "warning"
+    if "starting" in lower:
+        return "starting"
+    if "Shutting" in message:
+        return "shutdown"
+    return "info"
+
+
+class LogRingBuffer(logging.Handler):
+    """
+    Hält die letzten Log-Einträge strukturiert im Speicher.
+
+    Je Eintrag: seq, time, level, message, event (Ereignistyp), file und
+    duration_ms. event/file/duration_ms kommen aus extra={...} des
+    Log-Aufrufs, sonst wird der Typ aus der Nachricht abgeleitet. Neue
+    Einträge gehen gerendert an die SSE-Abonnenten.
+    """
+
+    def __init__(self, capacity: int = LOG_BUFFER_SIZE):
+        super().__init__()
+        self.records: deque = deque(maxlen=capacity)
+        self._seq = 0
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            message = record.getMessage()
+            self._seq += 1
+            entry = {
+                "seq": self._seq,
+                "time": record.created,
+                "level": record.levelname,
+                "message": message,
+                "event": getattr(record, "event", None) or classify_log_message(message),
+                "file": getattr(record, "file", None),
+                "duration_ms": getattr(record, "duration_ms", None),
+            }
+            self.records.append(entry)
+            if event_bus.subscribers:
+                event_bus.publish("log", lambda: {"html": render_log_entry(entry)})
+        except Exception:
+            self.handleError(record)
+
+    def tail(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Die letzten limit Einträge (älteste zuerst)."""
+        records = list(self.records)
+        return records[-limit:] if limit > 0 else []
+
+
+log_buffer = LogRingBuffer()
+# Schreibt Datei- und Console-Logs in einem eigenen Thread
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+
 def setup_logging() -> logging.Logger:
-    """Konfiguriert Dual-Logging für Console und Datei."""
+    """
+    Konfiguriert Logging für Datei, Console und Dashboard.
+
+    Datei (rotierend) und Console laufen über eine Queue im Listener-Thread,
+    damit Log-Aufrufe im Hot Path nie auf die Platte warten. Der Ring-Puffer
+    für das Dashboard hängt direkt am Logger.
+    """
+    global _log_listener
     log = logging.getLogger("preloader")
     log.setLevel(logging.INFO)
 
-    formatter = logging.Formatter(
-        '%(asctime)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
 
-    # File Handler
+    # File Handler (rotierend)
     os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
-    file_handler = logging.FileHandler(LOG_FILE)
+    file_handler = logging.handlers.RotatingFileHandler(
+        LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+    )
     file_handler.setFormatter(formatter)
-    log.addHandler(file_handler)
 
     # Console Handler (für docker logs)
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    log.addHandler(console_handler)
+
+    _log_listener = logging.handlers.QueueListener(
+        queue.SimpleQueue(), file_handler, console_handler, respect_handler_level=True
+    )
+    log.addHandler(logging.handlers.QueueHandler(_log_listener.queue))
+    log.addHandler(log_buffer)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
 
     return log
 
@@ -372,6 +589,17 @@ class Config(BaseModel):
     preload_head_mb: int = 60
     preload_tail_mb: int = 1
     ram_max_usage_percent: int = 80
+    # Byte-Budget für selbst gewärmte Daten (0 = aus). Bei Überschreitung
+    # werden die Dateien mit dem geringsten Wert (Priorität mit Altersabschlag)
+    # per posix_fadvise(DONTNEED) verdrängt
+    preload_budget_mb: int = 0
+    preload_budget_half_life_hours: int = 24
+    # Speicher-Governor: Memory-PSI (some avg10 in %) bremst ab pace und
+    # pausiert ab suspend; mit cgroup-Limit gilt ram_max_usage_percent für anon
+    memory_psi_pace_threshold: float = 2.0
+    memory_psi_suspend_threshold: float = 10.0
+    memory_pace_max_delay_seconds: float = 2.0
+    memory_suspend_max_seconds: int = 120
     video_extensions: List[str] = ["mkv", "mp4", "avi", "mov", "wmv", "m4v"]
     cache_threshold_ms: int = 150
     max_files_per_run: int = 50
@@ -413,14 +641,80 @@ class Config(BaseModel):
     cache_recently_added_movies_count: int = 20
     cache_recently_added_shows_count: int = 20
 
+    # Resolver-Backend je Strategie: "tautulli" (Standard) oder "plex"
+    # (Plex liefert Listen und Dateipfade direkt, deutlich weniger Abfragen)
+    cache_recent_releases_backend: str = "tautulli"
+    cache_most_watched_backend: str = "tautulli"
+    cache_recently_added_backend: str = "tautulli"
+
+    # Bibliotheks-Snapshot: Strategien aus lokalem Index statt Einzel-Abfragen
+    library_sync_enabled: bool = False
+    library_sync_backend: str = "tautulli"  # "tautulli" oder "plex"
+    library_sync_page_size: int = 500
+    library_full_sync_interval_hours: int = 24
+
     # Live-Monitoring: Echtzeit-Caching wenn jemand eine Serie schaut
     live_monitoring_enabled: bool = False
     live_check_interval_seconds: int = 60  # Wie oft prüfen
     live_episodes_to_preload: int = 3  # Wie viele nächste Episoden cachen
+    live_next_episodes_backend: str = "tautulli"  # "tautulli" oder "plex"
+    # Quelle für aktive Sessions: "poll" (Tautulli get_activity) oder
+    # "websocket" (Plex-Notifications, fällt bei Verbindungsproblemen auf Polling zurück)
+    live_activity_source: str = "poll"
+    # Adaptives Polling: Backoff bis max im Leerlauf, min bei neuen Sessions,
+    # near_end kurz vor Episodenende (live_check_interval_seconds = Normaltakt)
+    live_adaptive_polling: bool = True
+    live_poll_min_seconds: int = 15
+    live_poll_max_seconds: int = 300
+    live_poll_near_end_seconds: int = 5
+    live_near_end_window_seconds: int = 180
+    # Playhead-Readahead: die nächsten N Sekunden (per Bitrate) der laufenden
+    # Datei vor dem Abspielpunkt im Cache halten
+    live_readahead_enabled: bool = False
+    live_readahead_seconds: int = 300
+    # Residenz der bereits gewärmten nächsten Episoden nur so oft neu prüfen
+    live_residency_recheck_seconds: int = 600
+
+    # Kandidaten eines Laufs nach erwartetem Nutzen pro Byte ordnen
+    # (aus = feste Reihenfolge nach Priorität der Quelle: Strategien, On Deck, Dateisystem)
+    candidate_scoring_enabled: bool = True
+    # Kandidatenquellen (eingebaut und Plugins aus /config/plugins): Zeitlimit je
+    # Quelle und Einstellungen je Name, die die Standardwerte überschreiben,
+    # z.B. {"filesystem": {"enabled": false}, "on_deck": {"timeout_seconds": 10}}
+    candidate_source_timeout_seconds: int = 60
+    candidate_sources: Dict[str, Dict[str, Any]] = {}
+    # Größenstufe je Datei (keine/Head/Head+Tail/erweitert) per Knapsack im
+    # Budget wählen (0 = preload_budget_mb; beide 0 = gleiche Größe für alle)
+    plan_budget_mb: int = 0
+
+    # Prognose: Warm-up vor historischen Spitzenzeiten (Tautulli get_history)
+    predictive_enabled: bool = False
+    predictive_history_days: int = 28
+    predictive_lead_minutes: int = 30  # Warm-up soviel vor der Spitze
+    predictive_min_plays: float = 1.0  # Erwartete Starts pro Stunde für eine Spitze
+    predictive_titles_per_user: int = 5
+
+    # Historie: Datei-Einträge je Lauf so lange behalten, danach nur noch
+    # Tagesaggregate; Läufe insgesamt bis history_retention_days
+    history_detail_days: int = 30
+    history_retention_days: int = 365
+
+    # Wirksamkeit: Wiedergabestarts mit dem Warm-Zustand beim Start korrelieren
+    effectiveness_retention_days: int = 90
+    effectiveness_history_import: bool = True  # Starts stündlich aus der Tautulli-Historie ergänzen
+
+    # Plex-Webhook: gleiche Wiedergabe (Player + Medium) nur einmal behandeln
+    webhook_debounce_seconds: int = 300
 
     # Pfad-Mapping: Plex-Pfade zu Container-Pfaden
     # Format: "plex_pfad:container_pfad" z.B. "/media:/data"
     path_mappings: List[str] = []
+    # Cache für Pfad-Auflösung (gelernte Mappings, stat- und Negativ-Cache)
+    path_stat_cache_ttl_seconds: int = 300
+    path_negative_cache_ttl_seconds: int = 3600
+
+    # Gleichzeitige identische Tautulli/Plex-Anfragen bündeln
+    upstream_result_ttl_seconds: float = 5
 
     # UI-Einstellungen
     language: str = "de"  # "de" oder "en"
@@ -491,6 +785,309 @@ class PreloadHistoryEntry(BaseModel):
     duration_seconds: int
     source: str = "manual"  # manual, scheduler, tautulli, plex
     files_processed: List[str] = []
+    # Aufschlüsselung des Laufs
+    stages: Dict[str, float] = {}  # Abschnitt -> Sekunden
+    bytes_read: int = 0
+    mb_per_s: float = 0.0  # Lesedurchsatz der Platten
+    slowest_files: List[Dict[str, Any]] = []  # {"file", "ms", "mb"}
+    ram_trajectory: List[float] = []  # RAM-% im Verlauf des Laufs
+
+
+# --- RUN HISTORY STORE ---
+
+def _local_date(ts: float) -> str:
+    return time.strftime("%Y-%m-%d", time.localtime(ts))
+
+
+class HistoryStore:
+    """
+    Append-only Historie der Läufe (JSONL, eine Zeile pro Lauf).
+
+    Jeder Lauf wird mit seinen Datei-Einträgen (Quelle, Status, Bytes,
+    Lesezeit, Disk) als Zeile angehängt. Im Speicher liegen nur die
+    Zusammenfassungen mit Byte-Offset (Index) und Tagesaggregate je Quelle
+    und Disk. Die Verdichtung ersetzt die Datei-Einträge von Tagen älter als
+    history_detail_days durch eine Tageszeile und entfernt alles jenseits
+    von history_retention_days.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._runs: List[Dict[str, Any]] = []  # Zusammenfassungen ohne Datei-Einträge, älteste zuerst
+        self._days: Dict[str, Dict[str, Any]] = {}  # Datum -> {"sources": {...}, "disks": {...}}
+        self._next_id = 1
+        if not os.path.exists(self.path):
+            self._import_legacy()
+        self._load()
+
+    def _day(self, date: str) -> Dict[str, Any]:
+        return self._days.setdefault(date, {"sources": {}, "disks": {}})
+
+    def _add_items(self, date: str, items: List[Dict[str, Any]]):
+        """Zählt Datei-Einträge in das Tagesaggregat (Treffer = schon im Cache)."""
+        day = self._day(date)
+        for item in items:
+            source = day["sources"].setdefault(item.get("source") or "unknown", {"hits": 0, "misses": 0, "other": 0, "bytes": 0})
+            status = item.get("status")
+            source["hits" if status == "cached" else "misses" if status == "loaded" else "other"] += 1
+            source["bytes"] += item.get("bytes", 0)
+            # Disk-Durchsatz nur aus kalten Lesevorgängen
+            if status == "loaded" and item.get("read_ms"):
+                disk = day["disks"].setdefault(item.get("disk") or "unknown", {"files": 0, "bytes": 0, "read_ms": 0.0})
+                disk["files"] += 1
+                disk["bytes"] += item.get("bytes", 0)
+                disk["read_ms"] += item["read_ms"]
+
+    def _merge_day(self, date: str, rollup: Dict[str, Any]):
+        day = self._day(date)
+        for key in ("sources", "disks"):
+            for name, values in rollup.get(key, {}).items():
+                target = day[key].setdefault(name, dict.fromkeys(values, 0))
+                for field, value in values.items():
+                    target[field] = target.get(field, 0) + value
+
+    def _index(self, record: Dict[str, Any], offset: int):
+        if record.get("kind") == "day":
+            self._merge_day(record["date"], record)
+            return
+        summary = {k: v for k, v in record.items() if k not in ("kind", "items")}
+        summary["files"] = len(record.get("items", []))
+        summary["offset"] = offset
+        self._runs.append(summary)
+        self._add_items(_local_date(record["time"]), record.get("items", []))
+        self._next_id = max(self._next_id, record.get("id", 0) + 1)
+
+    def _load(self):
+        """Baut Index und Tagesaggregate aus der Datei auf."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                offset = 0
+                for line in f:
+                    try:
+                        self._index(json.loads(line), offset)
+                    except (ValueError, KeyError):
+                        pass  # z.B. abgebrochene letzte Zeile
+                    offset += len(line)
+            self._runs.sort(key=lambda r: r["time"])
+        except Exception as e:
+            logger.error(f"History load error: {e}")
+
+    def _import_legacy(self):
+        """Übernimmt die alte history.json (letzte 100 Läufe) einmalig."""
+        if not os.path.exists(HISTORY_FILE):
+            return
+        try:
+            with open(HISTORY_FILE, 'r') as f:
+                entries = json.load(f)
+            lines = []
+            for i, entry in enumerate(entries, 1):
+                ts = time.mktime(time.strptime(entry["timestamp"], "%Y-%m-%d %H:%M:%S"))
+                lines.append(json.dumps(dict(entry, kind="run", id=i, time=ts, items=[])) + "\n")
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'w') as f:
+                f.writelines(lines)
+            logger.info(f"History: {len(lines)} Läufe aus history.json übernommen")
+        except Exception as e:
+            logger.error(f"History import error: {e}")
+
+    def append(self, run: Dict[str, Any]) -> Dict[str, Any]:
+        """Hängt einen Lauf (mit items = Datei-Einträgen) an."""
+        with self._lock:
+            record = dict(run, kind="run", id=self._next_id)
+            record.setdefault("time", time.time())
+            record.setdefault("items", [])
+            line = (json.dumps(record) + "\n").encode()
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, 'ab') as f:
+                    offset = f.tell()
+                    f.write(line)
+            except Exception as e:
+                logger.error(f"History save error: {e}")
+                offset = -1
+            self._index(record, offset)
+        return record
+
+    def recent(self, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._runs[-limit:])
+
+    def summary(self, run_id: Optional[int] = None, before: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Zusammenfassung eines Laufs ohne Datei-Einträge.
+
+        Args:
+            run_id: ID des Laufs (None = letzter Lauf).
+            before: Statt des Laufs den unmittelbar davor liefern.
+        """
+        with self._lock:
+            if run_id is None:
+                index = len(self._runs) - 1
+            else:
+                index = next((i for i, r in enumerate(self._runs) if r["id"] == run_id), -1)
+            if index < 0:
+                return None
+            if before:
+                index -= 1
+                if index < 0:
+                    return None
+            return {k: v for k, v in self._runs[index].items() if k != "offset"}
+
+    def get(self, run_id: int) -> Optional[Dict[str, Any]]:
+        """Vollständiger Lauf inkl. Datei-Einträgen (per Offset aus der Datei)."""
+        with self._lock:
+            summary = next((r for r in self._runs if r["id"] == run_id), None)
+            if summary is None or summary["offset"] < 0:
+                return summary
+            try:
+                with open(self.path, 'rb') as f:
+                    f.seek(summary["offset"])
+                    record = json.loads(f.readline())
+                record.pop("kind", None)
+                return record
+            except (OSError, ValueError) as e:
+                logger.error(f"History read error: {e}")
+                return summary
+
+    def query(self, page: int = 1, per_page: int = 20, source: Optional[str] = None,
+              since: Optional[str] = None, until: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Läufe seitenweise, neueste zuerst.
+
+        Args:
+            source: Nur Läufe dieser Quelle (manual, scheduler, webhook, ...).
+            since / until: Datumsbereich (YYYY-MM-DD, jeweils inklusive).
+        """
+        with self._lock:
+            runs = [
+                r for r in reversed(self._runs)
+                if (not source or r.get("source") == source)
+                and (not since or _local_date(r["time"]) >= since)
+                and (not until or _local_date(r["time"]) <= until)
+            ]
+        start = (page - 1) * per_page
+        return {
+            "total": len(runs),
+            "page": page,
+            "per_page": per_page,
+            "runs": [{k: v for k, v in r.items() if k != "offset"} for r in runs[start:start + per_page]],
+        }
+
+    def aggregates(self, days: int = 30) -> Dict[str, Any]:
+        """Gewärmte Bytes je Tag, Trefferquote je Quelle und langsamste Disks."""
+        cutoff = _local_date(time.time() - days * 86400)
+        daily: Dict[str, Dict[str, Any]] = {}
+        sources: Dict[str, Dict[str, Any]] = {}
+        disks: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for run in self._runs:
+                date = _local_date(run["time"])
+                if date < cutoff:
+                    continue
+                bucket = daily.setdefault(date, {"date": date, "runs": 0, "bytes": 0, "hits": 0, "misses": 0})
+                bucket["runs"] += 1
+                bucket["bytes"] += run.get("bytes_read", 0)
+            for date, day in self._days.items():
+                if date < cutoff:
+                    continue
+                bucket = daily.setdefault(date, {"date": date, "runs": 0, "bytes": 0, "hits": 0, "misses": 0})
+                for name, values in day["sources"].items():
+                    bucket["hits"] += values["hits"]
+                    bucket["misses"] += values["misses"]
+                    total = sources.setdefault(name, {"hits": 0, "misses": 0, "other": 0, "bytes": 0})
+                    for field in total:
+                        total[field] += values.get(field, 0)
+                for name, values in day["disks"].items():
+                    total = disks.setdefault(name, {"files": 0, "bytes": 0, "read_ms": 0.0})
+                    for field in total:
+                        total[field] += values.get(field, 0)
+
+        for values in list(daily.values()) + list(sources.values()):
+            checked = values["hits"] + values["misses"]
+            values["hit_ratio"] = round(values["hits"] / checked, 3) if checked else None
+        disk_list = [
+            {"disk": name, "files": v["files"], "mb": round(v["bytes"] / (1024**2), 1),
+             "mb_per_s": round(v["bytes"] / (1024**2) / (v["read_ms"] / 1000), 1) if v["read_ms"] else None}
+            for name, v in disks.items()
+        ]
+        disk_list.sort(key=lambda d: d["mb_per_s"] if d["mb_per_s"] is not None else float("inf"))
+        return {
+            "days": days,
+            "daily": sorted(daily.values(), key=lambda d: d["date"]),
+            "sources": sources,
+            "slowest_disks": disk_list,
+        }
+
+    def compact(self):
+        """
+        Verdichtet alte Tage (Datei-Einträge -> Tageszeile) und entfernt Läufe
+        jenseits der Aufbewahrung. Schreibt die Datei atomar neu.
+
+        Die Kopie entsteht ohne Lock, append() läuft währenddessen weiter;
+        nur das Nachziehen der seitdem angehängten Zeilen und der Austausch
+        der Datei halten den Lock.
+        """
+        now = time.time()
+        detail_cutoff = _local_date(now - config.history_detail_days * 86400)
+        retention_cutoff = _local_date(now - config.history_retention_days * 86400)
+        with self._lock:
+            if not os.path.exists(self.path):
+                return
+            end = os.path.getsize(self.path)
+            # Neue Läufe fallen nie in verdichtete Tage, die Rollups bleiben gültig
+            rollups = [
+                json.dumps({"kind": "day", "date": date, **day}) + "\n"
+                for date, day in sorted(self._days.items())
+                if retention_cutoff <= date < detail_cutoff
+            ]
+
+        dropped = downsampled = 0
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(self.path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                offset = 0
+                for line in src:
+                    offset += len(line)
+                    if offset > end:
+                        break
+                    try:
+                        record = json.loads(line)
+                        date = record["date"] if record.get("kind") == "day" else _local_date(record["time"])
+                    except (ValueError, KeyError):
+                        continue
+                    if date < retention_cutoff:
+                        dropped += record.get("kind") == "run"
+                        continue
+                    if date < detail_cutoff:
+                        # Tageszeilen werden unten aus den Aggregaten neu geschrieben
+                        if record.get("kind") == "day":
+                            continue
+                        if record.get("items"):
+                            downsampled += 1
+                            record["items"] = []
+                            record.pop("ram_trajectory", None)
+                    dst.write((json.dumps(record) + "\n").encode())
+                dst.writelines(line.encode() for line in rollups)
+
+            with self._lock:
+                with open(self.path, 'rb') as src, open(tmp_path, 'ab') as dst:
+                    src.seek(end)
+                    dst.write(src.read())
+                os.replace(tmp_path, self.path)
+                self._runs, self._days = [], {}
+                self._load()
+        except Exception as e:
+            logger.error(f"History compaction error: {e}")
+            return
+
+        if dropped or downsampled:
+            logger.info(f"History: {downsampled} Läufe verdichtet, {dropped} entfernt")
+
+
+history_store = HistoryStore(HISTORY_STORE_FILE)
 
 
 # --- GLOBAL STATE (Thread-Safe) ---
@@ -507,8 +1104,9 @@ class AppState:
             "duration": 0,
             "last_run": "Never"
         }
-        self.current_action: str = "Idle"
-        self.history: List[PreloadHistoryEntry] = self._load_history()
+        self._current_action: str = "Idle"
+        self.rerun_requested: Optional[str] = None  # Quelle eines zusammengefassten Triggers
+        self.history: List[PreloadHistoryEntry] = [PreloadHistoryEntry(**r) for r in history_store.recent(100)]
 
     @property
     def is_running(self) -> bool:
@@ -521,33 +1119,36 @@ class AppState:
         """Thread-sicherer Setter für is_running."""
         with self._lock:
             self._is_running = value
+        self._publish_status()
 
-    def _load_history(self) -> List[PreloadHistoryEntry]:
-        """Lädt die Historie aus der JSON-Datei."""
-        if os.path.exists(HISTORY_FILE):
-            try:
-                with open(HISTORY_FILE, 'r') as f:
-                    data = json.load(f)
-                    return [PreloadHistoryEntry(**entry) for entry in data[-100:]]
-            except Exception as e:
-                logger.error(f"History load error: {e}")
-        return []
+    @property
+    def current_action(self) -> str:
+        return self._current_action
+
+    @current_action.setter
+    def current_action(self, value: str):
+        """Setzt den Laufstatus und schickt ihn an die SSE-Abonnenten."""
+        changed = value != self._current_action
+        self._current_action = value
+        if changed:
+            self._publish_status()
 
-    def add_history_entry(self, entry: PreloadHistoryEntry):
-        """Fügt einen Eintrag zur Historie hinzu und speichert."""
+    def _publish_status(self):
+        event_bus.publish("status", lambda: {"status": self._current_action, "is_running": self._is_running})
+
+    def add_history_entry(self, entry: PreloadHistoryEntry, items: Optional[List[Dict[str, Any]]] = None):
+        """
+        Fügt einen Lauf zur Historie hinzu (inkl. Datei-Einträgen im History-Store).
+
+        Args:
+            entry: Zusammenfassung des Laufs.
+            items: Datei-Einträge (siehe history_items).
+        """
+        history_store.append(dict(entry.model_dump(), items=items or []))
         self.history.append(entry)
-        # Nur die letzten 100 Einträge behalten
+        # Für Dashboard und Vergleich nur die letzten 100 im Speicher
         self.history = self.history[-100:]
-        self._save_history()
-
-    def _save_history(self):
-        """Speichert die Historie in die JSON-Datei."""
-        try:
-            os.makedirs(os.path.dirname(HISTORY_FILE), exist_ok=True)
-            with open(HISTORY_FILE, 'w') as f:
-                json.dump([e.model_dump() for e in self.history], f, indent=2)
-        except Exception as e:
-            logger.error(f"History save error: {e}")
+        event_bus.publish("history", lambda: {"html": render_history_html()})
 
 
 state = AppState()
@@ -556,15 +1157,23 @@ config = Config.load()
 # --- HELPER FUNCTIONS ---
 
 def get_ram_usage() -> dict:
-    """Gibt RAM-Informationen des Hosts zurück."""
-    mem = psutil.virtual_memory()
+    """Gibt RAM-Informationen zurück (Container-Limit falls gesetzt, sonst Host)."""
+    mem = memory_governor.usage()
     return {
-        "total": f"{mem.total / (1024**3):.2f} GB",
-        "available": f"{mem.available / (1024**3):.2f} GB",
-        "percent": mem.percent
+        "total": f"{mem['total'] / (1024**3):.2f} GB",
+        "available": f"{mem['available'] / (1024**3):.2f} GB",
+        "percent": mem['percent']
     }
 
 
+def _to_int(value: Any) -> int:
+    """Konvertiert API-Werte (None, Strings, Floats) robust zu int."""
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
 def is_video_file(filename: str, extensions: List[str]) -> bool:
     """Prüft effizient ob eine Datei eine Video-Datei ist."""
     ext_tuple = tuple(f".{ext.lower()}" for ext in extensions)
@@ -601,25 +1210,78 @@ def read_file_chunk(filepath: str, size_mb: int, offset_from_end: bool = False)
         return 0
 
 
-def read_log_tail(filepath: str, num_lines: int = 20) -> str:
-    """Liest effizient die letzten N Zeilen einer Log-Datei."""
-    if not os.path.exists(filepath):
-        return "No logs yet."
+def read_file_range(filepath: str, offset: int, length: int, chunk_size: int = 8 * 1024 * 1024) -> int:
+    """
+    Liest einen Byte-Bereich einer Datei in den System-Cache.
 
+    Returns:
+        Anzahl gelesener Bytes.
+    """
+    read_bytes = 0
     try:
         with open(filepath, "rb") as f:
-            f.seek(0, 2)
-            file_size = f.tell()
-            if file_size == 0:
-                return "No logs yet."
-
-            buffer_size = min(file_size, num_lines * 150)
-            f.seek(max(0, file_size - buffer_size))
-            lines = f.read().decode('utf-8', errors='replace').splitlines()
-            return '\n'.join(lines[-num_lines:])
+            f.seek(offset)
+            while read_bytes < length:
+                data = f.read(min(chunk_size, length - read_bytes))
+                if not data:
+                    break
+                read_bytes += len(data)
     except Exception as e:
-        logger.error(f"Error reading log file: {e}")
-        return f"Error reading logs: {e}"
+        logger.error(f"Error reading {filepath}: {e}")
+    return read_bytes
+
+
+# Ereignistyp -> (Icon, CSS-Klasse der Nachricht)
+LOG_EVENT_STYLES = {
+    "loaded": ("📦 ", "text-gray-300"),
+    "cached": ("⚡ ", "text-emerald-400"),
+    "run_finished": ("✅ ", "text-emerald-400 font-semibold"),
+    "run_started": ("🚀 ", "text-blue-300 font-semibold"),
+    "scheduler": ("⏰ ", "text-gray-300"),
+    "tautulli": ("📊 ", "text-gray-300"),
+    "plex": ("🎬 ", "text-gray-300"),
+    "live": ("📡 ", "text-purple-400"),
+    "error": ("❌ ", "text-red-400"),
+    "warning": ("⚠️ ", "text-yellow-400"),
+    "starting": ("🔄 ", "text-gray-300"),
+    "shutdown": ("🛑 ", "text-orange-400"),
+    "info": ("", "text-gray-300"),
+}
+LOG_LEVEL_COLORS = {
+    'INFO': 'text-blue-400',
+    'WARNING': 'text-yellow-400',
+    'ERROR': 'text-red-400',
+    'DEBUG': 'text-gray-500'
+}
+
+
+def render_log_entry(entry: Dict[str, Any]) -> str:
+    """
+    Formatiert einen Log-Eintrag aus dem Ring-Puffer als HTML für das Dashboard.
+
+    Formatierung:
+    - Zeitstempel in grau
+    - INFO in blau, WARNING in gelb, ERROR in rot
+    - Dateinamen hervorgehoben
+    - Zeiten in grün
+    """
+    icon, msg_class = LOG_EVENT_STYLES.get(entry["event"], LOG_EVENT_STYLES["info"])
+    level_class = LOG_LEVEL_COLORS.get(entry["level"], 'text-gray-400')
+    if entry["file"] and entry["duration_ms"] is not None:
+        message = (
+            f'<span class="text-white">{html.escape(entry["file"])}</span> '
+            f'<span class="text-emerald-400">({entry["duration_ms"]}ms)</span>'
+        )
+    else:
+        message = html.escape(entry["message"])
+
+    return (
+        f'<div class="flex gap-2 py-0.5 border-b border-slate-800/50">'
+        f'<span class="text-gray-500 shrink-0">{time.strftime("%H:%M:%S", time.localtime(entry["time"]))}</span>'
+        f'<span class="{level_class} shrink-0 w-12">{entry["level"]}</span>'
+        f'<span class="{msg_class}">{icon}{message}</span>'
+        f'</div>'
+    )
 
 
 def check_file_cached(filepath: str, size_mb: int = 1) -> bool:
@@ -628,578 +1290,3946 @@ def check_file_cached(filepath: str, size_mb: int = 1) -> bool:
     return duration < config.cache_threshold_ms
 
 
-# --- TAUTULLI API CLIENT ---
+class StageTimer:
+    """Misst die Dauer benannter Abschnitte eines Laufs (Sekunden, aufsummiert)."""
 
-async def fetch_tautulli_data() -> Dict[str, List[str]]:
-    """
-    Holt Daten von Tautulli basierend auf aktiven Caching-Strategien.
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
 
-    Strategien:
-    - recent_releases: Nach Erscheinungsdatum sortiert
-    - most_watched: Nach Wiedergabe-Anzahl sortiert
-    - recently_added: Nach Hinzufüge-Datum sortiert
+    @contextmanager
+    def stage(self, name: str):
+        start_t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round(self.stages.get(name, 0.0) + time.perf_counter() - start_t, 3)
 
-    Returns:
-        Dict mit allen gefundenen Dateipfaden nach Kategorie.
-    """
-    result = {
-        "recent_movies": [], "recent_shows": [],
-        "watched_movies": [], "watched_shows": [],
-        "added_movies": [], "added_shows": []
-    }
 
-    if not config.tautulli_enabled or not config.tautulli_url or not config.tautulli_api_key:
-        return result
+# --- METRICS ---
 
-    base_url = config.tautulli_url.rstrip('/')
+class _Metric:
+    """Eine Prometheus-Metrik (counter, gauge oder histogram) mit Labels."""
 
-    async with httpx.AsyncClient(timeout=90.0) as client:
-        try:
-            # Hole alle Bibliotheken
-            libs_resp = await client.get(
-                f"{base_url}/api/v2",
-                params={"apikey": config.tautulli_api_key, "cmd": "get_libraries"}
-            )
+    def __init__(self, name: str, help_text: str, kind: str, labels: tuple = (),
+                 buckets: tuple = (), callback=None):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labels = labels
+        self.buckets = buckets
+        self.callback = callback  # Gauge: beim Abruf ermittelt
+        self._values: Dict[tuple, Any] = {}
+        self._lock = threading.Lock()
 
-            if libs_resp.status_code != 200:
-                logger.warning("Tautulli: Konnte Bibliotheken nicht laden")
-                return result
+    def _key(self, labels: Dict[str, Any]) -> tuple:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
 
-            libs_data = libs_resp.json()
-            libraries = libs_data.get("response", {}).get("data", [])
-            movie_sections = [lib["section_id"] for lib in libraries if lib.get("section_type") == "movie"]
-            show_sections = [lib["section_id"] for lib in libraries if lib.get("section_type") == "show"]
+    def inc(self, amount: float = 1, **labels):
+        """Erhöht einen Counter (oder Gauge)."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
 
-            # === STRATEGIE 1: Neueste Releases (nach Erscheinungsdatum) ===
-            if config.cache_recent_releases:
-                await _fetch_by_order(
-                    client, base_url, movie_sections, show_sections,
-                    "originally_available_at", "desc",
-                    config.cache_recent_movies_count, config.cache_recent_shows_count,
-                    result, "recent_movies", "recent_shows"
-                )
-                logger.info(f"📅 Neueste Releases: {len(result['recent_movies'])} Filme, {len(result['recent_shows'])} Serien")
+    def set(self, value: float, **labels):
+        """Setzt einen Gauge."""
+        with self._lock:
+            self._values[self._key(labels)] = value
 
-            # === STRATEGIE 2: Meistgesehen (nach Watch-Count) ===
-            if config.cache_most_watched:
-                await _fetch_most_watched(
-                    client, base_url,
-                    config.cache_most_watched_movies_count,
-                    config.cache_most_watched_shows_count,
-                    result
-                )
-                logger.info(f"👀 Meistgesehen: {len(result['watched_movies'])} Filme, {len(result['watched_shows'])} Serien")
+    def observe(self, value: float, **labels):
+        """Erfasst einen Wert in einem Histogramm."""
+        key = self._key(labels)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[0][i] += 1
+                    break
+            data[1] += value
+            data[2] += 1
+
+    def _format_labels(self, key: tuple, extra: str = "") -> str:
+        pairs = [f'{label}="{_escape_label(value)}"' for label, value in zip(self.labels, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        """Gibt die Metrik im Prometheus-Textformat zurück."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        if self.callback:
+            try:
+                self.set(self.callback())
+            except Exception:
+                pass
+        with self._lock:
+            values = list(self._values.items())
 
-            # === STRATEGIE 3: Zuletzt hinzugefügt (nach Added-Datum) ===
-            if config.cache_recently_added:
-                await _fetch_by_order(
-                    client, base_url, movie_sections, show_sections,
-                    "added_at", "desc",
-                    config.cache_recently_added_movies_count, config.cache_recently_added_shows_count,
-                    result, "added_movies", "added_shows"
-                )
-                logger.info(f"➕ Zuletzt hinzugefügt: {len(result['added_movies'])} Filme, {len(result['added_shows'])} Serien")
+        for key, value in sorted(values):
+            if self.kind != "histogram":
+                lines.append(f"{self.name}{self._format_labels(key)} {value}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = self._format_labels(key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            inf_labels = self._format_labels(key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf_labels} {count}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {count}")
+        return lines
 
-        except Exception as e:
-            logger.error(f"Tautulli API error: {e}")
 
-    return result
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
 
 
-async def _fetch_by_order(
-    client: httpx.AsyncClient,
-    base_url: str,
-    movie_sections: List[str],
-    show_sections: List[str],
-    order_column: str,
-    order_dir: str,
-    movies_count: int,
-    shows_count: int,
-    result: Dict[str, List[str]],
-    movies_key: str,
-    shows_key: str
-):
-    """
-    Hilfsfunktion: Holt Filme/Serien sortiert nach einer Spalte.
-    """
-    # Filme
-    for section_id in movie_sections:
-        resp = await client.get(
-            f"{base_url}/api/v2",
-            params={
-                "apikey": config.tautulli_api_key,
-                "cmd": "get_library_media_info",
-                "section_id": section_id,
-                "order_column": order_column,
-                "order_dir": order_dir,
-                "length": movies_count
-            }
-        )
-        if resp.status_code == 200:
-            data = resp.json()
-            if data.get("response", {}).get("result") == "success":
-                movies = data.get("response", {}).get("data", {}).get("data", [])
-                for movie in movies:
-                    if len(result[movies_key]) >= movies_count:
-                        break
-                    rating_key = movie.get("rating_key")
-                    if rating_key:
-                        file_path = await _find_media_file(client, base_url, rating_key)
-                        if file_path and file_path not in result[movies_key]:
-                            result[movies_key].append(file_path)
+class MetricsRegistry:
+    """Minimale Prometheus-Registry (ohne Zusatzabhängigkeit, billig genug für Hot Paths)."""
 
-    # Serien (erste Episode)
-    for section_id in show_sections:
-        resp = await client.get(
-            f"{base_url}/api/v2",
-            params={
-                "apikey": config.tautulli_api_key,
-                "cmd": "get_library_media_info",
-                "section_id": section_id,
-                "order_column": order_column,
-                "order_dir": order_dir,
-                "length": shows_count
-            }
-        )
-        if resp.status_code == 200:
-            data = resp.json()
-            if data.get("response", {}).get("result") == "success":
-                shows = data.get("response", {}).get("data", {}).get("data", [])
-                for show in shows:
-                    if len(result[shows_key]) >= shows_count:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def _add(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: tuple = ()) -> _Metric:
+        return self._add(_Metric(name, help_text, "counter", labels))
+
+    def gauge(self, name: str, help_text: str, labels: tuple = (), callback=None) -> _Metric:
+        return self._add(_Metric(name, help_text, "gauge", labels, callback=callback))
+
+    def histogram(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = ()) -> _Metric:
+        return self._add(_Metric(name, help_text, "histogram", labels, buckets=buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+_THROUGHPUT_BUCKETS = (10, 25, 50, 100, 200, 400, 800, 1600, 3200)
+
+metrics = MetricsRegistry()
+METRIC_BYTES_WARMED = metrics.counter(
+    "preloader_bytes_warmed_total", "Bytes read into the page cache", ("source", "disk"))
+METRIC_READ_SECONDS = metrics.histogram(
+    "preloader_read_seconds", "Latency of a single warm-up read", ("disk",), _LATENCY_BUCKETS)
+METRIC_READ_THROUGHPUT = metrics.histogram(
+    "preloader_read_throughput_mbps", "Warm-up read throughput per file (MB/s)", ("disk",), _THROUGHPUT_BUCKETS)
+METRIC_CANDIDATES = metrics.counter(
+    "preloader_candidates_total", "Preload candidates per source", ("source",))
+METRIC_CACHE_CHECKS = metrics.counter(
+    "preloader_cache_checks_total", "Warm-up results (hit = already cached, miss = loaded)", ("result",))
+METRIC_UPSTREAM_SECONDS = metrics.histogram(
+    "preloader_upstream_request_seconds", "Tautulli/Plex request latency", ("backend", "cmd"), _LATENCY_BUCKETS)
+METRIC_SCAN_SECONDS = metrics.histogram(
+    "preloader_scan_seconds", "Duration of the filesystem scan", (), (1, 5, 15, 30, 60, 120, 300, 600))
+METRIC_FILES_SCANNED = metrics.counter(
+    "preloader_files_scanned_total", "Files visited by the filesystem scan")
+METRIC_LIVE_SESSIONS = metrics.counter(
+    "preloader_live_sessions_seen_total", "Playback sessions seen by live monitoring")
+METRIC_PLAY_STARTS = metrics.counter(
+    "preloader_play_starts_total", "Play starts by warming source (hit = head was warm)", ("source", "result"))
+metrics.gauge("preloader_queue_depth", "Items waiting in the work queue",
+              callback=lambda: len(work_queue.snapshot()))
+metrics.gauge("preloader_live_sessions", "Currently tracked live sessions",
+              callback=lambda: len(session_tracker._sessions))
+
+_disk_labels: Dict[int, str] = {}
+
+
+def disk_label(filepath: str) -> str:
+    """Mountpoint (Disk) einer Datei als Metrik-Label, je Gerät gecacht."""
+    try:
+        dev = os.stat(filepath).st_dev
+    except OSError:
+        return "unknown"
+    label = _disk_labels.get(dev)
+    if label is None:
+        label = f"{os.major(dev)}:{os.minor(dev)}"
+        try:
+            with open("/proc/self/mountinfo", 'r') as f:
+                for line in f:
+                    fields = line.split()
+                    if fields[2] == label:
+                        label = fields[4]
                         break
-                    show_key = show.get("rating_key")
-                    if show_key:
-                        first_eps = await _find_next_episodes(
-                            client, base_url, show_key,
-                            last_season=0, last_episode=0, max_episodes=1
-                        )
-                        for ep in first_eps:
-                            if ep not in result[shows_key]:
-                                result[shows_key].append(ep)
+        except OSError:
+            pass
+        _disk_labels[dev] = label
+    return label
 
 
-async def _fetch_most_watched(
-    client: httpx.AsyncClient,
-    base_url: str,
-    movies_count: int,
-    shows_count: int,
-    result: Dict[str, List[str]]
-):
-    """
-    Hilfsfunktion: Holt meistgesehene Filme und Serien.
-    """
-    # Meistgesehene Filme (letzte 30 Tage)
-    resp = await client.get(
-        f"{base_url}/api/v2",
-        params={
-            "apikey": config.tautulli_api_key,
-            "cmd": "get_home_stats",
-            "stat_id": "top_movies",
-            "stats_count": movies_count,
-            "time_range": 30
-        }
-    )
-    if resp.status_code == 200:
-        data = resp.json()
-        if data.get("response", {}).get("result") == "success":
-            rows = data.get("response", {}).get("data", {}).get("rows", [])
-            for movie in rows:
-                rating_key = movie.get("rating_key")
-                if rating_key:
-                    file_path = await _find_media_file(client, base_url, rating_key)
-                    if file_path and file_path not in result["watched_movies"]:
-                        result["watched_movies"].append(file_path)
+# --- PAGE CACHE BUDGET ---
 
-    # Meistgesehene Serien (letzte 30 Tage)
-    resp = await client.get(
-        f"{base_url}/api/v2",
-        params={
-            "apikey": config.tautulli_api_key,
-            "cmd": "get_home_stats",
-            "stat_id": "top_tv",
-            "stats_count": shows_count,
-            "time_range": 30
-        }
-    )
-    if resp.status_code == 200:
-        data = resp.json()
-        if data.get("response", {}).get("result") == "success":
-            rows = data.get("response", {}).get("data", {}).get("rows", [])
-            for show in rows:
-                show_key = show.get("grandparent_rating_key") or show.get("rating_key")
-                if show_key:
-                    first_eps = await _find_next_episodes(
-                        client, base_url, show_key,
-                        last_season=0, last_episode=0, max_episodes=1
-                    )
-                    for ep in first_eps:
-                        if ep not in result["watched_shows"]:
-                            result["watched_shows"].append(ep)
+def _load_libc():
+    """Lädt libc für mmap/mincore (nur Linux), sonst None."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.mmap.restype = ctypes.c_void_p
+        libc.mmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_long]
+        libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        libc.mincore.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.POINTER(ctypes.c_ubyte)]
+        return libc
+    except (OSError, AttributeError):
+        return None
 
 
-async def _find_media_file(client: httpx.AsyncClient, base_url: str, rating_key: str) -> Optional[str]:
+_libc = _load_libc()
+_MAP_FAILED = ctypes.c_void_p(-1).value
+# mincore: nur Bit 0 je Seite ist definiert
+_MINCORE_RESIDENT = bytes(b & 1 for b in range(256))
+
+
+def probe_resident_bytes(filepath: str, offset: int, length: int) -> Optional[int]:
     """
-    Findet den Dateipfad für ein Medium über rating_key.
+    Ermittelt per mincore, wie viele Bytes eines Bereichs im Page-Cache liegen.
 
-    Konvertiert Plex-Pfade zu Container-Pfaden falls nötig.
+    Das Mapping selbst lädt keine Seiten, die Prüfung verändert den Cache
+    also nicht (anders als die Lesezeit-Probe).
+
+    Returns:
+        Residente Bytes oder None, wenn keine Prüfung möglich ist.
     """
+    if _libc is None or length <= 0:
+        return None
     try:
-        resp = await client.get(
-            f"{base_url}/api/v2",
-            params={
-                "apikey": config.tautulli_api_key,
-                "cmd": "get_metadata",
-                "rating_key": rating_key
-            }
-        )
-        if resp.status_code == 200:
-            data = resp.json()
-            metadata = data.get("response", {}).get("data", {})
-
-            file_path = None
-
-            # Prüfe verschiedene Pfad-Felder
-            for field in ["file", "file_path", "media_info"]:
-                if field in metadata:
-                    if field == "media_info" and isinstance(metadata[field], list):
-                        for media in metadata[field]:
-                            for part in media.get("parts", []):
-                                if "file" in part:
-                                    file_path = part["file"]
-                                    break
-                            if file_path:
-                                break
-                    else:
-                        file_path = metadata[field]
-                    if file_path:
-                        break
+        fd = os.open(filepath, os.O_RDONLY)
+    except OSError:
+        return None
 
-            if file_path:
-                original_path = file_path
+    try:
+        start = offset - offset % mmap.PAGESIZE
+        span = min(offset + length, os.fstat(fd).st_size) - start
+        if span <= 0:
+            return 0
+        addr = _libc.mmap(None, span, mmap.PROT_READ, mmap.MAP_SHARED, fd, start)
+        if addr is None or addr == _MAP_FAILED:
+            return None
+        try:
+            vec = (ctypes.c_ubyte * ((span + mmap.PAGESIZE - 1) // mmap.PAGESIZE))()
+            if _libc.mincore(addr, span, vec) != 0:
+                return None
+            resident_pages = bytes(vec).translate(_MINCORE_RESIDENT).count(1)
+        finally:
+            _libc.munmap(addr, span)
+        return min(resident_pages * mmap.PAGESIZE, length)
+    finally:
+        os.close(fd)
 
-                # 1. Versuche konfiguriertes Pfad-Mapping
-                mapped_path = config.map_path(file_path)
-                if mapped_path != file_path and os.path.exists(mapped_path):
-                    logger.debug(f"Pfad gemappt (config): {original_path} -> {mapped_path}")
-                    return mapped_path
 
-                # 2. Prüfe ob der Original-Pfad existiert
-                if os.path.exists(file_path):
-                    return file_path
+def evict_file_range(filepath: str, offset: int, length: int) -> bool:
+    """Entfernt einen Byte-Bereich per posix_fadvise(DONTNEED) aus dem Page-Cache."""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    try:
+        fd = os.open(filepath, os.O_RDONLY)
+    except OSError:
+        return False
+    try:
+        os.posix_fadvise(fd, offset, length, os.POSIX_FADV_DONTNEED)
+        return True
+    except OSError:
+        return False
+    finally:
+        os.close(fd)
 
-                # 3. Versuche automatisches Pfad-Mapping über video_paths
-                for video_path in config.video_paths:
-                    path_parts = file_path.replace('\\', '/').split('/')
-                    for i in range(len(path_parts)):
-                        test_path = os.path.join(video_path, *path_parts[i:])
-                        if os.path.exists(test_path):
-                            logger.debug(f"Pfad gemappt (auto): {original_path} -> {test_path}")
-                            return test_path
 
-                logger.warning(f"Pfad nicht gefunden: {file_path} (Tipp: Pfad-Mapping in Einstellungen konfigurieren)")
+def preload_ranges(filepath: str, head_mb: int, tail_mb: int) -> List[List[int]]:
+    """Gibt die Head/Tail-Bereiche ([offset, länge]) zurück, die ein Preload liest."""
+    try:
+        size = os.path.getsize(filepath)
+    except OSError:
+        return []
+    head = min(size, head_mb * 1024 * 1024)
+    tail = min(size, tail_mb * 1024 * 1024)
+    if tail and size - tail <= head:
+        return [[0, size]]
+    ranges = [[0, head]] if head else []
+    if tail:
+        ranges.append([size - tail, tail])
+    return ranges
+
+
+class PreloadLedger:
+    """
+    Buchführung über die vom Preloader gewärmten Daten mit Byte-Budget.
+
+    Jeder Eintrag hält die gewärmten Bereiche einer Datei, Priorität und
+    Quelle. Die Residenz wird je Eintrag per mincore geprüft (ohne mincore
+    gelten gewärmte Bytes als resident); Einträge, die der Kernel bereits
+    verdrängt hat, fallen dabei heraus. Reicht das Budget nicht, werden
+    Einträge mit geringerem Wert als der neue Kandidat verdrängt.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        self._resident_total = 0
+        self._probed_at = 0.0
+        self.evicted_files = 0
+        self.evicted_bytes = 0
+        self._load()
+
+    @staticmethod
+    def value(entry: Dict[str, Any], now: float) -> float:
+        """Priorität mit Altersabschlag (Halbwertszeit aus der Config)."""
+        age_hours = max(0.0, now - entry["warmed_at"]) / 3600
+        return entry["priority"] * 0.5 ** (age_hours / max(config.preload_budget_half_life_hours, 1))
+
+    def _probe(self, entry: Dict[str, Any]) -> int:
+        """Aktualisiert die residenten Bytes eines Eintrags."""
+        resident = 0
+        for offset, length in entry["ranges"]:
+            probed = probe_resident_bytes(entry["path"], offset, length)
+            resident += length if probed is None else probed
+        entry["resident"] = resident
+        return resident
+
+    def resident_bytes(self, max_age: float = 30) -> int:
+        """Residente Bytes aller Einträge (Probe höchstens alle max_age Sekunden)."""
+        with self._lock:
+            if time.monotonic() - self._probed_at < max_age:
+                return self._resident_total
+            total = 0
+            for path, entry in list(self._entries.items()):
+                resident = self._probe(entry) if os.path.exists(path) else 0
+                if resident == 0:
+                    del self._entries[path]
+                    continue
+                total += resident
+            self._resident_total = total
+            self._probed_at = time.monotonic()
+            return total
+
+    def ensure_room(self, filepath: str, needed: int, priority: float) -> bool:
+        """
+        Schafft Platz für needed Bytes im Budget.
+
+        Verdrängt nur Einträge mit geringerem Wert als priority.
+
+        Returns:
+            False, wenn das Budget auch danach nicht reicht.
+        """
+        budget = config.preload_budget_mb * 1024 * 1024
+        if budget <= 0:
+            return True
+        if needed > budget:
+            return False
+
+        with self._lock:
+            total = self.resident_bytes()
+            existing = self._entries.get(filepath)
+            if existing:
+                total -= existing.get("resident", 0)
+            if total + needed <= budget:
+                return True
+
+            now = time.time()
+            victims = sorted(
+                (e for p, e in self._entries.items() if p != filepath),
+                key=lambda e: self.value(e, now)
+            )
+            for entry in victims:
+                if total + needed <= budget or self.value(entry, now) >= priority:
+                    break
+                total -= self._evict(entry)
+            self._resident_total = total + (existing.get("resident", 0) if existing else 0)
+            return total + needed <= budget
+
+    def _evict(self, entry: Dict[str, Any]) -> int:
+        """Verdrängt einen Eintrag aus dem Page-Cache und dem Ledger."""
+        for offset, length in entry["ranges"]:
+            evict_file_range(entry["path"], offset, length)
+        del self._entries[entry["path"]]
+        resident = entry.get("resident", 0)
+        self.evicted_files += 1
+        self.evicted_bytes += resident
+        logger.info(
+            f"♻️ Budget: {os.path.basename(entry['path'])} verdrängt "
+            f"({resident / (1024**2):.0f} MB, Quelle: {entry['source']})"
+        )
+        return resident
+
+    def record(self, filepath: str, ranges: List[List[int]], priority: float, source: str):
+        """Trägt gewärmte Bereiche einer Datei ein (bestehende Einträge werden erweitert)."""
+        if not ranges:
+            return
+        with self._lock:
+            now = time.time()
+            entry = self._entries.get(filepath)
+            if entry:
+                self._resident_total -= entry.get("resident", 0)
+                priority = max(priority, self.value(entry, now))
+                ranges = entry["ranges"] + [r for r in ranges if r not in entry["ranges"]]
+            entry = {
+                "path": filepath,
+                "ranges": ranges,
+                "priority": priority,
+                "source": source,
+                "warmed_at": now,
+            }
+            self._entries[filepath] = entry
+            self._resident_total += self._probe(entry)
+
+    def entry(self, filepath: str) -> Optional[Dict[str, Any]]:
+        """Kopie des Eintrags einer Datei (oder None)."""
+        with self._lock:
+            entry = self._entries.get(filepath)
+            return dict(entry) if entry else None
+
+    def by_source(self) -> Dict[str, Dict[str, Any]]:
+        """Gehaltene Dateien und residente MB je Quelle."""
+        held: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            self.resident_bytes()
+            for entry in self._entries.values():
+                source = held.setdefault(entry["source"], {"files": 0, "resident_mb": 0.0})
+                source["files"] += 1
+                source["resident_mb"] += entry.get("resident", 0) / (1024**2)
+        for source in held.values():
+            source["resident_mb"] = round(source["resident_mb"], 1)
+        return held
+
+    def stats(self) -> Dict[str, Any]:
+        """Kennzahlen für Dashboard/API."""
+        return {
+            "budget_mb": config.preload_budget_mb,
+            "resident_mb": round(self.resident_bytes() / (1024**2), 1),
+            "files": len(self._entries),
+            "evicted_files": self.evicted_files,
+            "evicted_mb": round(self.evicted_bytes / (1024**2), 1),
+            "probe": "mincore" if _libc is not None else "estimate",
+        }
+
+    def _load(self):
+        """Lädt das Ledger aus der JSON-Datei."""
+        if not os.path.exists(PRELOAD_LEDGER_FILE):
+            return
+        try:
+            with open(PRELOAD_LEDGER_FILE, 'r') as f:
+                self._entries = {e["path"]: e for e in json.load(f)}
+        except Exception as e:
+            logger.error(f"Preload ledger load error: {e}")
+
+    def save(self):
+        """Speichert das Ledger (der Page-Cache überlebt Container-Neustarts)."""
+        try:
+            with self._lock:
+                entries = list(self._entries.values())
+            os.makedirs(os.path.dirname(PRELOAD_LEDGER_FILE), exist_ok=True)
+            with open(PRELOAD_LEDGER_FILE, 'w') as f:
+                json.dump(entries, f)
+        except Exception as e:
+            logger.error(f"Preload ledger save error: {e}")
+
+
+preload_ledger = PreloadLedger()
+
+
+# --- MEMORY GOVERNOR ---
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+PSI_FILE = "/proc/pressure/memory"
+
+
+def _read_first_line(filepath: str) -> Optional[str]:
+    """Liest die erste Zeile einer procfs/cgroupfs-Datei (None wenn nicht lesbar)."""
+    try:
+        with open(filepath, 'r') as f:
+            return f.readline().strip()
+    except OSError:
+        return None
+
+
+class MemoryGovernor:
+    """
+    Steuert das Wärmen anhand von cgroup v2 und Memory-PSI.
+
+    Page-Cache ist rückforderbar und darf den Container füllen; maßgeblich
+    sind daher der nicht rückforderbare Anteil (anon) gegenüber memory.max
+    und die PSI-Werte (Anteil der Zeit, in der Tasks auf Reclaim warten).
+    Steigt der Druck, wird das Wärmen gebremst bzw. pausiert. Ohne cgroup v2
+    und PSI gilt weiter ram_max_usage_percent gegen den Host-RAM.
+    """
+
+    def __init__(self, cgroup_root: str = CGROUP_ROOT, psi_file: str = PSI_FILE):
+        self.cgroup_root = cgroup_root
+        self.psi_file = psi_file
+        self.paced = 0
+        self.suspended_seconds = 0.0
+        self.last_verdict: Dict[str, Any] = {"action": "run", "reason": ""}
+
+    def read_cgroup(self) -> Optional[Dict[str, Optional[int]]]:
+        """
+        Liest memory.current/memory.max/memory.stat der eigenen cgroup.
+
+        Returns:
+            {"current", "max" (None = unbegrenzt), "anon", "file", "inactive_file"}
+            oder None ohne cgroup v2.
+        """
+        current = _read_first_line(os.path.join(self.cgroup_root, "memory.current"))
+        if current is None:
+            return None
+        limit = _read_first_line(os.path.join(self.cgroup_root, "memory.max"))
+        data: Dict[str, Optional[int]] = {
+            "current": _to_int(current),
+            "max": _to_int(limit) if limit and limit != "max" else None,
+            "anon": 0,
+            "file": 0,
+            "inactive_file": 0,
+        }
+        try:
+            with open(os.path.join(self.cgroup_root, "memory.stat"), 'r') as f:
+                for line in f:
+                    key, _, value = line.partition(" ")
+                    if key in ("anon", "file", "inactive_file"):
+                        data[key] = _to_int(value)
+        except OSError:
+            pass
+        return data
+
+    def read_psi(self) -> Optional[Dict[str, Dict[str, float]]]:
+        """
+        Liest die Memory-PSI (bevorzugt cgroup-eigene memory.pressure).
+
+        Returns:
+            {"some": {"avg10", "avg60", "avg300"}, "full": {...}} oder None.
+        """
+        for filepath in (os.path.join(self.cgroup_root, "memory.pressure"), self.psi_file):
+            try:
+                with open(filepath, 'r') as f:
+                    lines = f.read().splitlines()
+            except OSError:
+                continue
+            psi: Dict[str, Dict[str, float]] = {}
+            for line in lines:
+                kind, *fields = line.split()
+                psi[kind] = {
+                    k: float(v) for k, v in (f.split("=", 1) for f in fields) if k.startswith("avg")
+                }
+            if "some" in psi:
+                return psi
+        return None
+
+    def usage(self) -> Dict[str, Any]:
+        """Speicherauslastung für die Anzeige (Container-Limit falls gesetzt, sonst Host)."""
+        cgroup = self.read_cgroup()
+        if cgroup and cgroup["max"]:
+            used = max(0, cgroup["current"] - cgroup["inactive_file"])
+            return {
+                "total": cgroup["max"],
+                "available": max(0, cgroup["max"] - used),
+                "percent": round(used / cgroup["max"] * 100, 1),
+                "scope": "cgroup"
+            }
+        mem = psutil.virtual_memory()
+        return {"total": mem.total, "available": mem.available, "percent": mem.percent, "scope": "host"}
+
+    def evaluate(self) -> Dict[str, Any]:
+        """
+        Bewertet den aktuellen Speicherdruck.
+
+        Returns:
+            {"action": "run" | "pace" | "suspend", "reason", "delay"}
+        """
+        psi = self.read_psi()
+        cgroup = self.read_cgroup()
+        verdict: Dict[str, Any] = {"action": "run", "reason": "", "delay": 0.0}
+
+        if cgroup and cgroup["max"]:
+            anon_percent = cgroup["anon"] / cgroup["max"] * 100
+            if anon_percent > config.ram_max_usage_percent:
+                verdict = {"action": "suspend", "reason": f"anon {anon_percent:.0f}% of memory.max", "delay": 0.0}
+        elif psi is None:
+            percent = psutil.virtual_memory().percent
+            if percent > config.ram_max_usage_percent:
+                verdict = {"action": "suspend", "reason": f"host RAM {percent}%", "delay": 0.0}
+
+        if psi and verdict["action"] == "run":
+            some = psi["some"].get("avg10", 0.0)
+            full = psi.get("full", {}).get("avg10", 0.0)
+            pace_at = config.memory_psi_pace_threshold
+            suspend_at = max(config.memory_psi_suspend_threshold, pace_at)
+            if some >= suspend_at or full >= pace_at:
+                verdict = {"action": "suspend", "reason": f"PSI some={some} full={full}", "delay": 0.0}
+            elif some >= pace_at:
+                ratio = (some - pace_at) / max(suspend_at - pace_at, 0.01)
+                verdict = {
+                    "action": "pace",
+                    "reason": f"PSI some={some}",
+                    "delay": round(config.memory_pace_max_delay_seconds * min(1.0, max(ratio, 0.1)), 2)
+                }
+
+        self.last_verdict = verdict
+        return verdict
+
+    async def wait_for_headroom(self, context: str, max_wait: Optional[float] = None) -> bool:
+        """
+        Bremst bzw. pausiert das Wärmen solange der Speicherdruck hoch ist.
+
+        Args:
+            context: Bezeichnung für das Log.
+            max_wait: Maximale Pause in Sekunden (Standard: memory_suspend_max_seconds).
+
+        Returns:
+            False, wenn der Druck nicht innerhalb von max_wait abklingt.
+        """
+        if max_wait is None:
+            max_wait = config.memory_suspend_max_seconds
+        waited = 0.0
+        while True:
+            verdict = await asyncio.to_thread(self.evaluate)
+            if verdict["action"] == "run":
+                return True
+            if verdict["action"] == "pace":
+                self.paced += 1
+                await asyncio.sleep(verdict["delay"])
+                return True
+            if waited >= max_wait:
+                log = logger.warning if max_wait else logger.debug
+                log(f"{context}: memory pressure persists ({verdict['reason']}), skipping.")
+                return False
+            if waited == 0:
+                logger.info(f"{context}: memory pressure ({verdict['reason']}), suspending warm-up.")
+            await asyncio.sleep(5)
+            waited += 5
+            self.suspended_seconds += 5
+
+    def stats(self) -> Dict[str, Any]:
+        """Kennzahlen für Dashboard/API."""
+        return {
+            "action": self.last_verdict["action"],
+            "reason": self.last_verdict["reason"],
+            "paced": self.paced,
+            "suspended_seconds": self.suspended_seconds,
+        }
+
+
+memory_governor = MemoryGovernor()
+
+
+# --- PATH RESOLUTION ---
+
+def _split_path(path: str) -> List[str]:
+    """Zerlegt einen Pfad (auch Windows-Pfade) in seine Bestandteile."""
+    return [p for p in path.replace('\\', '/').split('/') if p]
+
+
+class PathResolver:
+    """
+    Löst Plex-Pfade zu Container-Pfaden auf und lernt dabei Präfix-Mappings.
+
+    Erfolgreiche automatische Zuordnungen werden als Präfix-Rewrite in einem
+    Trie gespeichert, sodass Folge-Pfade mit einem einzigen stat-Aufruf
+    aufgelöst werden. Existenzprüfungen landen in einem TTL-Cache, nicht
+    auflösbare Pfade in einem Negativ-Cache (keine wiederholten Warnungen).
+    Beide Caches sind größenbegrenzt (LRU).
+    """
+
+    STAT_CACHE_SIZE = 20000
+    NEGATIVE_CACHE_SIZE = 2000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Trie über Pfad-Bestandteile; "__target__" hält den Container-Präfix
+        self._trie: Dict[str, Any] = {}
+        self._stat_cache: OrderedDict = OrderedDict()  # Pfad -> (existiert, gültig bis)
+        self._negative_cache: OrderedDict = OrderedDict()  # Plex-Pfad -> gültig bis
+        self._load_learned()
+
+    @staticmethod
+    def _remember(cache: OrderedDict, key: str, value: Any, limit: int):
+        """Legt einen Eintrag an und verdrängt die ältesten (Aufruf nur mit gehaltenem Lock)."""
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+    def exists(self, path: str) -> bool:
+        """os.path.exists mit TTL-Cache."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._stat_cache.get(path)
+            if cached and cached[1] > now:
+                self._stat_cache.move_to_end(path)
+                return cached[0]
+
+        result = os.path.exists(path)
+        with self._lock:
+            self._remember(self._stat_cache, path, (result, now + config.path_stat_cache_ttl_seconds), self.STAT_CACHE_SIZE)
+        return result
+
+    def resolve(self, plex_path: str) -> Optional[str]:
+        """
+        Findet den Container-Pfad zu einem Plex-Pfad.
+
+        Reihenfolge: konfiguriertes Mapping, Original-Pfad, gelerntes Mapping,
+        automatische Suche unter video_paths (mit Lernen).
+
+        Returns:
+            Container-Pfad oder None wenn nicht auffindbar.
+        """
+        if not plex_path:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            negative_until = self._negative_cache.get(plex_path)
+        if negative_until and negative_until > now:
+            return None
+
+        # 1. Konfiguriertes Pfad-Mapping
+        mapped_path = config.map_path(plex_path)
+        if mapped_path != plex_path and self.exists(mapped_path):
+            logger.debug(f"Pfad gemappt (config): {plex_path} -> {mapped_path}")
+            return mapped_path
+
+        # 2. Original-Pfad
+        if self.exists(plex_path):
+            return plex_path
+
+        parts = _split_path(plex_path)
+
+        # 3. Gelerntes Präfix-Mapping (längster Treffer im Trie)
+        learned = self._lookup(parts)
+        if learned:
+            container_prefix, depth = learned
+            test_path = os.path.join(container_prefix, *parts[depth:])
+            if self.exists(test_path):
+                logger.debug(f"Pfad gemappt (gelernt): {plex_path} -> {test_path}")
+                return test_path
+
+        # 4. Automatisches Mapping über video_paths
+        for video_path in config.video_paths:
+            for i in range(len(parts)):
+                test_path = os.path.join(video_path, *parts[i:])
+                if self.exists(test_path):
+                    logger.debug(f"Pfad gemappt (auto): {plex_path} -> {test_path}")
+                    self.learn(parts[:i], video_path)
+                    return test_path
+
+        logger.warning(f"Pfad nicht gefunden: {plex_path} (Tipp: Pfad-Mapping in Einstellungen konfigurieren)")
+        with self._lock:
+            self._remember(self._negative_cache, plex_path, now + config.path_negative_cache_ttl_seconds, self.NEGATIVE_CACHE_SIZE)
+        return None
+
+    def _lookup(self, parts: List[str]) -> Optional[tuple]:
+        """Sucht das längste gelernte Präfix; gibt (container_prefix, tiefe) zurück."""
+        best = None
+        with self._lock:
+            node = self._trie
+            for depth, part in enumerate(parts):
+                node = node.get(part)
+                if node is None:
+                    break
+                if "__target__" in node:
+                    best = (node["__target__"], depth + 1)
+        return best
+
+    def learn(self, plex_prefix_parts: List[str], container_prefix: str):
+        """Speichert ein gelerntes Präfix-Mapping und persistiert es."""
+        if not plex_prefix_parts:
+            return
+        with self._lock:
+            node = self._trie
+            for part in plex_prefix_parts:
+                node = node.setdefault(part, {})
+            if node.get("__target__") == container_prefix:
+                return
+            node["__target__"] = container_prefix
+            # Neues Mapping kann frühere Fehlschläge auflösen
+            self._negative_cache.clear()
+        logger.info(f"Pfad-Mapping gelernt: /{'/'.join(plex_prefix_parts)} -> {container_prefix}")
+        self._save_learned()
+
+    def learned_pairs(self) -> List[tuple]:
+        """Gibt gelernte Mappings als (plex_präfix, container_präfix) zurück."""
+        pairs = []
+
+        def walk(node: Dict[str, Any], prefix: List[str]):
+            for key, child in node.items():
+                if key == "__target__":
+                    pairs.append((f"/{'/'.join(prefix)}", child))
+                else:
+                    walk(child, prefix + [key])
+
+        with self._lock:
+            walk(self._trie, [])
+        return sorted(pairs)
+
+    def learned_mappings(self) -> List[str]:
+        """Gibt gelernte Mappings im Config-Format 'plex_pfad:container_pfad' zurück."""
+        return [f"{plex_prefix}:{container_prefix}" for plex_prefix, container_prefix in self.learned_pairs()]
+
+    def unresolved_paths(self) -> List[str]:
+        """Gibt die aktuell im Negativ-Cache befindlichen Pfade zurück."""
+        now = time.monotonic()
+        with self._lock:
+            return sorted(p for p, until in self._negative_cache.items() if until > now)
+
+    def clear_caches(self):
+        """Leert stat- und Negativ-Cache (z.B. nach Config-Änderung)."""
+        with self._lock:
+            self._stat_cache.clear()
+            self._negative_cache.clear()
+
+    def _load_learned(self):
+        """
+        Lädt gelernte Mappings aus der JSON-Datei.
+
+        Einträge sind Paare {"plex": ..., "container": ...}; ältere Dateien
+        enthalten Strings 'plex:container', die weiterhin gelesen werden.
+        """
+        if not os.path.exists(LEARNED_MAPPINGS_FILE):
+            return
+        try:
+            with open(LEARNED_MAPPINGS_FILE, 'r') as f:
+                for mapping in json.load(f):
+                    if isinstance(mapping, dict):
+                        plex_prefix, container_prefix = mapping.get("plex"), mapping.get("container")
+                    elif isinstance(mapping, str) and ':' in mapping:
+                        plex_prefix, container_prefix = mapping.split(':', 1)
+                    else:
+                        continue
+                    if not plex_prefix or not container_prefix:
+                        continue
+                    node = self._trie
+                    for part in _split_path(plex_prefix):
+                        node = node.setdefault(part, {})
+                    node["__target__"] = container_prefix
+        except Exception as e:
+            logger.error(f"Learned mappings load error: {e}")
+
+    def _save_learned(self):
+        """Speichert gelernte Mappings in die JSON-Datei."""
+        try:
+            os.makedirs(os.path.dirname(LEARNED_MAPPINGS_FILE), exist_ok=True)
+            pairs = [{"plex": plex_prefix, "container": container_prefix} for plex_prefix, container_prefix in self.learned_pairs()]
+            with open(LEARNED_MAPPINGS_FILE, 'w') as f:
+                json.dump(pairs, f, indent=2)
+        except Exception as e:
+            logger.error(f"Learned mappings save error: {e}")
+
+
+path_resolver = PathResolver()
+
+
+# --- UPSTREAM REQUEST COALESCING ---
+
+class _LeaderCancelled(Exception):
+    """Die führende Anfrage wurde abgebrochen; Wartende versuchen es selbst."""
+
+
+class SingleFlight:
+    """
+    Bündelt gleichzeitige identische Upstream-Anfragen.
+
+    Live-Monitoring, Scheduler, Webhook-Tasks und API-Endpunkte laufen auf
+    unterschiedlichen Event-Loops (Threads). Der erste Aufrufer je Schlüssel
+    führt die Anfrage aus, alle weiteren warten über einen
+    concurrent.futures.Future auf dasselbe Ergebnis. Erfolgreiche Ergebnisse
+    werden zusätzlich für eine kurze TTL vorgehalten.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[tuple, concurrent.futures.Future] = {}
+        self._results: Dict[tuple, tuple] = {}
+        self.stats: Dict[str, int] = {"requests": 0, "coalesced": 0, "cached": 0}
+
+    async def do(self, key: tuple, fn, ttl: float) -> Any:
+        """
+        Führt fn() aus oder schließt sich einer laufenden Ausführung an.
+
+        Args:
+            key: Schlüssel der Anfrage (z.B. Quelle, cmd, Parameter)
+            fn: Coroutine-Factory für die eigentliche Anfrage
+            ttl: Wie lange ein Ergebnis wiederverwendet wird (Sekunden)
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._results.get(key)
+            if cached and cached[0] > now:
+                self.stats["cached"] += 1
+                return cached[1]
+            future = self._inflight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = concurrent.futures.Future()
+                self._inflight[key] = future
+                self.stats["requests"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not is_leader:
+            try:
+                # shield: ein abgebrochener Wartender (z.B. wait_for-Timeout)
+                # darf den gemeinsamen Future nicht mit abbrechen
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except _LeaderCancelled:
+                return await self.do(key, fn, ttl)
+
+        try:
+            value = await fn()
+        except asyncio.CancelledError:
+            self._finish(key)
+            future.set_exception(_LeaderCancelled())
+            raise
+        except Exception as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+
+        self._finish(key, value, ttl)
+        future.set_result(value)
+        return value
+
+    def _finish(self, key: tuple, value: Any = None, ttl: float = 0):
+        """Entfernt die laufende Anfrage und speichert ggf. das Ergebnis."""
+        now = time.monotonic()
+        with self._lock:
+            self._inflight.pop(key, None)
+            if ttl > 0 and value is not None:
+                self._results[key] = (now + ttl, value)
+            # Abgelaufene Ergebnisse aufräumen
+            if len(self._results) > 1000:
+                self._results = {k: v for k, v in self._results.items() if v[0] > now}
+
+
+upstream_flight = SingleFlight()
+
+
+# --- TAUTULLI API CLIENT ---
+
+async def _tautulli_get(client: httpx.AsyncClient, base_url: str, cmd: str, **params) -> Optional[Any]:
+    """
+    Führt einen Tautulli-API-Aufruf aus.
+
+    Gleichzeitige identische Aufrufe (cmd + Parameter) teilen sich eine
+    Anfrage und deren Ergebnis (siehe SingleFlight). Das Ergebnis ist
+    geteilt und darf vom Aufrufer nicht verändert werden.
+
+    Returns:
+        Das 'data'-Feld der Antwort oder None bei Fehlern.
+    """
+    async def request() -> Optional[Any]:
+        start_t = time.perf_counter()
+        resp = await client.get(
+            f"{base_url}/api/v2",
+            params={"apikey": config.tautulli_api_key, "cmd": cmd, **params}
+        )
+        METRIC_UPSTREAM_SECONDS.observe(time.perf_counter() - start_t, backend="tautulli", cmd=cmd)
+        if resp.status_code != 200:
+            logger.debug(f"Tautulli {cmd}: HTTP {resp.status_code}")
+            return None
+        response = resp.json().get("response", {})
+        if response.get("result") != "success":
+            logger.debug(f"Tautulli {cmd}: {response.get('message', 'Unknown')}")
+            return None
+        return response.get("data")
+
+    key = ("tautulli", base_url, cmd, tuple(sorted((k, str(v)) for k, v in params.items())))
+    return await upstream_flight.do(key, request, config.upstream_result_ttl_seconds)
+
+
+# Zeilen je get_history-Seite (unabhängig von library_sync_page_size)
+HISTORY_PAGE_SIZE = 1000
+
+
+async def fetch_tautulli_history(client: httpx.AsyncClient, base_url: str, after: float) -> List[Dict[str, Any]]:
+    """
+    Holt die Wiedergabe-Historie seit 'after' seitenweise je Bibliothek.
+
+    Jede Zeile erhält zusätzlich 'library' (Name der Bibliothek).
+    """
+    rows = []
+    libraries = await _tautulli_get(client, base_url, "get_libraries") or []
+    after_date = datetime.fromtimestamp(after).strftime("%Y-%m-%d")
+
+    for lib in libraries:
+        start = 0
+        while True:
+            data = await _tautulli_get(
+                client, base_url, "get_history",
+                section_id=lib["section_id"], after=after_date,
+                order_column="date", order_dir="desc",
+                start=start, length=HISTORY_PAGE_SIZE
+            )
+            page = (data or {}).get("data") or []
+            for row in page:
+                row["library"] = lib.get("section_name", str(lib["section_id"]))
+            rows.extend(page)
+            if len(page) < HISTORY_PAGE_SIZE:
+                break
+            start += HISTORY_PAGE_SIZE
+    return rows
+
+
+# Caching-Strategien: Sortierspalte, Präfix der Listen und Log-Bezeichnung
+STRATEGIES = {
+    "recent_releases": ("originally_available_at", "recent", "📅 Neueste Releases"),
+    "most_watched": ("play_count", "watched", "👀 Meistgesehen"),
+    "recently_added": ("added_at", "added", "➕ Zuletzt hinzugefügt"),
+}
+
+
+async def fetch_strategy(name: str, media_type: str, count: int, backend: str = "tautulli") -> List[str]:
+    """
+    Führt eine Caching-Strategie für Filme oder Serien aus.
+
+    Mit aktivem Bibliotheks-Sync kommt die Liste aus dem Snapshot, sonst aus
+    Tautulli (Dateipfade optional über Plex).
+
+    Args:
+        name: recent_releases, most_watched oder recently_added
+        media_type: movie oder show (Serien liefern ihre erste Episode)
+        count: Maximale Anzahl Einträge
+        backend: Resolver-Backend ("tautulli" oder "plex")
+
+    Returns:
+        Liste von Container-Pfaden in Strategie-Reihenfolge.
+    """
+    order_column, prefix, _ = STRATEGIES[name]
+    if count <= 0:
+        return []
+
+    if config.library_sync_enabled:
+        played_since = int(time.time()) - 30 * 86400 if name == "most_watched" else 0
+        return snapshot_strategy_paths(media_type, order_column, count, played_since)
+
+    if not config.tautulli_enabled or not config.tautulli_url or not config.tautulli_api_key:
+        return []
+
+    base_url = config.tautulli_url.rstrip('/')
+    result = {f"{prefix}_movies": [], f"{prefix}_shows": []}
+    movies_count, shows_count = (count, 0) if media_type == "movie" else (0, count)
+
+    async with httpx.AsyncClient(timeout=90.0) as client:
+        try:
+            if name == "most_watched":
+                await _fetch_most_watched(
+                    client, base_url, movies_count, shows_count, result,
+                    backend=_resolve_backend(backend)
+                )
+            else:
+                # Bibliotheken (parallele Strategien teilen sich die Abfrage)
+                libraries = await _tautulli_get(client, base_url, "get_libraries")
+                if libraries is None:
+                    logger.warning("Tautulli: Konnte Bibliotheken nicht laden")
+                    return []
+                sections = [lib["section_id"] for lib in libraries if lib.get("section_type") == media_type]
+                await _fetch_by_order(
+                    client, base_url,
+                    sections if media_type == "movie" else [],
+                    sections if media_type == "show" else [],
+                    order_column, "desc", movies_count, shows_count,
+                    result, f"{prefix}_movies", f"{prefix}_shows",
+                    backend=_resolve_backend(backend)
+                )
+        except Exception as e:
+            logger.error(f"Tautulli API error: {e}")
+
+    return result[f"{prefix}_{media_type}s"]
+
+
+async def fetch_tautulli_data(timer: Optional[StageTimer] = None) -> Dict[str, List[str]]:
+    """
+    Holt die Listen aller aktiven Caching-Strategien.
+
+    Strategien:
+    - recent_releases: Nach Erscheinungsdatum sortiert
+    - most_watched: Nach Wiedergabe-Anzahl sortiert
+    - recently_added: Nach Hinzufüge-Datum sortiert
+
+    Die Strategien laufen als Kandidatenquellen parallel (siehe
+    collect_candidates); mit aktivem Bibliotheks-Sync wird der Snapshot
+    vorher aktualisiert.
+
+    Args:
+        timer: Erfasst die Dauer je Strategie (optional).
+
+    Returns:
+        Dict mit allen gefundenen Dateipfaden nach Kategorie.
+    """
+    result = {
+        "recent_movies": [], "recent_shows": [],
+        "watched_movies": [], "watched_shows": [],
+        "added_movies": [], "added_shows": []
+    }
+
+    timer = timer or StageTimer()
+
+    if config.library_sync_enabled:
+        with timer.stage("library_sync"):
+            await sync_library()
+
+    found = await collect_candidates(timer, names=list(STRATEGIES))
+    for candidates in found.values():
+        for c in candidates:
+            result[c["list"]].append(c["path"])
+    return result
+
+
+async def _fetch_by_order(
+    client: httpx.AsyncClient,
+    base_url: str,
+    movie_sections: List[str],
+    show_sections: List[str],
+    order_column: str,
+    order_dir: str,
+    movies_count: int,
+    shows_count: int,
+    result: Dict[str, List[str]],
+    movies_key: str,
+    shows_key: str,
+    backend: str = "tautulli"
+):
+    """
+    Hilfsfunktion: Holt Filme/Serien sortiert nach einer Spalte.
+
+    Mit backend="plex" kommen Listen und Dateipfade direkt aus Plex
+    (eine Abfrage pro Sektion statt einer Metadaten-Abfrage pro Film).
+    """
+    # Filme
+    for section_id in movie_sections:
+        if backend == "plex":
+            entries = await _plex_section_items(
+                client, config.plex_url.rstrip('/'), section_id, 1,
+                PLEX_SORT_FIELDS[order_column], order_dir, movies_count
+            )
+            for entry in entries:
+                if len(result[movies_key]) >= movies_count:
+                    break
+                plex_path = _plex_media_path(entry)
+                file_path = path_resolver.resolve(plex_path) if plex_path else None
+                if file_path and file_path not in result[movies_key]:
+                    result[movies_key].append(file_path)
+            continue
+
+        data = await _tautulli_get(
+            client, base_url, "get_library_media_info",
+            section_id=section_id,
+            order_column=order_column,
+            order_dir=order_dir,
+            length=movies_count
+        )
+        movies = (data or {}).get("data", [])
+        for movie in movies:
+            if len(result[movies_key]) >= movies_count:
+                break
+            rating_key = movie.get("rating_key")
+            if rating_key:
+                file_path = await _find_media_file(client, base_url, rating_key)
+                if file_path and file_path not in result[movies_key]:
+                    result[movies_key].append(file_path)
+
+    # Serien (erste Episode)
+    for section_id in show_sections:
+        if backend == "plex":
+            entries = await _plex_section_items(
+                client, config.plex_url.rstrip('/'), section_id, 2,
+                PLEX_SORT_FIELDS[order_column], order_dir, shows_count
+            )
+            show_keys = [entry.get("ratingKey") for entry in entries]
+        else:
+            data = await _tautulli_get(
+                client, base_url, "get_library_media_info",
+                section_id=section_id,
+                order_column=order_column,
+                order_dir=order_dir,
+                length=shows_count
+            )
+            show_keys = [show.get("rating_key") for show in (data or {}).get("data", [])]
+
+        for show_key in show_keys:
+            if len(result[shows_key]) >= shows_count:
+                break
+            if show_key:
+                first_eps = await find_next_episodes(
+                    client, backend, show_key,
+                    last_season=0, last_episode=0, max_episodes=1
+                )
+                for ep in first_eps:
+                    if ep not in result[shows_key]:
+                        result[shows_key].append(ep)
+
+
+async def _fetch_most_watched(
+    client: httpx.AsyncClient,
+    base_url: str,
+    movies_count: int,
+    shows_count: int,
+    result: Dict[str, List[str]],
+    backend: str = "tautulli"
+):
+    """
+    Hilfsfunktion: Holt meistgesehene Filme und Serien.
+
+    Die Rangliste kommt immer aus Tautulli; mit backend="plex" werden die
+    Dateipfade gebündelt über Plex aufgelöst.
+    """
+    # Meistgesehene Filme (letzte 30 Tage)
+    if movies_count:
+        data = await _tautulli_get(
+            client, base_url, "get_home_stats",
+            stat_id="top_movies",
+            stats_count=movies_count,
+            time_range=30
+        )
+        rating_keys = [str(movie["rating_key"]) for movie in (data or {}).get("rows", []) if movie.get("rating_key")]
+        for file_path in await _resolve_rating_keys(client, backend, rating_keys):
+            if file_path not in result["watched_movies"]:
+                result["watched_movies"].append(file_path)
+
+    if not shows_count:
+        return
+
+    # Meistgesehene Serien (letzte 30 Tage)
+    data = await _tautulli_get(
+        client, base_url, "get_home_stats",
+        stat_id="top_tv",
+        stats_count=shows_count,
+        time_range=30
+    )
+    for show in (data or {}).get("rows", []):
+        show_key = show.get("grandparent_rating_key") or show.get("rating_key")
+        if show_key:
+            first_eps = await find_next_episodes(
+                client, backend, show_key,
+                last_season=0, last_episode=0, max_episodes=1
+            )
+            for ep in first_eps:
+                if ep not in result["watched_shows"]:
+                    result["watched_shows"].append(ep)
+
+
+async def _resolve_rating_keys(client: httpx.AsyncClient, backend: str, rating_keys: List[str]) -> List[str]:
+    """Löst Rating Keys zu Container-Pfaden auf (Reihenfolge bleibt erhalten)."""
+    files = []
+    if backend == "plex":
+        entries = await _plex_batch_metadata(client, config.plex_url.rstrip('/'), rating_keys)
+        for rating_key in rating_keys:
+            plex_path = _plex_media_path(entries.get(rating_key, {}))
+            file_path = path_resolver.resolve(plex_path) if plex_path else None
+            if file_path:
+                files.append(file_path)
+        return files
+
+    base_url = config.tautulli_url.rstrip('/')
+    for rating_key in rating_keys:
+        file_path = await _find_media_file(client, base_url, rating_key)
+        if file_path:
+            files.append(file_path)
+    return files
+
+
+def _extract_media_path(metadata: Dict[str, Any]) -> Optional[str]:
+    """Liest den (Plex-)Dateipfad aus Tautulli-Metadaten."""
+    # Prüfe verschiedene Pfad-Felder
+    for field in ["file", "file_path", "media_info"]:
+        if field in metadata:
+            if field == "media_info" and isinstance(metadata[field], list):
+                for media in metadata[field]:
+                    for part in media.get("parts", []):
+                        if "file" in part:
+                            return part["file"]
+            elif field != "media_info" and metadata[field]:
+                return metadata[field]
+    return None
+
+
+async def _fetch_metadata(client: httpx.AsyncClient, base_url: str, rating_key: str) -> Dict[str, Any]:
+    """Holt die Tautulli-Metadaten eines Mediums (leeres Dict bei Fehlern)."""
+    return await _tautulli_get(client, base_url, "get_metadata", rating_key=rating_key) or {}
+
+
+async def _find_media_file(client: httpx.AsyncClient, base_url: str, rating_key: str) -> Optional[str]:
+    """
+    Findet den Dateipfad für ein Medium über rating_key.
+
+    Konvertiert Plex-Pfade zu Container-Pfaden falls nötig.
+    """
+    try:
+        metadata = await _fetch_metadata(client, base_url, rating_key)
+        file_path = _extract_media_path(metadata)
+        if file_path:
+            return path_resolver.resolve(file_path)
+
+    except Exception as e:
+        logger.debug(f"Could not find file for rating_key {rating_key}: {e}")
+    return None
+
+
+async def _find_next_episodes(
+    client: httpx.AsyncClient,
+    base_url: str,
+    show_key: str,
+    last_season: int,
+    last_episode: int,
+    max_episodes: int = 3
+) -> List[str]:
+    """
+    Findet die nächsten ungesehenen Episoden einer Serie.
+
+    Args:
+        client: HTTP Client
+        base_url: Tautulli Base URL
+        show_key: Rating Key der Serie
+        last_season: Aktuelle Staffelnummer
+        last_episode: Aktuelle Episodennummer
+        max_episodes: Maximale Anzahl zu findender Episoden
+
+    Returns:
+        Liste der Dateipfade für nächste Episoden
+    """
+    episodes = []
+
+    logger.debug(f"Suche nächste Episoden: show_key={show_key}, S{last_season:02d}E{last_episode:02d}")
+
+    try:
+        # Hole alle Staffeln der Serie
+        data = await _tautulli_get(client, base_url, "get_children_metadata", rating_key=show_key)
+
+        if data is None:
+            logger.warning(f"Tautulli API Fehler: Keine Staffeln für show_key={show_key}")
+            return episodes
+
+        seasons = data.get("children_list", [])
+
+        # WICHTIG: Sortiere Staffeln nach Nummer!
+        seasons_sorted = sorted(seasons, key=lambda x: int(x.get("media_index", 0) or 0))
+        logger.debug(f"Gefundene Staffeln: {len(seasons_sorted)} (sortiert)")
+
+        # Konvertiere last_season und last_episode zu int (falls String)
+        last_season = int(last_season) if last_season else 0
+        last_episode = int(last_episode) if last_episode else 0
+
+        for season in seasons_sorted:
+            # Konvertiere zu int (API kann Strings zurückgeben)
+            season_num = int(season.get("media_index", 0) or 0)
+
+            # Überspringe frühere Staffeln
+            if season_num < last_season:
+                continue
+
+            # Hole Episoden dieser Staffel
+            season_key = season.get("rating_key")
+            ep_data = await _tautulli_get(client, base_url, "get_children_metadata", rating_key=season_key)
+
+            if ep_data is None:
+                continue
+
+            eps = ep_data.get("children_list", [])
+
+            # WICHTIG: Sortiere Episoden nach Nummer!
+            eps_sorted = sorted(eps, key=lambda x: int(x.get("media_index", 0) or 0))
+            logger.debug(f"Staffel {season_num}: {len(eps_sorted)} Episoden (sortiert)")
+
+            for ep in eps_sorted:
+                # Konvertiere zu int
+                ep_num = int(ep.get("media_index", 0) or 0)
+
+                # Nur Folgen nach der aktuell geschauten
+                if season_num == last_season and ep_num <= last_episode:
+                    continue
+
+                # Finde Dateipfad
+                file_path = await _find_media_file(client, base_url, ep.get("rating_key"))
+                if file_path:
+                    logger.debug(f"Gefunden: S{season_num:02d}E{ep_num:02d} -> {file_path}")
+                    episodes.append(file_path)
+                    if len(episodes) >= max_episodes:
+                        return episodes
+
+    except Exception as e:
+        logger.warning(f"Fehler beim Finden nächster Episoden: {e}")
+
+    return episodes
+
+
+# --- LIBRARY SNAPSHOT ---
+
+class LibraryItem(BaseModel):
+    """Ein Eintrag im lokalen Bibliotheks-Snapshot."""
+    rating_key: str
+    section_id: str = ""
+    media_type: str = "movie"  # movie, show, episode
+    title: str = ""
+    show_key: str = ""  # Nur Episoden: Rating Key der Serie
+    season: int = 0
+    episode: int = 0
+    added_at: int = 0
+    originally_available_at: str = ""  # YYYY-MM-DD (lexikalisch sortierbar)
+    play_count: int = 0
+    last_played: int = 0
+    file: str = ""  # Plex-Pfad; bei Serien (Tautulli-Backend) die erste Episode
+    detailed: bool = False  # Pfad/Release-Datum bereits ermittelt
+
+
+class LibrarySnapshot:
+    """
+    Lokaler, indizierter Snapshot der Plex-Bibliotheken.
+
+    Die Caching-Strategien werden über sortierte Abfragen beantwortet statt
+    über einen Metadaten-Aufruf pro Eintrag und Lauf.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.items: Dict[str, LibraryItem] = {}
+        self.backend: str = ""
+        self.last_sync: float = 0
+        self.last_full_sync: float = 0
+        self._index: Dict[tuple, List[LibraryItem]] = {}
+        self._episodes: Optional[Dict[str, List[LibraryItem]]] = None
+        self._load()
+
+    def upsert(self, items: List[LibraryItem]):
+        """Fügt Einträge hinzu oder aktualisiert sie (bekannte Details bleiben erhalten)."""
+        if not items:
+            return
+        with self._lock:
+            for item in items:
+                existing = self.items.get(item.rating_key)
+                if existing and not item.detailed:
+                    item.file = item.file or existing.file
+                    item.originally_available_at = item.originally_available_at or existing.originally_available_at
+                    item.detailed = existing.detailed
+                self.items[item.rating_key] = item
+            self._invalidate()
+
+    def set_details(self, rating_key: str, file: str, originally_available_at: str):
+        """Speichert nachgeladenen Pfad und Release-Datum eines Eintrags."""
+        with self._lock:
+            item = self.items.get(rating_key)
+            if item:
+                item.file = file
+                item.originally_available_at = originally_available_at or item.originally_available_at
+                item.detailed = True
+                self._invalidate()
+
+    def prune(self, section_id: str, seen_keys: set):
+        """Entfernt Einträge einer Sektion, die beim vollen Sync nicht mehr auftauchten."""
+        with self._lock:
+            stale = [k for k, item in self.items.items() if item.section_id == section_id and k not in seen_keys]
+            for key in stale:
+                del self.items[key]
+            if stale:
+                self._invalidate()
+
+    def missing_details(self, section_id: str) -> List[LibraryItem]:
+        """Gibt Filme/Serien einer Sektion zurück, deren Pfad noch unbekannt ist."""
+        with self._lock:
+            return [
+                item for item in self.items.values()
+                if item.section_id == section_id and item.media_type != "episode" and not item.detailed
+            ]
+
+    def query(self, media_type: str, order_column: str, played_since: int = 0) -> List[LibraryItem]:
+        """
+        Gibt Einträge eines Typs absteigend sortiert nach order_column zurück.
+
+        Args:
+            media_type: movie, show oder episode
+            order_column: added_at, originally_available_at, play_count oder last_played
+            played_since: Nur Einträge mit last_played >= diesem Zeitstempel
+        """
+        with self._lock:
+            key = (media_type, order_column)
+            if key not in self._index:
+                self._index[key] = sorted(
+                    (item for item in self.items.values() if item.media_type == media_type),
+                    key=lambda item: getattr(item, order_column),
+                    reverse=True
+                )
+            items = self._index[key]
+        if played_since:
+            return [item for item in items if item.last_played >= played_since]
+        return items
+
+    def episodes_of(self, show_key: str) -> List[LibraryItem]:
+        """Gibt die Episoden einer Serie sortiert nach Staffel/Episode zurück."""
+        with self._lock:
+            if self._episodes is None:
+                self._episodes = {}
+                for item in self.items.values():
+                    if item.media_type == "episode":
+                        self._episodes.setdefault(item.show_key, []).append(item)
+                for episodes in self._episodes.values():
+                    episodes.sort(key=lambda ep: (ep.season, ep.episode))
+            return self._episodes.get(show_key, [])
+
+    def by_filename(self) -> Dict[str, List[LibraryItem]]:
+        """
+        Gruppiert Einträge mit Datei nach Dateiname (Plex- und Container-Pfad
+        teilen ihn). Gleichnamige Dateien verschiedener Ordner landen in
+        derselben Gruppe; der Aufrufer wählt über den aufgelösten Pfad.
+        """
+        groups: Dict[str, List[LibraryItem]] = {}
+        with self._lock:
+            for item in self.items.values():
+                if item.file and item.media_type != "show":
+                    groups.setdefault(os.path.basename(item.file.replace('\\', '/')), []).append(item)
+        return groups
+
+    def first_episode_path(self, show: LibraryItem) -> str:
+        """Gibt den Plex-Pfad der ersten Episode einer Serie zurück."""
+        for ep in self.episodes_of(show.rating_key):
+            if (ep.season, ep.episode) > (0, 0) and ep.file:
+                return ep.file
+        return show.file
+
+    def mark_synced(self, started: float, full: bool, backend: str):
+        """Setzt die Sync-Zeitstempel und speichert den Snapshot."""
+        self.last_sync = started
+        if full:
+            self.last_full_sync = started
+        self.backend = backend
+        self.save()
+
+    def stats(self) -> Dict[str, Any]:
+        """Gibt Kennzahlen zum Snapshot zurück."""
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for item in self.items.values():
+                counts[item.media_type] = counts.get(item.media_type, 0) + 1
+        return {
+            "backend": self.backend,
+            "items": counts,
+            "last_sync": datetime.fromtimestamp(self.last_sync).strftime("%Y-%m-%d %H:%M:%S") if self.last_sync else None,
+            "last_full_sync": datetime.fromtimestamp(self.last_full_sync).strftime("%Y-%m-%d %H:%M:%S") if self.last_full_sync else None
+        }
+
+    def _invalidate(self):
+        """Verwirft die Sortier-Indizes (Aufruf nur mit gehaltenem Lock)."""
+        self._index.clear()
+        self._episodes = None
+
+    def _load(self):
+        """Lädt den Snapshot aus der JSON-Datei."""
+        if not os.path.exists(LIBRARY_SNAPSHOT_FILE):
+            return
+        try:
+            with open(LIBRARY_SNAPSHOT_FILE, 'r') as f:
+                data = json.load(f)
+            self.backend = data.get("backend", "")
+            self.last_sync = data.get("last_sync", 0)
+            self.last_full_sync = data.get("last_full_sync", 0)
+            self.items = {i["rating_key"]: LibraryItem(**i) for i in data.get("items", [])}
+        except Exception as e:
+            logger.error(f"Library snapshot load error: {e}")
+
+    def save(self):
+        """Speichert den Snapshot in die JSON-Datei."""
+        try:
+            with self._lock:
+                data = {
+                    "backend": self.backend,
+                    "last_sync": self.last_sync,
+                    "last_full_sync": self.last_full_sync,
+                    "items": [item.model_dump() for item in self.items.values()]
+                }
+            os.makedirs(os.path.dirname(LIBRARY_SNAPSHOT_FILE), exist_ok=True)
+            with open(LIBRARY_SNAPSHOT_FILE, 'w') as f:
+                json.dump(data, f)
+        except Exception as e:
+            logger.error(f"Library snapshot save error: {e}")
+
+
+library_snapshot = LibrarySnapshot()
+
+
+async def sync_library(full: bool = False) -> Dict[str, Any]:
+    """
+    Synchronisiert den Bibliotheks-Snapshot.
+
+    Normalerweise inkrementell (nur seit dem letzten Sync hinzugefügte oder
+    gespielte Einträge), alle library_full_sync_interval_hours vollständig.
+
+    Args:
+        full: Vollständigen Sync erzwingen.
+    """
+    if not library_snapshot.sync_lock.acquire(blocking=False):
+        logger.info("Library-Sync läuft bereits, nutze bestehenden Snapshot")
+        return library_snapshot.stats()
+
+    try:
+        backend = config.library_sync_backend
+        full_interval = config.library_full_sync_interval_hours * 3600
+        if backend != library_snapshot.backend or time.time() - library_snapshot.last_full_sync > full_interval:
+            full = True
+        # Kleine Überlappung, damit Grenzfälle nicht verloren gehen
+        since = 0 if full else int(library_snapshot.last_sync) - 60
+        started = time.time()
+
+        if backend == "plex":
+            updated, complete = await _sync_library_from_plex(since)
+        else:
+            updated, complete = await _sync_library_from_tautulli(since)
+
+        if not complete:
+            # Wasserstand nicht vorrücken, sonst gingen die fehlenden Seiten
+            # beim nächsten inkrementellen Sync verloren
+            library_snapshot.save()
+            logger.warning(
+                f"📚 Library-Sync ({backend}) unvollständig: {updated} Einträge aktualisiert, "
+                f"Zeitstempel bleibt, nächster Lauf wiederholt"
+            )
+            return library_snapshot.stats()
+
+        library_snapshot.mark_synced(started, full, backend)
+        logger.info(
+            f"📚 Library-Sync ({'voll' if full else 'inkrementell'}, {backend}): "
+            f"{updated} Einträge aktualisiert, {len(library_snapshot.items)} gesamt "
+            f"({time.time() - started:.1f}s)"
+        )
+    except Exception as e:
+        logger.error(f"Library sync error: {e}")
+    finally:
+        library_snapshot.sync_lock.release()
+
+    return library_snapshot.stats()
+
+
+async def _sync_library_from_tautulli(since: int) -> Tuple[int, bool]:
+    """
+    Synchronisiert den Snapshot seitenweise über Tautulli get_library_media_info.
+
+    Tautulli liefert dort keine Dateipfade; diese werden pro Eintrag einmalig
+    nachgeladen und im Snapshot gemerkt.
+
+    Returns:
+        (Anzahl aktualisierter Einträge, ob alle Seiten geladen wurden)
+    """
+    if not config.tautulli_url or not config.tautulli_api_key:
+        return 0, False
+
+    base_url = config.tautulli_url.rstrip('/')
+    page_size = config.library_sync_page_size
+    updated = 0
+    complete = True
+
+    async with httpx.AsyncClient(timeout=90.0) as client:
+        libraries = await _tautulli_get(client, base_url, "get_libraries")
+        if libraries is None:
+            logger.warning("Tautulli: Konnte Bibliotheken nicht laden")
+            return 0, False
+
+        for lib in libraries:
+            media_type = lib.get("section_type")
+            if media_type not in ("movie", "show"):
+                continue
+            section_id = str(lib.get("section_id"))
+            seen = set()
+            failed = False
+
+            # Inkrementell: neu hinzugefügte und seit dem letzten Sync gespielte Einträge
+            order_columns = ["added_at", "last_played"] if since else ["added_at"]
+            for order_column in order_columns:
+                start = 0
+                while True:
+                    data = await _tautulli_get(
+                        client, base_url, "get_library_media_info",
+                        section_id=section_id,
+                        order_column=order_column,
+                        order_dir="desc",
+                        start=start,
+                        length=page_size
+                    )
+                    if data is None:
+                        failed = True
+                        break
+                    rows = data.get("data", [])
+                    batch = []
+                    reached_watermark = False
+                    for row in rows:
+                        rating_key = str(row.get("rating_key") or "")
+                        if not rating_key:
+                            continue
+                        if since and _to_int(row.get(order_column)) < since:
+                            reached_watermark = True
+                            break
+                        seen.add(rating_key)
+                        batch.append(LibraryItem(
+                            rating_key=rating_key,
+                            section_id=section_id,
+                            media_type=media_type,
+                            title=row.get("title") or "",
+                            added_at=_to_int(row.get("added_at")),
+                            play_count=_to_int(row.get("play_count")),
+                            last_played=_to_int(row.get("last_played"))
+                        ))
+                    library_snapshot.upsert(batch)
+                    updated += len(batch)
+                    if reached_watermark or len(rows) < page_size:
+                        break
+                    start += page_size
+
+            if failed:
+                # Ohne alle Seiten wäre "nicht gesehen" kein Beleg für "gelöscht"
+                logger.warning(f"Library-Sync: Sektion {section_id} unvollständig, überspringe Bereinigung")
+                complete = False
+            elif not since:
+                library_snapshot.prune(section_id, seen)
+
+            # Pfade und Release-Datum nur für neue Einträge nachladen
+            for item in library_snapshot.missing_details(section_id):
+                metadata = await _fetch_metadata(client, base_url, item.rating_key)
+                if media_type == "movie":
+                    file_path = _extract_media_path(metadata) or ""
+                else:
+                    file_path = await _tautulli_first_episode_path(client, base_url, item.rating_key) or ""
+                library_snapshot.set_details(item.rating_key, file_path, metadata.get("originally_available_at") or "")
+
+    return updated, complete
+
+
+async def _tautulli_first_episode_path(client: httpx.AsyncClient, base_url: str, show_key: str) -> Optional[str]:
+    """Gibt den Plex-Pfad der ersten Episode einer Serie zurück."""
+    seasons = (await _tautulli_get(client, base_url, "get_children_metadata", rating_key=show_key) or {}).get("children_list", [])
+    for season in sorted(seasons, key=lambda x: _to_int(x.get("media_index"))):
+        season_num = _to_int(season.get("media_index"))
+        eps = (await _tautulli_get(client, base_url, "get_children_metadata", rating_key=season.get("rating_key")) or {}).get("children_list", [])
+        for ep in sorted(eps, key=lambda x: _to_int(x.get("media_index"))):
+            if (season_num, _to_int(ep.get("media_index"))) <= (0, 0):
+                continue
+            file_path = _extract_media_path(await _fetch_metadata(client, base_url, ep.get("rating_key")))
+            if file_path:
+                return file_path
+    return None
+
+
+def _plex_library_item(entry: Dict[str, Any], section_id: str, media_type: str) -> LibraryItem:
+    """Baut einen Snapshot-Eintrag aus einem Plex-Metadaten-Objekt."""
+    return LibraryItem(
+        rating_key=str(entry.get("ratingKey")),
+        section_id=section_id,
+        media_type=media_type,
+        title=entry.get("title") or "",
+        show_key=str(entry.get("grandparentRatingKey") or ""),
+        season=_to_int(entry.get("parentIndex")),
+        episode=_to_int(entry.get("index")),
+        added_at=_to_int(entry.get("addedAt")),
+        originally_available_at=entry.get("originallyAvailableAt") or "",
+        play_count=_to_int(entry.get("viewCount")),
+        last_played=_to_int(entry.get("lastViewedAt")),
+        file=_plex_media_path(entry),
+        detailed=True
+    )
+
+
+async def _sync_library_from_plex(since: int) -> Tuple[int, bool]:
+    """
+    Synchronisiert den Snapshot seitenweise über Plex /library/sections/{id}/all.
+
+    Plex liefert Dateipfade direkt mit; Serien-Sektionen werden zusätzlich
+    auf Episoden-Ebene (type=4) geladen.
+
+    Returns:
+        (Anzahl aktualisierter Einträge, ob alle Seiten geladen wurden)
+    """
+    if not config.plex_url or not config.plex_token:
+        return 0, False
+
+    base_url = config.plex_url.rstrip('/')
+    page_size = config.library_sync_page_size
+    updated = 0
+    complete = True
+
+    async with httpx.AsyncClient(timeout=90.0) as client:
+        container = await _plex_get(client, base_url, "/library/sections")
+        if container is None:
+            logger.warning("Plex: Konnte Bibliotheken nicht laden")
+            return 0, False
+        sections = container.get("Directory", [])
+
+        for section in sections:
+            section_type = section.get("type")
+            if section_type not in ("movie", "show"):
+                continue
+            section_id = str(section.get("key"))
+            plex_types = [(1, "movie")] if section_type == "movie" else [(2, "show"), (4, "episode")]
+            seen = set()
+            failed = False
+
+            for plex_type, media_type in plex_types:
+                sort_fields = ["addedAt", "lastViewedAt"] if since else ["addedAt"]
+                watermark_fields = {"addedAt": "added_at", "lastViewedAt": "last_played"}
+                for sort_field in sort_fields:
+                    start = 0
+                    while True:
+                        container = await _plex_get(
+                            client, base_url, f"/library/sections/{section_id}/all",
+                            type=plex_type,
+                            sort=f"{sort_field}:desc",
+                            **{"X-Plex-Container-Start": start, "X-Plex-Container-Size": page_size}
+                        )
+                        if container is None:
+                            failed = True
+                            break
+                        entries = container.get("Metadata", [])
+                        batch = []
+                        reached_watermark = False
+                        for entry in entries:
+                            item = _plex_library_item(entry, section_id, media_type)
+                            if since and getattr(item, watermark_fields[sort_field]) < since:
+                                reached_watermark = True
+                                break
+                            seen.add(item.rating_key)
+                            batch.append(item)
+                        library_snapshot.upsert(batch)
+                        updated += len(batch)
+                        if reached_watermark or len(entries) < page_size:
+                            break
+                        start += page_size
+
+            if failed:
+                logger.warning(f"Library-Sync: Sektion {section_id} unvollständig, überspringe Bereinigung")
+                complete = False
+            elif not since:
+                library_snapshot.prune(section_id, seen)
+
+    return updated, complete
+
+
+def snapshot_strategy_paths(media_type: str, order_column: str, count: int, played_since: int = 0) -> List[str]:
+    """
+    Beantwortet eine Caching-Strategie über eine sortierte Abfrage am Snapshot.
+
+    Returns:
+        Container-Pfade (Serien: erste Episode), höchstens count Einträge.
+    """
+    files: List[str] = []
+    for item in library_snapshot.query(media_type, order_column, played_since=played_since):
+        if len(files) >= count:
+            break
+        plex_path = item.file if item.media_type == "movie" else library_snapshot.first_episode_path(item)
+        file_path = path_resolver.resolve(plex_path) if plex_path else None
+        if file_path and file_path not in files:
+            files.append(file_path)
+    return files
+
+
+# --- LIVE ACTIVITY MONITORING ---
+
+async def fetch_current_activity(all_media: bool = False) -> List[Dict[str, Any]]:
+    """
+    Holt aktuell laufende Wiedergaben von Tautulli.
+
+    Args:
+        all_media: Auch Filme u.ä. liefern (z.B. für Playhead-Readahead).
+
+    Returns:
+        Liste von aktiven Serien-Wiedergaben mit Show-Info.
+    """
+    sessions = []
+
+    if not config.tautulli_enabled or not config.tautulli_url or not config.tautulli_api_key:
+        return sessions
+
+    base_url = config.tautulli_url.rstrip('/')
+
+    async with httpx.AsyncClient(timeout=15.0) as client:
+        try:
+            activity = await _tautulli_get(client, base_url, "get_activity")
+
+            if activity is not None:
+                for session in activity.get("sessions", []):
+                    # Nur Serien-Episoden sind interessant
+                    is_episode = session.get("media_type") == "episode"
+                    if is_episode or all_media:
+                        sessions.append({
+                            "session_key": str(session.get("session_key", "")),
+                            "rating_key": str(session.get("rating_key", "")),
+                            "media_type": session.get("media_type", ""),
+                            "show_key": session.get("grandparent_rating_key"),
+                            "show_title": session.get("grandparent_title") or session.get("title"),
+                            "season": _to_int(session.get("parent_media_index")) if is_episode else 0,
+                            "episode": _to_int(session.get("media_index")) if is_episode else 0,
+                            "user": session.get("friendly_name", "Unknown"),
+                            # Position/Länge in Millisekunden
+                            "view_offset": _to_int(session.get("view_offset")),
+                            "duration": _to_int(session.get("duration")),
+                            "file": session.get("file") or "",
+                            "file_size": _to_int(session.get("file_size")),
+                            "bitrate": _to_int(session.get("bitrate"))  # kbps
+                        })
+
+                episode_count = sum(1 for s in sessions if s["media_type"] == "episode")
+                if episode_count:
+                    logger.debug(f"Live Activity: {episode_count} Serien-Streams aktiv")
+
+        except Exception as e:
+            logger.debug(f"Activity fetch error: {e}")
+
+    return sessions
+
+
+async def plan_next_episodes(session: Dict[str, Any]) -> List[str]:
+    """
+    Ermittelt die nächsten Episoden einer laufenden Serie.
+
+    Args:
+        session: Session-Info mit show_key, season, episode.
+
+    Returns:
+        Dateipfade der nächsten live_episodes_to_preload Episoden.
+    """
+    if not config.tautulli_url or not config.tautulli_api_key:
+        return []
+
+    try:
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            next_eps = await find_next_episodes(
+                client,
+                config.live_next_episodes_backend,
+                session["show_key"],
+                session["season"],
+                session["episode"]
+            )
+    except Exception as e:
+        logger.warning(f"Live-Monitoring Error: {e}")
+        return []
+
+    # Limitiere auf konfigurierte Anzahl
+    next_eps = next_eps[:config.live_episodes_to_preload]
+    if not next_eps:
+        logger.info(f"Live-Monitoring: Keine nächsten Episoden gefunden für '{session['show_title']}'")
+    else:
+        logger.info(f"Live-Monitoring: {len(next_eps)} Episoden gefunden für '{session['show_title']}'")
+    return next_eps
+
+
+async def warm_episodes(files: List[str], session: Dict[str, Any]) -> int:
+    """
+    Reiht die Episoden, die noch nicht im Cache sind, mit Live-Priorität ein.
+
+    Returns:
+        Anzahl der geladenen Episoden.
+    """
+    pending = []
+    for filepath in files:
+        filename = os.path.basename(filepath)
+
+        if not path_resolver.exists(filepath):
+            logger.warning(f"Live-Monitoring: Datei nicht gefunden: {filepath}")
+            continue
+
+        # Prüfe ob schon gecached
+        duration = await asyncio.to_thread(read_file_chunk, filepath, 1)  # Quick check
+        if duration < config.cache_threshold_ms:
+            logger.debug(f"⚡ Live-Cache: {filename} (bereits im Cache)")
+            continue
+
+        # Preload - höchste Priorität, verdrängt laufende Bulk-Einträge
+        logger.info(f"📦 Live-Preload: {filename} (User: {session['user']})")
+        pending.append(filepath)
+
+    futures = [
+        work_queue.enqueue(filepath, PRIORITY_LIVE, "live", rank=i / len(pending))
+        for i, filepath in enumerate(pending)
+    ]
+    results = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+
+    loaded_count = 0
+    for filepath, result in zip(pending, results):
+        if result["status"] in ("loaded", "cached"):
+            loaded_count += 1
+            logger.info(f"✅ Live-Preload fertig: {os.path.basename(filepath)}")
+        else:
+            logger.warning(f"Live-Preload übersprungen ({result['status']}): {os.path.basename(filepath)}")
+    return loaded_count
+
+
+class SessionTracker:
+    """
+    Zustandsautomat für Live-Sessions (Schlüssel: Session-ID).
+
+    Der Next-Episode-Plan wird einmal pro (Serie, Staffel, Episode)
+    ermittelt und gewärmt; der Schlüssel enthält die Position, weil der
+    Plan davon abhängt, und Sessions an derselben Stelle teilen sich einen
+    Plan. Danach wird die Residenz nur alle live_residency_recheck_seconds
+    erneut geprüft. Leere Pläne (keine nächsten Episoden oder Fehler)
+    werden ebenfalls gemerkt und erst nach dieser Zeit neu ermittelt.
+    Unabhängige Pläne werden parallel abgearbeitet.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, tuple] = {}  # Session-ID -> Plan-Schlüssel
+        self._plans: Dict[tuple, Dict[str, Any]] = {}  # Plan-Schlüssel -> {"files", "checked_at"}
+
+    async def process(self, sessions: List[Dict[str, Any]]):
+        """Aktualisiert den Zustand aus einem Activity-Poll und wärmt fällige Pläne."""
+        now = time.monotonic()
+        due: Dict[tuple, Dict[str, Any]] = {}
+        active = set()
+
+        for session in sessions:
+            if session.get("media_type", "episode") != "episode" or not session.get("show_key"):
+                continue
+            plan_key = (str(session["show_key"]), session["season"], session["episode"])
+            session_id = session.get("session_key") or session["user"]
+            active.add(session_id)
+
+            if session_id not in self._sessions:
+                METRIC_LIVE_SESSIONS.inc()
+                await asyncio.to_thread(
+                    effectiveness_tracker.record_play,
+                    path_resolver.resolve(session["file"]) if session["file"] else None,
+                    "live", session["rating_key"], session["user"],
+                    time.time() - session["view_offset"] / 1000
+                )
+            if self._sessions.get(session_id) != plan_key:
+                logger.info(
+                    f"Live-Session: {session['user']} schaut '{session['show_title']}' "
+                    f"S{session['season']:02d}E{session['episode']:02d}"
+                )
+                self._sessions[session_id] = plan_key
+
+            plan = self._plans.get(plan_key)
+            if plan and now - plan["checked_at"] < config.live_residency_recheck_seconds:
+                continue
+            due.setdefault(plan_key, session)
+
+        # Beendete Sessions und nicht mehr genutzte Pläne entfernen
+        for session_id in list(self._sessions):
+            if session_id not in active:
+                del self._sessions[session_id]
+        in_use = set(self._sessions.values())
+        for plan_key in list(self._plans):
+            if plan_key not in in_use:
+                del self._plans[plan_key]
+
+        if due:
+            await asyncio.gather(*(self._run_plan(k, s) for k, s in due.items()), return_exceptions=True)
+
+    async def _run_plan(self, plan_key: tuple, session: Dict[str, Any]):
+        """Ermittelt (falls nötig) und wärmt einen Plan."""
+        plan = self._plans.get(plan_key)
+        if plan is None or not plan["files"]:
+            plan = {"files": await plan_next_episodes(session), "checked_at": 0}
+            self._plans[plan_key] = plan
+
+        loaded = await warm_episodes(plan["files"], session) if plan["files"] else 0
+        plan["checked_at"] = time.monotonic()
+        if loaded > 0:
+            logger.info(
+                f"Live-Preload für '{session['show_title']}' "
+                f"S{session['season']:02d}E{session['episode']:02d}: "
+                f"{loaded} Episoden gecached"
+            )
+
+
+session_tracker = SessionTracker()
+
+
+class PlayheadReadahead:
+    """
+    Hält pro Session ein Fenster vor dem Abspielpunkt im Cache.
+
+    Die Byte-Position wird aus view_offset/duration und der Dateigröße
+    geschätzt, die Fenstergröße aus der Bitrate (live_readahead_seconds).
+    Es wird nur der noch nicht gelesene Teil des Fensters nachgeladen.
+    """
+
+    # Kleinere Nachlade-Schritte lohnen sich nicht
+    MIN_STEP_BYTES = 8 * 1024 * 1024
+
+    def __init__(self):
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.bytes_read: int = 0
+
+    def plan(
+        self,
+        session_id: str,
+        filepath: str,
+        file_size: int,
+        duration_ms: int,
+        view_offset_ms: int,
+        bitrate_kbps: int = 0
+    ) -> Optional[tuple]:
+        """
+        Berechnet den als nächstes zu lesenden Bereich.
+
+        Returns:
+            (offset, length) oder None wenn das Fenster schon warm ist.
+        """
+        if not file_size or not duration_ms:
+            return None
+
+        if bitrate_kbps:
+            bytes_per_second = bitrate_kbps * 1000 / 8
+        else:
+            bytes_per_second = file_size / (duration_ms / 1000)
+        window = int(bytes_per_second * config.live_readahead_seconds)
+        position = int(file_size * min(view_offset_ms / duration_ms, 1.0))
+        window_end = min(file_size, position + window)
+
+        tracked = self._sessions.get(session_id)
+        start = position
+        if tracked and tracked["file"] == filepath:
+            warmed_end = tracked["warmed_end"]
+            # Weiterlesen, außer bei Sprüngen hinter das Fenster oder zurück
+            if position <= warmed_end <= position + 2 * window:
+                start = warmed_end
+        if window_end - start < self.MIN_STEP_BYTES and window_end < file_size:
+            return None
+        if window_end <= start:
+            return None
+
+        self._sessions[session_id] = {"file": filepath, "warmed_end": window_end}
+        return start, window_end - start
+
+    async def advance(self, session_id: str, filepath: str, file_size: int,
+                      duration_ms: int, view_offset_ms: int, bitrate_kbps: int = 0):
+        """Liest den nächsten Bereich vor dem Abspielpunkt."""
+        byte_range = self.plan(session_id, filepath, file_size, duration_ms, view_offset_ms, bitrate_kbps)
+        if byte_range and await memory_governor.wait_for_headroom("Readahead", max_wait=0):
+            read = await asyncio.to_thread(read_file_range, filepath, *byte_range)
+            self.bytes_read += read
+            METRIC_BYTES_WARMED.inc(read, source="readahead", disk=disk_label(filepath))
+            logger.debug(f"Readahead: {os.path.basename(filepath)} +{read / (1024**2):.0f} MB")
+
+    async def process(self, sessions: List[Dict[str, Any]]):
+        """Aktualisiert alle Sessions aus einem Activity-Poll."""
+        active = set()
+        for session in sessions:
+            session_id = session.get("session_key")
+            if not session_id or not session.get("file"):
+                continue
+            # resolve/stat können eine schlafende Array-Disk wecken: nicht auf dem Loop
+            filepath = await asyncio.to_thread(path_resolver.resolve, session["file"])
+            if not filepath:
+                continue
+            active.add(session_id)
+            file_size = session.get("file_size")
+            if not file_size:
+                try:
+                    file_size = await asyncio.to_thread(os.path.getsize, filepath)
+                except OSError:
+                    continue
+            await self.advance(
+                session_id, filepath, file_size,
+                session.get("duration", 0), session.get("view_offset", 0), session.get("bitrate", 0)
+            )
+        self.prune(active)
+
+    def schedule(self, sessions: List[Dict[str, Any]]):
+        """
+        Startet process() als Hintergrund-Task, damit das Lesen den Poll nicht
+        aufhält. Läuft der vorige Durchgang noch, entfällt dieser.
+        """
+        if self._task and not self._task.done():
+            return
+
+        async def run():
+            try:
+                await self.process(sessions)
+            except Exception as e:
+                logger.debug(f"Readahead Error: {e}")
+
+        self._task = asyncio.create_task(run())
+
+    def cancel(self):
+        """Bricht einen laufenden Durchgang ab."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+    def stop(self, session_id: str):
+        """Beendet das Tracking einer Session."""
+        if self._sessions.pop(session_id, None):
+            logger.debug(f"Readahead beendet für Session {session_id}")
+
+    def prune(self, active_ids: set):
+        """Entfernt beendete Sessions."""
+        for session_id in list(self._sessions):
+            if session_id not in active_ids:
+                self.stop(session_id)
+
+
+playhead_readahead = PlayheadReadahead()
+
+
+class AdaptivePollScheduler:
+    """
+    Bestimmt das Intervall bis zum nächsten Activity-Poll.
+
+    - Leerlauf: exponentieller Backoff bis live_poll_max_seconds
+    - Neue/geänderte Sessions: live_poll_min_seconds
+    - Unveränderte Sessions: Rückkehr zum Normaltakt (live_check_interval_seconds)
+    - Session kurz vor Episodenende: live_poll_near_end_seconds
+    """
+
+    def __init__(self):
+        self.interval: float = 0
+        self._last_signature: frozenset = frozenset()
+
+    def next_interval(self, sessions: List[Dict[str, Any]]) -> float:
+        """Berechnet das nächste Intervall aus den aktuellen Sessions."""
+        base = config.live_check_interval_seconds
+        if not config.live_adaptive_polling:
+            return base
+
+        signature = frozenset((s.get("session_key"), s.get("rating_key")) for s in sessions)
+        if not sessions:
+            interval = min(max(self.interval, base) * 2, config.live_poll_max_seconds)
+        elif signature != self._last_signature:
+            interval = config.live_poll_min_seconds
+        else:
+            interval = min(max(self.interval, config.live_poll_min_seconds) * 2, base)
+
+        remaining = [
+            (s["duration"] - s["view_offset"]) / 1000
+            for s in sessions if s.get("duration")
+        ]
+        if remaining:
+            nearest_end = min(remaining)
+            if nearest_end <= config.live_near_end_window_seconds:
+                interval = config.live_poll_near_end_seconds
+            else:
+                # Spätestens zu Beginn des Endfensters wieder prüfen
+                interval = min(interval, nearest_end - config.live_near_end_window_seconds)
+
+        self._last_signature = signature
+        self.interval = max(interval, config.live_poll_near_end_seconds)
+        return self.interval
+
+
+live_poll_scheduler = AdaptivePollScheduler()
+
+
+async def live_monitoring_task():
+    """
+    Hintergrund-Task der regelmäßig aktive Streams prüft
+    und nächste Episoden preloaded.
+
+    Mit live_activity_source="websocket" übernehmen Plex-Notifications die
+    Erkennung; gepollt wird nur, solange der Websocket nicht verbunden ist.
+    """
+    listener_task = None
+    if config.live_activity_source == "websocket":
+        listener_task = asyncio.create_task(plex_notifications.run())
+
+    try:
+        await _live_polling_loop()
+    finally:
+        if listener_task:
+            listener_task.cancel()
+        playhead_readahead.cancel()
+
+
+async def _live_polling_loop():
+    """Polling-Schleife für Tautulli get_activity (mit adaptivem Takt)."""
+    while True:
+        sessions = []
+        try:
+            if plex_notifications.connected:
+                pass  # Websocket liefert Events, Polling pausiert
+            elif config.live_monitoring_enabled and config.tautulli_enabled:
+                sessions = await fetch_current_activity(all_media=True)
+
+                if config.live_readahead_enabled:
+                    playhead_readahead.schedule(sessions)
+
+                await session_tracker.process(sessions)
+
+        except Exception as e:
+            logger.debug(f"Live monitoring error: {e}")
+
+        # Warte bis zum nächsten Check
+        if plex_notifications.connected:
+            await asyncio.sleep(config.live_check_interval_seconds)
+        else:
+            await asyncio.sleep(live_poll_scheduler.next_interval(sessions))
+
+
+# --- PLEX API CLIENT ---
+
+def _plex_headers() -> Dict[str, str]:
+    """Standard-Header für Plex-API-Aufrufe."""
+    return {
+        "X-Plex-Token": config.plex_token,
+        "Accept": "application/json"
+    }
+
+
+async def _plex_get(client: httpx.AsyncClient, base_url: str, path: str, **params) -> Optional[Dict[str, Any]]:
+    """
+    Führt einen Plex-API-Aufruf aus (gebündelt über SingleFlight).
+
+    Returns:
+        Der 'MediaContainer' der Antwort oder None bei Fehlern.
+    """
+    async def request() -> Optional[Dict[str, Any]]:
+        start_t = time.perf_counter()
+        resp = await client.get(f"{base_url}{path}", params=params, headers=_plex_headers())
+        # IDs im Pfad zusammenfassen (begrenzte Label-Kardinalität)
+        cmd = "/".join(":id" if part.isdigit() else part for part in path.split("/"))
+        METRIC_UPSTREAM_SECONDS.observe(time.perf_counter() - start_t, backend="plex", cmd=cmd)
+        if resp.status_code != 200:
+            logger.debug(f"Plex {path}: HTTP {resp.status_code}")
+            return None
+        return resp.json().get("MediaContainer", {})
+
+    key = ("plex", base_url, path, tuple(sorted((k, str(v)) for k, v in params.items())))
+    return await upstream_flight.do(key, request, config.upstream_result_ttl_seconds)
+
+
+def _plex_media_path(entry: Dict[str, Any]) -> str:
+    """Liest den ersten Dateipfad aus Plex Media[].Part[]."""
+    for media in entry.get("Media", []):
+        for part in media.get("Part", []):
+            if "file" in part:
+                return part["file"]
+    return ""
+
+
+PLEX_SORT_FIELDS = {
+    "added_at": "addedAt",
+    "originally_available_at": "originallyAvailableAt",
+    "play_count": "viewCount",
+    "last_played": "lastViewedAt"
+}
+
+
+def _resolve_backend(backend: str) -> str:
+    """Gibt das effektive Resolver-Backend zurück (Plex nur wenn konfiguriert)."""
+    if backend == "plex" and config.plex_url and config.plex_token:
+        return "plex"
+    return "tautulli"
+
+
+async def _plex_section_items(
+    client: httpx.AsyncClient,
+    base_url: str,
+    section_id: str,
+    plex_type: int,
+    sort_field: str,
+    order_dir: str,
+    count: int
+) -> List[Dict[str, Any]]:
+    """Holt die ersten 'count' Einträge einer Plex-Sektion sortiert nach sort_field."""
+    container = await _plex_get(
+        client, base_url, f"/library/sections/{section_id}/all",
+        type=plex_type,
+        sort=f"{sort_field}:{order_dir}",
+        **{"X-Plex-Container-Start": 0, "X-Plex-Container-Size": count}
+    )
+    return (container or {}).get("Metadata", [])
+
+
+async def _plex_batch_metadata(
+    client: httpx.AsyncClient,
+    base_url: str,
+    rating_keys: List[str],
+    batch_size: int = 50
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Holt Metadaten mehrerer Einträge gebündelt über /library/metadata/{k1,k2,...}.
+
+    Returns:
+        Dict rating_key -> Plex-Metadaten.
+    """
+    entries: Dict[str, Dict[str, Any]] = {}
+    for i in range(0, len(rating_keys), batch_size):
+        keys = ",".join(rating_keys[i:i + batch_size])
+        container = await _plex_get(client, base_url, f"/library/metadata/{keys}")
+        for entry in (container or {}).get("Metadata", []):
+            entries[str(entry.get("ratingKey"))] = entry
+    return entries
+
+
+async def _plex_find_next_episodes(
+    client: httpx.AsyncClient,
+    base_url: str,
+    show_key: str,
+    last_season: int,
+    last_episode: int,
+    max_episodes: int = 3
+) -> List[str]:
+    """
+    Findet die nächsten Episoden einer Serie direkt über Plex.
+
+    Eine einzige Abfrage von /library/metadata/{key}/allLeaves liefert alle
+    Episoden inkl. Dateipfad (statt Staffeln, Episoden und Metadaten einzeln
+    über Tautulli abzufragen).
+    """
+    episodes = []
+    last_season = int(last_season) if last_season else 0
+    last_episode = int(last_episode) if last_episode else 0
+
+    try:
+        container = await _plex_get(client, base_url, f"/library/metadata/{show_key}/allLeaves")
+        if container is None:
+            logger.warning(f"Plex API Fehler: Keine Episoden für show_key={show_key}")
+            return episodes
+
+        eps = sorted(
+            container.get("Metadata", []),
+            key=lambda ep: (_to_int(ep.get("parentIndex")), _to_int(ep.get("index")))
+        )
+        for ep in eps:
+            season_num = _to_int(ep.get("parentIndex"))
+            ep_num = _to_int(ep.get("index"))
+            if (season_num, ep_num) <= (last_season, last_episode):
+                continue
+
+            plex_path = _plex_media_path(ep)
+            file_path = path_resolver.resolve(plex_path) if plex_path else None
+            if file_path:
+                logger.debug(f"Gefunden (Plex): S{season_num:02d}E{ep_num:02d} -> {file_path}")
+                episodes.append(file_path)
+                if len(episodes) >= max_episodes:
+                    break
+
+    except Exception as e:
+        logger.warning(f"Fehler beim Finden nächster Episoden (Plex): {e}")
+
+    return episodes
+
+
+async def find_next_episodes(
+    client: httpx.AsyncClient,
+    backend: str,
+    show_key: str,
+    last_season: int,
+    last_episode: int,
+    max_episodes: int = 3
+) -> List[str]:
+    """Findet die nächsten Episoden über das gewählte Backend ("tautulli" oder "plex")."""
+    if _resolve_backend(backend) == "plex":
+        return await _plex_find_next_episodes(
+            client, config.plex_url.rstrip('/'), show_key, last_season, last_episode, max_episodes
+        )
+    return await _find_next_episodes(
+        client, config.tautulli_url.rstrip('/'), show_key, last_season, last_episode, max_episodes
+    )
+
+
+async def fetch_plex_on_deck() -> List[str]:
+    """
+    Holt 'On Deck' (Continue Watching) Inhalte von Plex.
+
+    Returns:
+        Liste von Dateipfaden.
+    """
+    files = []
+
+    if not config.plex_enabled or not config.plex_url or not config.plex_token:
+        return files
+
+    base_url = config.plex_url.rstrip('/')
+
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        try:
+            # On Deck Endpoint
+            container = await _plex_get(client, base_url, "/library/onDeck")
+
+            if container is not None:
+                items = container.get("Metadata", [])
+
+                for item in items:
+                    # Hole Mediendaten
+                    for media in item.get("Media", []):
+                        for part in media.get("Part", []):
+                            if "file" in part:
+                                files.append(part["file"])
+
+                logger.info(f"Plex On Deck: {len(files)} files found")
+
+        except Exception as e:
+            logger.error(f"Plex API error: {e}")
+
+    return files
+
+
+# --- PLAY EVENT HANDLING (WEBHOOK / NOTIFICATIONS) ---
+
+# (Player-UUID bzw. Session, rating_key) -> Zeitpunkt des letzten behandelten Events
+_webhook_recent_events: Dict[tuple, float] = {}
+
+
+def parse_webhook_play(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Extrahiert die relevanten Infos aus einem Plex-Webhook-Payload.
+
+    Returns:
+        Dict mit session, rating_key, show_key, season, episode, file usw.
+        oder None wenn das Payload keine Metadaten enthält.
+    """
+    metadata = payload.get("Metadata") or {}
+    if not metadata:
+        return None
+
+    player = payload.get("Player") or {}
+    account = payload.get("Account") or {}
+    return _play_from_metadata(
+        metadata,
+        session=player.get("uuid") or account.get("title", ""),
+        user=account.get("title", "Unknown")
+    )
+
+
+def _play_from_metadata(metadata: Dict[str, Any], session: str, user: str) -> Dict[str, Any]:
+    """Baut die Wiedergabe-Infos aus einem Plex-Metadaten-Objekt."""
+    media_type = metadata.get("type", "")
+    season = _to_int(metadata.get("parentIndex"))
+    episode = _to_int(metadata.get("index"))
+    if media_type == "episode":
+        title = f"{metadata.get('grandparentTitle', '')} S{season:02d}E{episode:02d}"
+    else:
+        title = metadata.get("title", "")
+
+    return {
+        "session": session,
+        "rating_key": str(metadata.get("ratingKey") or ""),
+        "media_type": media_type,
+        "show_key": str(metadata.get("grandparentRatingKey") or ""),
+        "season": season,
+        "episode": episode,
+        "file": _plex_media_path(metadata),
+        "title": title,
+        "user": user
+    }
+
+
+def _play_debounced(play: Dict[str, Any]) -> bool:
+    """Prüft ob dieselbe Wiedergabe kürzlich schon behandelt wurde (und merkt sie sonst vor)."""
+    now = time.monotonic()
+    for key, seen_at in list(_webhook_recent_events.items()):
+        if now - seen_at > config.webhook_debounce_seconds:
+            del _webhook_recent_events[key]
+
+    key = (play["session"], play["rating_key"])
+    if key in _webhook_recent_events:
+        return True
+    _webhook_recent_events[key] = now
+    return False
+
+
+async def targeted_play_preload(play: Dict[str, Any]):
+    """
+    Gezielter Preload für eine gerade gestartete Wiedergabe.
+
+    Lädt den Tail der gerade gestarteten Datei und Head/Tail der nächsten
+    Episoden. Läuft mit Play-Priorität über die Warteschlange und geht damit
+    einem laufenden Preload-Lauf vor.
+    """
+    started = time.perf_counter()
+    backend = _resolve_backend(config.live_next_episodes_backend)
+    upstream_ready = backend == "plex" or bool(config.tautulli_url and config.tautulli_api_key)
+    playing_file = path_resolver.resolve(play["file"]) if play["file"] else None
+    next_eps: List[str] = []
+
+    try:
+        if upstream_ready:
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                if not playing_file and play["rating_key"]:
+                    files = await _resolve_rating_keys(client, backend, [play["rating_key"]])
+                    playing_file = files[0] if files else None
+
+                if play["media_type"] == "episode" and play["show_key"]:
+                    next_eps = await find_next_episodes(
+                        client, backend, play["show_key"],
+                        play["season"], play["episode"],
+                        max_episodes=config.live_episodes_to_preload
+                    )
+
+        # Warm-Zustand beim Start festhalten, bevor der Play-Preload ihn ändert
+        if playing_file or play["rating_key"]:
+            await asyncio.to_thread(
+                effectiveness_tracker.record_play, playing_file, "webhook", play["rating_key"], play["user"]
+            )
+
+        # Tail der laufenden Datei zuerst, danach die nächsten Episoden
+        futures = []
+        if playing_file:
+            futures.append(work_queue.enqueue(playing_file, PRIORITY_PLAY, "play", head_mb=0))
+
+        for i, filepath in enumerate(next_eps):
+            duration = await asyncio.to_thread(read_file_chunk, filepath, 1)
+            if duration < config.cache_threshold_ms:
+                continue
+            futures.append(work_queue.enqueue(filepath, PRIORITY_PLAY, "play", rank=(i + 1) / (len(next_eps) + 1)))
+
+        results = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+        loaded = sum(1 for r in results[1 if playing_file else 0:] if r["status"] == "loaded")
+
+        logger.info(
+            f"🎬 Play-Preload für {play['title']}: {loaded}/{len(next_eps)} Episoden geladen"
+            f"{', Tail der laufenden Datei' if playing_file else ''} "
+            f"({time.perf_counter() - started:.1f}s)"
+        )
+
+    except Exception as e:
+        logger.warning(f"Play-Preload Error: {e}")
+
+
+# --- PLEX NOTIFICATIONS ---
+
+class PlexNotificationListener:
+    """
+    Ereignisbasierte Session-Erkennung über Plex /:/websockets/notifications.
+
+    Reagiert auf 'playing'-Notifications mit einem gezielten Preload und
+    verbindet sich bei Fehlern mit exponentiellem Backoff neu. Solange keine
+    Verbindung besteht, übernimmt das Tautulli-Polling.
+    """
+
+    MEDIA_INFO_SIZE = 256     # Einträge im Readahead-Metadaten-Cache
+    MEDIA_INFO_TTL = 3600     # Sekunden, danach neu laden (Datei kann ersetzt werden)
+    SESSION_TIMEOUT = 120     # Sekunden ohne Notification, bis eine Session als beendet gilt
+
+    def __init__(self):
+        self.connected: bool = False
+        self.reconnects: int = 0
+        self.events: int = 0
+        self.last_error: str = ""
+        # rating_key -> (Ladezeit, (Pfad, Größe, Dauer ms, Bitrate kbps)) für Readahead, LRU
+        self._media_info: OrderedDict = OrderedDict()
+        # Session -> letzte 'playing'-Notification (fehlendes 'stopped' abfangen)
+        self._session_seen: Dict[str, float] = {}
+        # Referenzen auf laufende Preload-/Readahead-Tasks (sonst ggf. vom GC eingesammelt)
+        self._tasks: set = set()
+
+    def _url(self) -> str:
+        """Baut die Websocket-URL aus der Plex-URL."""
+        base_url = config.plex_url.rstrip('/')
+        if base_url.startswith("https://"):
+            base_url = "wss://" + base_url[len("https://"):]
+        elif base_url.startswith("http://"):
+            base_url = "ws://" + base_url[len("http://"):]
+        return f"{base_url}/:/websockets/notifications?X-Plex-Token={config.plex_token}"
+
+    async def run(self):
+        """Hält die Verbindung offen (bis der Task abgebrochen wird)."""
+        if websockets is None:
+            logger.warning("Plex-Notifications: Paket 'websockets' fehlt, nutze Polling")
+            return
+
+        backoff = 1
+        while True:
+            if not config.plex_url or not config.plex_token:
+                await asyncio.sleep(config.live_check_interval_seconds)
+                continue
+            try:
+                async with websockets.connect(self._url(), ping_interval=30) as ws:
+                    self.connected = True
+                    backoff = 1
+                    logger.info("📡 Plex-Notifications verbunden")
+                    async for message in ws:
+                        await self._handle_message(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                logger.debug(f"Plex-Notifications Fehler: {e}")
+            finally:
+                if self.connected:
+                    logger.warning("Plex-Notifications getrennt, Polling übernimmt")
+                self.connected = False
+
+            self.reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 300)
+
+    def _spawn(self, coro):
+        """Startet einen Task und hält ihn bis zum Ende referenziert."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _handle_message(self, message: str):
+        """Wertet eine Notification aus und startet ggf. einen Play-Preload."""
+        try:
+            container = json.loads(message).get("NotificationContainer", {})
+        except (ValueError, AttributeError):
+            return
+        if container.get("type") != "playing":
+            return
+
+        now = time.monotonic()
+        for notification in container.get("PlaySessionStateNotification", []):
+            session_key = str(notification.get("sessionKey", ""))
+            if notification.get("state") == "stopped":
+                self._session_seen.pop(session_key, None)
+                playhead_readahead.stop(session_key)
+            if notification.get("state") != "playing":
+                continue
+            self._session_seen[session_key] = now
+            play = {
+                "session": session_key,
+                "rating_key": str(notification.get("ratingKey", ""))
+            }
+            if config.live_readahead_enabled and play["rating_key"]:
+                self._spawn(self._readahead(
+                    session_key, play["rating_key"], _to_int(notification.get("viewOffset"))
+                ))
+            if not play["rating_key"] or _play_debounced(play):
+                continue
+
+            self.events += 1
+            self._spawn(self._preload(play["session"], play["rating_key"]))
+
+        self._prune_sessions(now)
+
+    def _prune_sessions(self, now: float):
+        """Beendet den Readahead von Sessions, die seit SESSION_TIMEOUT schweigen."""
+        for session_key, seen in list(self._session_seen.items()):
+            if now - seen > self.SESSION_TIMEOUT:
+                del self._session_seen[session_key]
+                playhead_readahead.stop(session_key)
+
+    async def _preload(self, session: str, rating_key: str):
+        """Holt die Metadaten der Wiedergabe und startet den gezielten Preload."""
+        try:
+            async with httpx.AsyncClient(timeout=15.0) as client:
+                container = await _plex_get(client, config.plex_url.rstrip('/'), f"/library/metadata/{rating_key}")
+            metadata = ((container or {}).get("Metadata") or [{}])[0]
+            if not metadata:
+                return
+            play = _play_from_metadata(metadata, session=session, user="Plex")
+            logger.info(f"📡 Plex-Notification: Wiedergabe gestartet ({play['title']})")
+            await targeted_play_preload(play)
+        except Exception as e:
+            logger.warning(f"Plex-Notification Preload Error: {e}")
+
+    async def _readahead(self, session: str, rating_key: str, view_offset: int):
+        """Führt den Playhead-Readahead mit der Position aus der Notification nach."""
+        try:
+            cached = self._media_info.get(rating_key)
+            if cached and time.monotonic() - cached[0] < self.MEDIA_INFO_TTL:
+                self._media_info.move_to_end(rating_key)
+            else:
+                async with httpx.AsyncClient(timeout=15.0) as client:
+                    container = await _plex_get(client, config.plex_url.rstrip('/'), f"/library/metadata/{rating_key}")
+                metadata = ((container or {}).get("Metadata") or [{}])[0]
+                media = (metadata.get("Media") or [{}])[0]
+                part = (media.get("Part") or [{}])[0]
+                filepath = path_resolver.resolve(part.get("file", "")) if part.get("file") else None
+                self._media_info[rating_key] = (time.monotonic(), (
+                    filepath, _to_int(part.get("size")),
+                    _to_int(metadata.get("duration") or media.get("duration")), _to_int(media.get("bitrate"))
+                ))
+                self._media_info.move_to_end(rating_key)
+                while len(self._media_info) > self.MEDIA_INFO_SIZE:
+                    self._media_info.popitem(last=False)
+            filepath, file_size, duration, bitrate = self._media_info[rating_key][1]
+            if filepath:
+                await playhead_readahead.advance(session, filepath, file_size, duration, view_offset, bitrate)
+        except Exception as e:
+            logger.debug(f"Readahead Error: {e}")
+
+
+plex_notifications = PlexNotificationListener()
+
+
+# --- VIEWING PREDICTION ---
+
+HOURS_PER_WEEK = 7 * 24
+
+
+def _hour_of_week(ts: float) -> int:
+    """Stunde der Woche (0 = Montag 0 Uhr) für einen Unix-Zeitstempel."""
+    dt = datetime.fromtimestamp(ts)
+    return dt.weekday() * 24 + dt.hour
+
+
+def _hour_start(ts: float) -> int:
+    """Beginn der Stunde eines Unix-Zeitstempels."""
+    return int(datetime.fromtimestamp(ts).replace(minute=0, second=0, microsecond=0).timestamp())
+
+
+class ViewingPredictor:
+    """
+    Sagt Spitzenzeiten aus der Tautulli-Historie voraus.
+
+    Aus get_history (je Bibliothek) entsteht eine Stunde-der-Woche-Heatmap
+    erwarteter Wiedergabestarts je Bibliothek und User. Die letzten 24
+    Stunden bleiben außen vor und dienen als Ist-Werte für den Vergleich
+    Prognose/Ist. Vor jeder erwarteten Spitze wird ein Warm-up eingeplant,
+    das die Titel lädt, die die Zuschauer dieser Stunde wahrscheinlich
+    starten (angefangene Titel, sonst die nächste Episode).
+    """
+
+    def __init__(self):
+        self.heatmap: Dict[str, Dict[str, List[float]]] = {}  # Bibliothek -> User -> 168 Werte
+        self.actual: Dict[int, int] = {}  # Stundenbeginn -> Starts (letzte 24h)
+        self.recent: Dict[str, List[Dict[str, Any]]] = {}  # User -> letzte Wiedergaben (neueste zuerst)
+        self.warmups: Dict[int, Dict[str, Any]] = {}  # Spitzenstunde -> geplanter Warm-up
+        self.updated_at: float = 0
+
+    async def ensure_fresh(self, max_age: float = 3600):
+        """Aktualisiert die Auswertung, wenn sie älter als max_age Sekunden ist."""
+        if time.time() - self.updated_at > max_age:
+            await self.refresh()
+
+    async def refresh(self):
+        """Baut Heatmap, Ist-Werte und Zuschauer-Verläufe neu auf."""
+        if not config.tautulli_url or not config.tautulli_api_key:
+            return
+
+        now = time.time()
+        window_start = now - config.predictive_history_days * 86400
+        cutoff = now - 86400
+        weeks = max((cutoff - window_start) / (7 * 86400), 1 / 7)
+
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            rows = await fetch_tautulli_history(client, config.tautulli_url.rstrip('/'), window_start)
+
+        heatmap: Dict[str, Dict[str, List[float]]] = {}
+        actual: Dict[int, int] = {}
+        recent: Dict[str, List[Dict[str, Any]]] = {}
+        for row in sorted(rows, key=lambda r: _to_int(r.get("date")), reverse=True):
+            started = _to_int(row.get("started") or row.get("date"))
+            if started < window_start:
+                continue
+            user = row.get("friendly_name") or row.get("user") or "?"
+            recent.setdefault(user, []).append(row)
+            if started >= cutoff:
+                hour = _hour_start(started)
+                actual[hour] = actual.get(hour, 0) + 1
+            else:
+                buckets = heatmap.setdefault(row["library"], {}).setdefault(user, [0.0] * HOURS_PER_WEEK)
+                buckets[_hour_of_week(started)] += 1 / weeks
+
+        self.heatmap, self.actual, self.recent = heatmap, actual, recent
+        self.updated_at = now
+        logger.info(f"🔮 Prognose: {len(rows)} Wiedergaben aus {len(heatmap)} Bibliotheken ausgewertet")
+
+    def expected_by_user(self, ts: float) -> Dict[str, float]:
+        """Erwartete Starts je User in der Stunde von ts (über alle Bibliotheken)."""
+        bucket = _hour_of_week(ts)
+        users: Dict[str, float] = {}
+        for by_user in self.heatmap.values():
+            for user, buckets in by_user.items():
+                if buckets[bucket]:
+                    users[user] = users.get(user, 0.0) + buckets[bucket]
+        return users
+
+    def forecast(self, start: float, hours: int) -> List[Dict[str, Any]]:
+        """Prognose (und ggf. Ist-Werte) für aufeinanderfolgende Stunden ab start."""
+        result = []
+        hour = _hour_start(start)
+        for _ in range(hours):
+            users = self.expected_by_user(hour)
+            result.append({
+                "hour": hour,
+                "expected": round(sum(users.values()), 2),
+                "actual": self.actual.get(hour, 0) if hour < time.time() else None,
+                "users": users,
+            })
+            hour += 3600
+        return result
+
+    def peaks(self, hours: int = 24) -> List[Dict[str, Any]]:
+        """Beginn der Spitzenphasen (Prognose >= predictive_min_plays) der nächsten Stunden."""
+        upcoming = self.forecast(time.time() + 3600, hours)
+        peaks = []
+        previous = self.forecast(time.time(), 1)[0]["expected"]
+        for entry in upcoming:
+            if entry["expected"] >= config.predictive_min_plays > previous:
+                peaks.append(entry)
+            previous = entry["expected"]
+        return peaks
+
+    def schedule(self):
+        """Plant Warm-ups so, dass sie predictive_lead_minutes vor jeder Spitze laufen."""
+        now = time.time()
+        self.warmups = {h: w for h, w in self.warmups.items() if h > now}
+        for peak in self.peaks():
+            run_at = peak["hour"] - config.predictive_lead_minutes * 60
+            job_id = f"predictive_warmup_{peak['hour']}"
+            if run_at <= now or scheduler.get_job(job_id):
+                continue
+            users = sorted(peak["users"], key=peak["users"].get, reverse=True)
+            self.warmups[peak["hour"]] = {"run_at": run_at, "expected": peak["expected"], "users": users, "files": None}
+            scheduler.add_job(
+                predictive_warmup_task,
+                trigger=DateTrigger(run_date=datetime.fromtimestamp(run_at)),
+                args=[peak["hour"]],
+                id=job_id,
+                replace_existing=True
+            )
+            logger.info(
+                f"🔮 Warm-up geplant: {datetime.fromtimestamp(run_at).strftime('%a %H:%M')} "
+                f"für Spitze um {datetime.fromtimestamp(peak['hour']).strftime('%H:%M')} "
+                f"({peak['expected']:.1f} erwartete Starts, {', '.join(users[:3])})"
+            )
+
+    async def likely_titles(self, users: List[str]) -> List[str]:
+        """
+        Ermittelt die Titel, die die User wahrscheinlich als Nächstes starten.
+
+        Angefangene Titel werden fortgesetzt, bei zu Ende gesehenen Episoden
+        folgt die nächste Episode der Serie.
+        """
+        backend = _resolve_backend(config.live_next_episodes_backend)
+        files: List[str] = []
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            for user in users:
+                seen_shows = set()
+                resume_keys = []
+                for row in self.recent.get(user, []):
+                    if len(seen_shows) + len(resume_keys) >= config.predictive_titles_per_user:
+                        break
+                    show_key = row.get("grandparent_rating_key")
+                    if row.get("media_type") == "episode" and show_key:
+                        if show_key in seen_shows:
+                            continue
+                        seen_shows.add(show_key)
+                        if _to_int(row.get("watched_status")) < 1:
+                            resume_keys.append(str(row["rating_key"]))
+                        else:
+                            files.extend(await find_next_episodes(
+                                client, backend, str(show_key),
+                                _to_int(row.get("parent_media_index")), _to_int(row.get("media_index")),
+                                max_episodes=1
+                            ))
+                    elif row.get("media_type") == "movie" and _to_int(row.get("watched_status")) < 1:
+                        resume_keys.append(str(row["rating_key"]))
+                if resume_keys:
+                    files.extend(await _resolve_rating_keys(client, backend, resume_keys))
+        return list(dict.fromkeys(files))
+
+    async def warmup(self, peak_hour: int):
+        """Führt den Warm-up für eine Spitzenstunde aus."""
+        plan = self.warmups.get(peak_hour)
+        if not plan:
+            return
+        started = time.time()
+        files = await self.likely_titles(plan["users"])
+        plan["files"] = [os.path.basename(f) for f in files]
+
+        futures = [
+            work_queue.enqueue(f, PRIORITY_PREDICTED, "predictive", rank=i / len(files))
+            for i, f in enumerate(files)
+        ]
+        results = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+        loaded = [os.path.basename(f) for f, r in zip(files, results) if r["status"] == "loaded"]
+
+        state.add_history_entry(PreloadHistoryEntry(
+            timestamp=time.strftime("%Y-%m-%d %H:%M:%S"),
+            preloaded=len(loaded),
+            skipped=sum(1 for r in results if r["status"] == "cached"),
+            duration_seconds=int(time.time() - started),
+            source="predictive",
+            files_processed=loaded[:20]
+        ), history_items([{"path": f, "strategy": "predictive"} for f in files], results))
+        logger.info(f"🔮 Warm-up fertig: {len(loaded)}/{len(files)} Titel geladen für {', '.join(plan['users'][:3])}")
+
+
+viewing_predictor = ViewingPredictor()
+
+
+def _run_in_new_loop(coro):
+    """Führt eine Coroutine in einem eigenen Event-Loop aus (Scheduler-Threads)."""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(coro)
+    finally:
+        loop.close()
 
-    except Exception as e:
-        logger.debug(f"Could not find file for rating_key {rating_key}: {e}")
-    return None
 
+def predictive_refresh_task():
+    """Scheduler-Task: Prognose aktualisieren und Warm-ups einplanen."""
+    async def refresh():
+        try:
+            await viewing_predictor.refresh()
+            viewing_predictor.schedule()
+        except Exception as e:
+            logger.error(f"Prognose-Fehler: {e}")
+    _run_in_new_loop(refresh())
 
-async def _find_next_episodes(
-    client: httpx.AsyncClient,
-    base_url: str,
-    show_key: str,
-    last_season: int,
-    last_episode: int,
-    max_episodes: int = 3
-) -> List[str]:
-    """
-    Findet die nächsten ungesehenen Episoden einer Serie.
 
-    Args:
-        client: HTTP Client
-        base_url: Tautulli Base URL
-        show_key: Rating Key der Serie
-        last_season: Aktuelle Staffelnummer
-        last_episode: Aktuelle Episodennummer
-        max_episodes: Maximale Anzahl zu findender Episoden
+def predictive_warmup_task(peak_hour: int):
+    """Scheduler-Task: Warm-up vor einer vorhergesagten Spitze."""
+    _run_in_new_loop(viewing_predictor.warmup(peak_hour))
 
-    Returns:
-        Liste der Dateipfade für nächste Episoden
-    """
-    episodes = []
 
-    logger.debug(f"Suche nächste Episoden: show_key={show_key}, S{last_season:02d}E{last_episode:02d}")
+# --- CACHE EFFECTIVENESS ---
 
-    try:
-        # Hole alle Staffeln der Serie
-        resp = await client.get(
-            f"{base_url}/api/v2",
-            params={
-                "apikey": config.tautulli_api_key,
-                "cmd": "get_children_metadata",
-                "rating_key": show_key
-            }
-        )
+# Anteil des Heads, der für eine Probe resident sein muss (beim Start hat
+# der Server selbst schon die ersten MB gelesen)
+WARM_HEAD_FRACTION = 0.9
 
-        if resp.status_code != 200:
-            logger.warning(f"Tautulli API Fehler: Status {resp.status_code}")
-            return episodes
 
-        data = resp.json()
+class EffectivenessTracker:
+    """
+    Misst, ob gestartete Wiedergaben beim Start gewärmt waren.
+
+    Starts kommen aus Webhook/Notifications (media.play), dem Live-Monitoring
+    und der Tautulli-Historie; derselbe Start aus mehreren Kanälen zählt
+    einmal. Maßgeblich ist das Ledger: war die Datei vor dem Start gewärmt
+    und noch resident, ist der Start ein Treffer der Quelle bzw. Strategie,
+    die sie gewärmt hat. Ohne Ledger-Eintrag prüft eine mincore-Probe den
+    Head, aber nur bei zeitnaher Erkennung: hat die Wiedergabe den Head
+    schon gelesen, wäre er ohnehin resident, die Evidenz ist dann
+    "unknown". Bei der Historie ist der damalige Zustand nie prüfbar.
+    Ausgewertet wird die Trefferquote je Quelle und Tag.
+
+    Neue Starts werden gesammelt und alle SAVE_INTERVAL Sekunden (Scheduler)
+    sowie beim Beenden gespeichert.
+    """
 
-        if data.get("response", {}).get("result") != "success":
-            logger.warning(f"Tautulli API Fehler: {data.get('response', {}).get('message', 'Unknown')}")
-            return episodes
+    MATCH_WINDOW = 900  # Sekunden, in denen Starts desselben Titels zusammenfallen
+    PROBE_MAX_DELAY = 5  # Sekunden nach dem Start, bis zu denen die Probe aussagekräftig ist
+    SAVE_INTERVAL = 60
 
-        seasons = data.get("response", {}).get("data", {}).get("children_list", [])
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self.history_imported_at: float = 0
+        self._index: Dict[str, List[float]] = {}  # rating_key bzw. Pfad -> Startzeiten
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
 
-        # WICHTIG: Sortiere Staffeln nach Nummer!
-        seasons_sorted = sorted(seasons, key=lambda x: int(x.get("media_index", 0) or 0))
-        logger.debug(f"Gefundene Staffeln: {len(seasons_sorted)} (sortiert)")
+    def _known(self, key: str, started: float) -> bool:
+        return any(abs(ts - started) < self.MATCH_WINDOW for ts in self._index.get(key, []))
 
-        # Konvertiere last_season und last_episode zu int (falls String)
-        last_season = int(last_season) if last_season else 0
-        last_episode = int(last_episode) if last_episode else 0
+    def _warm_state(self, filepath: Optional[str], started: float, probe: bool) -> Dict[str, Any]:
+        """
+        Warm-Zustand einer Datei zum Startzeitpunkt (Ledger, sonst Probe).
 
-        for season in seasons_sorted:
-            # Konvertiere zu int (API kann Strings zurückgeben)
-            season_num = int(season.get("media_index", 0) or 0)
+        warmed_by nennt die Quelle laut Ledger, auch wenn die Datei erst nach
+        dem Start gewärmt oder schon wieder verdrängt wurde (Fehlschlag der Quelle).
+        """
+        entry = preload_ledger.entry(filepath) if filepath else None
+        warmed_by = entry["source"] if entry else ""
+        if entry and entry["warmed_at"] <= started and entry.get("resident", 0) > 0:
+            return {"warm": True, "source": entry["source"], "warmed_by": warmed_by, "evidence": "ledger"}
+
+        if warmed_by:
+            return {"warm": False, "source": "", "warmed_by": warmed_by, "evidence": "ledger"}
+
+        if probe and filepath and time.time() - started > self.PROBE_MAX_DELAY:
+            return {"warm": False, "source": "", "warmed_by": "", "evidence": "unknown"}
+
+        if probe and filepath and os.path.exists(filepath):
+            head = min(config.get_current_preload_size() * 1024 * 1024, os.path.getsize(filepath))
+            resident = probe_resident_bytes(filepath, 0, head)
+            if resident is not None and head > 0:
+                warm = resident >= head * WARM_HEAD_FRACTION
+                return {"warm": warm, "source": "page_cache" if warm else "", "warmed_by": "", "evidence": "probe"}
+
+        # Historie ohne Ledger-Eintrag: damaliger Zustand nicht prüfbar
+        evidence = "none" if not filepath else "ledger" if probe else "unknown"
+        return {"warm": False, "source": "", "warmed_by": "", "evidence": evidence}
+
+    def record_play(self, filepath: Optional[str], channel: str, rating_key: str = "",
+                    user: str = "", started: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Hält einen Wiedergabestart mit seinem Warm-Zustand fest.
 
-            # Überspringe frühere Staffeln
-            if season_num < last_season:
-                continue
+        Args:
+            filepath: Container-Pfad der Datei (None wenn nicht auflösbar).
+            channel: webhook, live oder history.
+            rating_key: Plex rating_key (zum Zusammenführen der Kanäle).
+            started: Startzeitpunkt (Standard: jetzt).
 
-            # Hole Episoden dieser Staffel
-            season_key = season.get("rating_key")
-            season_resp = await client.get(
-                f"{base_url}/api/v2",
-                params={
-                    "apikey": config.tautulli_api_key,
-                    "cmd": "get_children_metadata",
-                    "rating_key": season_key
-                }
+        Returns:
+            Das Ereignis oder None, wenn der Start schon bekannt ist.
+        """
+        started = started or time.time()
+        key = rating_key or filepath
+        if not key:
+            return None
+        with self._lock:
+            if self._known(key, started):
+                return None
+            self._index.setdefault(key, []).append(started)
+
+        event = {
+            "ts": started,
+            "file": filepath or "",
+            "rating_key": rating_key,
+            "user": user,
+            "channel": channel,
+            **self._warm_state(filepath, started, probe=channel != "history"),
+        }
+        with self._lock:
+            self.events.append(event)
+            self._dirty = True
+
+        METRIC_PLAY_STARTS.inc(source=event["source"] or "none", result="hit" if event["warm"] else "miss")
+        if channel != "history":
+            logger.info(
+                f"📈 Start {os.path.basename(filepath) if filepath else rating_key}: "
+                f"{'warm (' + event['source'] + ')' if event['warm'] else 'kalt'} [{channel}]"
             )
+        return event
+
+    def import_history(self, rows: List[Dict[str, Any]]) -> int:
+        """Ergänzt Starts aus Tautulli-Historienzeilen (bekannte werden übersprungen)."""
+        cutoff = time.time() - config.effectiveness_retention_days * 86400
+        added = 0
+        for row in rows:
+            started = _to_int(row.get("started") or row.get("date"))
+            rating_key = str(row.get("rating_key") or "")
+            if started < cutoff or not rating_key:
+                continue
+            item = library_snapshot.items.get(rating_key)
+            filepath = path_resolver.resolve(item.file) if item and item.file else None
+            user = row.get("friendly_name") or row.get("user") or ""
+            if self.record_play(filepath, "history", rating_key, user, started):
+                added += 1
+        return added
+
+    async def import_tautulli_history(self):
+        """Holt die Historie seit dem letzten Import (höchstens 7 Tage) und ergänzt Starts."""
+        if not config.tautulli_url or not config.tautulli_api_key:
+            return
+        since = max(self.history_imported_at, time.time() - 7 * 86400)
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            rows = await fetch_tautulli_history(client, config.tautulli_url.rstrip('/'), since)
+        added = await asyncio.to_thread(self.import_history, rows)
+        self.history_imported_at = time.time()
+        await asyncio.to_thread(self.save)
+        if added:
+            logger.info(f"📈 Wirksamkeit: {added} Starts aus der Tautulli-Historie ergänzt")
+
+    def report(self, days: int = 30) -> Dict[str, Any]:
+        """
+        Trefferquote gesamt, je Quelle und je Tag für die letzten days Tage.
 
-            if season_resp.status_code != 200:
+        Starts ohne aussagekräftigen Zustand (Evidenz "unknown", kein
+        auflösbarer Pfad) zählen als Wiedergaben, aber in keinem Nenner. Die
+        Quote einer Quelle ist der Anteil der Starts ihrer gewärmten Dateien,
+        die beim Start warm waren.
+        """
+        since = time.time() - days * 86400
+        with self._lock:
+            events = [e for e in self.events if e["ts"] >= since]
+
+        def ratio(hits: int, plays: int) -> Optional[float]:
+            return round(hits / plays, 3) if plays else None
+
+        def count(bucket: Dict[str, Any], event: Dict[str, Any]):
+            bucket["plays"] += 1
+            bucket["hits"] += 1 if event["warm"] else 0
+
+        known = [e for e in events if e.get("evidence") not in ("unknown", "none")]
+        hits = [e for e in known if e["warm"]]
+        daily: Dict[str, Dict[str, Any]] = {}
+        sources: Dict[str, Dict[str, Any]] = {}
+        channels: Dict[str, int] = {}
+        for event in sorted(events, key=lambda e: e["ts"]):
+            day = datetime.fromtimestamp(event["ts"]).strftime("%Y-%m-%d")
+            bucket = daily.setdefault(day, {"date": day, "plays": 0, "checked": 0, "hits": 0, "by_source": {}})
+            bucket["plays"] += 1
+            channels[event["channel"]] = channels.get(event["channel"], 0) + 1
+            if event.get("evidence") in ("unknown", "none"):
                 continue
+            bucket["checked"] += 1
+            bucket["hits"] += 1 if event["warm"] else 0
+            # Ältere Ereignisse ohne warmed_by: nur Treffer sind zuordenbar
+            name = event.get("warmed_by") or event["source"]
+            if name:
+                count(sources.setdefault(name, {"plays": 0, "hits": 0}), event)
+                count(bucket["by_source"].setdefault(name, {"plays": 0, "hits": 0}), event)
+
+        # Was jede Quelle gerade an RAM belegt (Kosten ihrer Treffer)
+        held = preload_ledger.by_source()
+        for name in set(sources) | set(held):
+            source = sources.setdefault(name, {"plays": 0, "hits": 0})
+            source.update(held.get(name, {"files": 0, "resident_mb": 0.0}))
+            source["hit_ratio"] = ratio(source["hits"], source["plays"])
+            source["mb_per_hit"] = round(source["resident_mb"] / source["hits"], 1) if source["hits"] else None
+        for bucket in daily.values():
+            bucket["hit_ratio"] = ratio(bucket["hits"], bucket["checked"])
+            for values in bucket["by_source"].values():
+                values["hit_ratio"] = ratio(values["hits"], values["plays"])
+
+        return {
+            "days": days,
+            "plays": len(events),
+            "checked": len(known),
+            "hits": len(hits),
+            "hit_ratio": ratio(len(hits), len(known)) or 0.0,
+            "channels": channels,
+            "sources": dict(sorted(sources.items(), key=lambda x: -x[1]["hits"])),
+            "daily": list(daily.values()),
+            "recent": events[-20:][::-1],
+        }
 
-            ep_data = season_resp.json()
-            eps = ep_data.get("response", {}).get("data", {}).get("children_list", [])
+    def _load(self):
+        """Lädt die Ereignisse aus der JSON-Datei."""
+        if not os.path.exists(EFFECTIVENESS_FILE):
+            return
+        try:
+            with open(EFFECTIVENESS_FILE, 'r') as f:
+                data = json.load(f)
+            self.events = data.get("events", [])
+            self.history_imported_at = data.get("history_imported_at", 0)
+            for event in self.events:
+                self._index.setdefault(event["rating_key"] or event["file"], []).append(event["ts"])
+        except Exception as e:
+            logger.error(f"Effectiveness load error: {e}")
 
-            # WICHTIG: Sortiere Episoden nach Nummer!
-            eps_sorted = sorted(eps, key=lambda x: int(x.get("media_index", 0) or 0))
-            logger.debug(f"Staffel {season_num}: {len(eps_sorted)} Episoden (sortiert)")
+    def flush(self):
+        """Speichert, falls seit der letzten Sicherung Starts hinzukamen."""
+        if self._dirty:
+            self.save()
 
-            for ep in eps_sorted:
-                # Konvertiere zu int
-                ep_num = int(ep.get("media_index", 0) or 0)
+    def save(self):
+        """Speichert die Ereignisse (ältere als die Aufbewahrungsdauer fallen heraus)."""
+        cutoff = time.time() - config.effectiveness_retention_days * 86400
+        try:
+            with self._lock:
+                self._dirty = False
+                self.events = [e for e in self.events if e["ts"] >= cutoff]
+                self._index = {}
+                for event in self.events:
+                    self._index.setdefault(event["rating_key"] or event["file"], []).append(event["ts"])
+                data = {"history_imported_at": self.history_imported_at, "events": list(self.events)}
+            os.makedirs(os.path.dirname(EFFECTIVENESS_FILE), exist_ok=True)
+            with open(EFFECTIVENESS_FILE, 'w') as f:
+                json.dump(data, f)
+        except Exception as e:
+            logger.error(f"Effectiveness save error: {e}")
 
-                # Nur Folgen nach der aktuell geschauten
-                if season_num == last_season and ep_num <= last_episode:
-                    continue
 
-                # Finde Dateipfad
-                file_path = await _find_media_file(client, base_url, ep.get("rating_key"))
-                if file_path:
-                    logger.debug(f"Gefunden: S{season_num:02d}E{ep_num:02d} -> {file_path}")
-                    episodes.append(file_path)
-                    if len(episodes) >= max_episodes:
-                        return episodes
+effectiveness_tracker = EffectivenessTracker()
 
-    except Exception as e:
-        logger.warning(f"Fehler beim Finden nächster Episoden: {e}")
 
-    return episodes
+def effectiveness_history_task():
+    """Scheduler-Task: Starts aus der Tautulli-Historie ergänzen."""
+    async def run():
+        try:
+            await effectiveness_tracker.import_tautulli_history()
+        except Exception as e:
+            logger.error(f"Effectiveness history import error: {e}")
+    _run_in_new_loop(run())
 
 
-# --- LIVE ACTIVITY MONITORING ---
+# --- CANDIDATE SCORING ---
 
-async def fetch_current_activity() -> List[Dict[str, Any]]:
-    """
-    Holt aktuell laufende Wiedergaben von Tautulli.
+# Gewicht je Signal: Start-Wahrscheinlichkeit, wenn das Signal voll ausgeprägt ist
+SCORE_WEIGHTS = {
+    "streak": 0.7,     # User schaut die Serie gerade regelmäßig
+    "on_deck": 0.5,    # Plex On Deck
+    "added": 0.3,      # Kürzlich hinzugefügt
+    "released": 0.2,   # Kürzlich erschienen
+    "popular": 0.3,    # Oft und kürzlich gesehen
+    "mtime": 0.05,     # Datei kürzlich geändert (z.B. durch den Mover)
+    "source": 0.3,     # Eigene Bewertung einer Kandidatenquelle (Plugins)
+}
 
-    Returns:
-        Liste von aktiven Serien-Wiedergaben mit Show-Info.
+
+class CandidateScorer:
+    """
+    Bewertet Kandidaten eines Laufs mit einer erwarteten Start-Wahrscheinlichkeit.
+
+    Die Signale stammen aus der Tautulli-Historie (Serien-Streaks je User),
+    On Deck, dem Bibliotheks-Snapshot (Hinzufüge-/Release-Alter,
+    Wiedergabezahl, letzte Wiedergabe; ohne Snapshot ersatzweise die Position
+    in den Strategie-Listen), den Bewertungen der Kandidatenquellen und dem
+    Datei-Alter. Sie werden als unabhängig kombiniert (p = 1 - Π(1 - w·s)).
+    Bereits residente Anteile bringen keinen Nutzen, sortiert wird nach
+    p·(1 - Residenz) pro gewärmtem Byte.
     """
-    sessions = []
 
-    if not config.tautulli_enabled or not config.tautulli_url or not config.tautulli_api_key:
-        return sessions
+    def __init__(self):
+        self.ranking: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def _decay(age_days: float, half_life_days: float) -> float:
+        return 0.5 ** (max(age_days, 0.0) / half_life_days)
+
+    def _streaks(self, now: float) -> Dict[str, float]:
+        """Stärke laufender Serien-Streaks je Show-Key und Serientitel (kleingeschrieben)."""
+        days: Dict[tuple, set] = {}
+        last: Dict[tuple, float] = {}
+        for user, rows in viewing_predictor.recent.items():
+            for row in rows:
+                started = _to_int(row.get("started") or row.get("date"))
+                if row.get("media_type") != "episode" or now - started > 7 * 86400:
+                    continue
+                key = (user, str(row.get("grandparent_rating_key") or ""), str(row.get("grandparent_title") or "").lower())
+                days.setdefault(key, set()).add(datetime.fromtimestamp(started).date())
+                last[key] = max(last.get(key, 0), started)
+
+        streaks: Dict[str, float] = {}
+        for key, watched_days in days.items():
+            strength = min(1.0, len(watched_days) / 3) * self._decay((now - last[key]) / 86400, 3)
+            for show in key[1:]:
+                if show:
+                    streaks[show] = max(streaks.get(show, 0.0), strength)
+        return streaks
+
+    def signals(self, candidate: Dict[str, Any], item: Optional[LibraryItem],
+                streaks: Dict[str, float], now: float) -> Dict[str, float]:
+        """Ermittelt die Signale (0..1) eines Kandidaten."""
+        signals: Dict[str, float] = {}
+        lists = candidate["lists"]
+        if "on_deck" in lists:
+            signals["on_deck"] = 1.0
+
+        show_key = ""
+        if item:
+            show_key = item.show_key or (item.rating_key if item.media_type == "show" else "")
+        folders = [p.lower() for p in _split_path(candidate["path"])[:-1]]
+        streak = max([streaks.get(show_key, 0.0)] + [streaks.get(f, 0.0) for f in folders])
+        if streak:
+            signals["streak"] = streak
+
+        if item:
+            if item.added_at:
+                signals["added"] = self._decay((now - item.added_at) / 86400, 14)
+            if item.originally_available_at:
+                try:
+                    released = datetime.strptime(item.originally_available_at[:10], "%Y-%m-%d").timestamp()
+                    signals["released"] = self._decay((now - released) / 86400, 30)
+                except ValueError:
+                    pass
+            if item.play_count and item.last_played:
+                signals["popular"] = (1 - 0.5 ** (item.play_count / 3)) * self._decay((now - item.last_played) / 86400, 30)
 
-    base_url = config.tautulli_url.rstrip('/')
+        scores = candidate.get("scores") or {}
+        if scores:
+            signals["source"] = min(max(max(scores.values()), 0.0), 1.0)
+
+        # Ohne Snapshot-Daten: Position in den Strategie-Listen
+        for key, position in lists.items():
+            for prefix, signal in (("recent_", "released"), ("added_", "added"), ("watched_", "popular")):
+                if key.startswith(prefix):
+                    signals.setdefault(signal, 1.0 - position)
 
-    async with httpx.AsyncClient(timeout=15.0) as client:
         try:
-            resp = await client.get(
-                f"{base_url}/api/v2",
-                params={
-                    "apikey": config.tautulli_api_key,
-                    "cmd": "get_activity"
-                }
-            )
+            signals["mtime"] = self._decay((now - os.path.getmtime(candidate["path"])) / 86400, 7)
+        except OSError:
+            pass
+        return signals
+
+    def _score(self, candidate: Dict[str, Any], item: Optional[LibraryItem],
+               streaks: Dict[str, float], now: float, head_mb: int):
+        signals = self.signals(candidate, item, streaks, now)
+        miss = 1.0
+        for name, strength in signals.items():
+            miss *= 1 - SCORE_WEIGHTS[name] * strength
+        probability = 1 - miss
+
+        ranges = preload_ranges(candidate["path"], head_mb, config.preload_tail_mb)
+        size = sum(r[1] for r in ranges)
+        resident = sum(probe_resident_bytes(candidate["path"], *r) or 0 for r in ranges)
+        resident_share = resident / size if size else 1.0
+
+        candidate.update(
+            score=round(probability, 4),
+            signals={k: round(v, 3) for k, v in signals.items()},
+            resident=round(resident_share, 2),
+            bytes=size,
+            size=os.path.getsize(candidate["path"]),
+            value_per_mb=probability * (1 - resident_share) / max(size / (1024**2), 1)
+        )
 
-            if resp.status_code == 200:
-                data = resp.json()
-                if data.get("response", {}).get("result") == "success":
-                    activity = data.get("response", {}).get("data", {})
-                    for session in activity.get("sessions", []):
-                        # Nur Serien-Episoden sind interessant
-                        if session.get("media_type") == "episode":
-                            sessions.append({
-                                "show_key": session.get("grandparent_rating_key"),
-                                "show_title": session.get("grandparent_title"),
-                                "season": int(session.get("parent_media_index", 1)),
-                                "episode": int(session.get("media_index", 1)),
-                                "user": session.get("friendly_name", "Unknown")
-                            })
-
-                    if sessions:
-                        logger.info(f"Live Activity: {len(sessions)} Serien-Streams aktiv")
+    async def rank(self, candidates: List[Dict[str, Any]], head_mb: int) -> List[Dict[str, Any]]:
+        """
+        Bewertet die Kandidaten und gibt sie nach Nutzen pro Byte sortiert zurück.
 
-        except Exception as e:
-            logger.debug(f"Activity fetch error: {e}")
+        Kandidaten, deren Datei inzwischen fehlt oder nicht lesbar ist, fallen heraus.
+        """
+        if config.tautulli_url and config.tautulli_api_key:
+            try:
+                await viewing_predictor.ensure_fresh()
+            except Exception as e:
+                logger.warning(f"Scoring: Historie nicht verfügbar ({e})")
+
+        now = time.time()
+        streaks = self._streaks(now)
+        by_filename = library_snapshot.by_filename()
+
+        def match(path: str) -> Optional[LibraryItem]:
+            # Dateiname als Vorfilter, zugeordnet wird über den vollen Pfad
+            for item in by_filename.get(os.path.basename(path), []):
+                if path_resolver.resolve(item.file) == path:
+                    return item
+            return None
+
+        def score_all() -> List[Dict[str, Any]]:
+            scored = []
+            for candidate in candidates:
+                try:
+                    self._score(candidate, match(candidate["path"]), streaks, now, head_mb)
+                except OSError as e:
+                    logger.debug(f"Scoring: {candidate['path']} übersprungen ({e})")
+                    continue
+                scored.append(candidate)
+            return scored
 
-    return sessions
+        candidates = await asyncio.to_thread(score_all)
+        ranked = sorted(candidates, key=lambda c: c["value_per_mb"], reverse=True)
+        self.ranking = [dict(c) for c in ranked]
+        return ranked
 
 
-async def preload_next_episodes_for_session(session: Dict[str, Any]) -> int:
+candidate_scorer = CandidateScorer()
+
+
+# --- PRELOAD PLAN OPTIMISER ---
+
+# Größenstufen: (Name, Head-Faktor, mit Tail, Anteil abgedeckter Starts)
+WARM_TIERS = [
+    ("head", 1, False, 0.8),       # Start ohne Nachladen, Spulen ans Ende/Index kann haken
+    ("head_tail", 1, True, 0.95),  # Zusätzlich Index/Cues am Dateiende
+    ("extended", 2, True, 1.0),    # Längerer Puffer für langsame Platten
+]
+
+
+def _tier_bytes(size: int, head_mb: int, tail_mb: int) -> int:
+    """Bytes, die eine Stufe liest (Überlappung von Head und Tail nur einmal)."""
+    head = min(size, head_mb * 1024 * 1024)
+    tail = min(size, tail_mb * 1024 * 1024)
+    return size if tail and size - tail <= head else head + tail
+
+
+def optimise_plan(candidates: List[Dict[str, Any]], budget_bytes: int,
+                  head_mb: int, tail_mb: int) -> Dict[str, Any]:
     """
-    Lädt die nächsten Episoden einer laufenden Serie in den Cache.
+    Wählt je Kandidat eine Größenstufe (keine, Head, Head+Tail, erweiterter Head).
+
+    Maximiert die erwarteten Start-Treffer (Score · Anteil abgedeckter Starts
+    · nicht residenter Anteil) im Byte-Budget. Greedy über die Inkremente der
+    oberen konvexen Hülle je Datei (Multiple-Choice-Knapsack), O(n log n).
 
     Args:
-        session: Session-Info mit show_key, season, episode.
+        candidates: Bewertete Kandidaten (CandidateScorer.rank).
+        budget_bytes: Verfügbares Budget.
+        head_mb/tail_mb: Basisgrößen.
 
     Returns:
-        Anzahl der geladenen Episoden.
+        Plan mit den gewählten Stufen und Kennzahlen.
     """
-    if not config.tautulli_url or not config.tautulli_api_key:
-        return 0
+    started = time.perf_counter()
+    increments = []  # (Nutzen pro Byte, Kandidat, Schritt, Kosten, Nutzen, Stufe)
+    for idx, candidate in enumerate(candidates):
+        size = candidate.get("size", 0)
+        gain = candidate.get("score", 0.0) * (1 - candidate.get("resident", 0.0))
+        if not size or gain <= 0:
+            continue
 
-    base_url = config.tautulli_url.rstrip('/')
-    loaded_count = 0
+        hull = [(0, 0.0, None)]
+        for tier in sorted(
+            ((_tier_bytes(size, head_mb * factor, tail_mb if with_tail else 0), gain * share, name, factor, with_tail)
+             for name, factor, with_tail, share in WARM_TIERS),
+            key=lambda t: t[0]
+        ):
+            cost, value = tier[0], tier[1]
+            if cost <= hull[-1][0] or value <= hull[-1][1]:
+                continue
+            # Punkte entfernen, die unter der Verbindung zum neuen Punkt liegen
+            while len(hull) >= 2:
+                (c0, v0, _), (c1, v1, _) = hull[-2], hull[-1]
+                if (v1 - v0) * (cost - c0) <= (value - v0) * (c1 - c0):
+                    hull.pop()
+                else:
+                    break
+            hull.append((cost, value, tier))
+
+        for step in range(1, len(hull)):
+            d_cost = hull[step][0] - hull[step - 1][0]
+            d_value = hull[step][1] - hull[step - 1][1]
+            increments.append((d_value / d_cost, idx, step, d_cost, d_value, hull[step][2]))
+
+    increments.sort(key=lambda inc: inc[0], reverse=True)
+    chosen: Dict[int, tuple] = {}  # Kandidat -> (Schritt, Stufe)
+    used = 0
+    expected = 0.0
+    for _, idx, step, d_cost, d_value, tier in increments:
+        # Stufen einer Datei nur in Reihenfolge (vorherige muss gewählt sein)
+        if chosen.get(idx, (0, None))[0] != step - 1 or used + d_cost > budget_bytes:
+            continue
+        chosen[idx] = (step, tier)
+        used += d_cost
+        expected += d_value
+
+    items = []
+    for idx, (_, (cost, value, name, factor, with_tail)) in sorted(chosen.items()):
+        items.append({
+            "path": candidates[idx]["path"],
+            "tier": name,
+            "head_mb": head_mb * factor,
+            "tail_mb": tail_mb if with_tail else 0,
+            "bytes": cost,
+            "expected_hits": round(value, 4),
+        })
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            next_eps = await _find_next_episodes(
-                client,
-                base_url,
-                session["show_key"],
-                session["season"],
-                session["episode"]
-            )
+    tiers = {name: 0 for name, *_ in WARM_TIERS}
+    for item in items:
+        tiers[item["tier"]] += 1
+    return {
+        "budget_mb": round(budget_bytes / (1024**2), 1),
+        "used_mb": round(used / (1024**2), 1),
+        "expected_hits": round(expected, 3),
+        "candidates": len(candidates),
+        "tiers": {"none": len(candidates) - len(items), **tiers},
+        "items": items,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def plan_budget_bytes() -> int:
+    """Budget für den Knapsack-Plan (0 = keine Optimierung)."""
+    return (config.plan_budget_mb or config.preload_budget_mb) * 1024 * 1024
+
+
+# Letzter berechneter Plan (für die API)
+last_preload_plan: Dict[str, Any] = {}
+
+
+# --- PRELOAD WORK QUEUE ---
+
+class WorkQueue:
+    """
+    Zentrale Prioritäts-Warteschlange für alle Preload-Quellen.
+
+    Live-Sessions, Webhooks/Notifications, manuelle Preloads und die
+    Kandidaten eines Preload-Laufs (Strategien, On Deck, Dateisystem) landen
+    hier. Ein einzelner Worker auf dem Haupt-Loop arbeitet sie nach
+    Priorität ab; bereits eingereihte Pfade werden zusammengeführt (höchste
+    Priorität gewinnt). Zwischen zwei Chunks des Head-Reads weicht ein
+    Eintrag jedem Eintrag höherer Priorität und wird später fortgesetzt.
+    Die Warteschlange wird in WORK_QUEUE_FILE gespeichert und übersteht
+    Neustarts.
+    """
+
+    CHUNK_SIZE = 8 * 1024 * 1024
+
+    def __init__(self):
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._waiters: Dict[str, List[concurrent.futures.Future]] = {}
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._dirty = False
+        self._saved_at = 0  # processed-Stand der letzten Ledger-Sicherung
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.current: Optional[str] = None
+        self.stats = {"processed": 0, "deduplicated": 0, "preempted": 0, "dropped": 0}
+        self._load()
+
+    def enqueue(self, filepath: str, priority: float, source: str, rank: float = 0.0,
+                head_mb: Optional[int] = None, tail_mb: Optional[int] = None) -> concurrent.futures.Future:
+        """
+        Reiht eine Datei ein (thread-sicher).
 
-            # Limitiere auf konfigurierte Anzahl
-            next_eps = next_eps[:config.live_episodes_to_preload]
+        Args:
+            filepath: Container-Pfad der Datei.
+            priority: Prioritätsklasse (PRIORITY_*), höher = früher.
+            source: Quelle (live, play, manual, tautulli, on_deck, filesystem).
+            rank: Reihenfolge innerhalb der Klasse (0 = zuerst, < 1).
+            head_mb/tail_mb: Zu lesende Bereiche (Standard: aktuelle Preload-Größe).
 
-            preload_size = config.get_current_preload_size()
+        Returns:
+            Future mit dem Ergebnis {"status", "duration_ms"}.
+        """
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        head_mb = config.get_current_preload_size() if head_mb is None else head_mb
+        tail_mb = config.preload_tail_mb if tail_mb is None else tail_mb
 
-            if not next_eps:
-                logger.info(f"Live-Monitoring: Keine nächsten Episoden gefunden für '{session['show_title']}'")
+        with self._lock:
+            item = self._items.get(filepath)
+            if item:
+                self.stats["deduplicated"] += 1
+                if (priority, -rank) > (item["priority"], -item["rank"]):
+                    item["priority"], item["rank"] = priority, rank
+                item["head_mb"] = max(item["head_mb"], head_mb)
+                item["tail_mb"] = max(item["tail_mb"], tail_mb)
+                if source not in item["sources"]:
+                    item["sources"].append(source)
             else:
-                logger.info(f"Live-Monitoring: {len(next_eps)} Episoden gefunden für '{session['show_title']}'")
+                self._seq += 1
+                self._items[filepath] = {
+                    "path": filepath,
+                    "priority": priority,
+                    "rank": rank,
+                    "seq": self._seq,
+                    "sources": [source],
+                    "head_mb": head_mb,
+                    "tail_mb": tail_mb,
+                    "offset": 0,
+                    "head_ms": 0.0,
+                    "admitted": False,
+                    "enqueued_at": time.time(),
+                }
+            self._waiters.setdefault(filepath, []).append(future)
+            self._dirty = True
 
-                for filepath in next_eps:
-                    filename = os.path.basename(filepath)
+        if self._loop and self._wakeup:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return future
 
-                    if not os.path.exists(filepath):
-                        logger.warning(f"Live-Monitoring: Datei nicht gefunden: {filepath}")
-                        continue
+    @staticmethod
+    def _order(item: Dict[str, Any]) -> tuple:
+        return (-item["priority"], item["rank"], item["seq"])
 
-                    # Prüfe ob schon gecached
-                    duration = read_file_chunk(filepath, 1)  # Quick check
-                    if duration < config.cache_threshold_ms:
-                        logger.info(f"⚡ Live-Cache: {filename} (bereits im Cache)")
-                        continue
+    def _next(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if not self._items:
+                return None
+            return min(self._items.values(), key=self._order)
+
+    def _outranked(self, item: Dict[str, Any]) -> bool:
+        """Prüft ob ein Eintrag höherer Prioritätsklasse wartet."""
+        with self._lock:
+            return any(other["priority"] > item["priority"] for other in self._items.values())
+
+    def _complete(self, filepath: str, result: Dict[str, Any]):
+        with self._lock:
+            self._items.pop(filepath, None)
+            waiters = self._waiters.pop(filepath, [])
+            self._dirty = True
+        for future in waiters:
+            if not future.done():
+                future.set_result(result)
+
+    def drop_below(self, priority: float, status: str) -> int:
+        """Verwirft alle Einträge unterhalb einer Prioritätsklasse."""
+        with self._lock:
+            dropped = [p for p, item in self._items.items() if item["priority"] < priority]
+        for filepath in dropped:
+            self._complete(filepath, {"status": status, "duration_ms": 0})
+        self.stats["dropped"] += len(dropped)
+        return len(dropped)
+
+    async def run(self):
+        """Worker: arbeitet die Warteschlange auf dem aktuellen Loop ab."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        while True:
+            # Vor der Prüfung zurücksetzen, nicht erst vor wait(): enqueue()
+            # kann aus einem anderen Thread zwischen _next() und clear()
+            # set() auslösen, das clear() danach verwerfen würde. Dann
+            # schliefe der Worker mit wartendem Eintrag bis zum nächsten Enqueue.
+            self._wakeup.clear()
+            if self._dirty:
+                await asyncio.to_thread(self.save)
+            item = self._next()
+            if item is None:
+                if self.stats["processed"] != self._saved_at:
+                    self._saved_at = self.stats["processed"]
+                    await asyncio.to_thread(preload_ledger.save)
+                await self._wakeup.wait()
+                continue
 
-                    # Preload - höchste Priorität!
-                    logger.info(f"📦 Live-Preload: {filename} (User: {session['user']})")
-                    read_file_chunk(filepath, preload_size)
-                    read_file_chunk(filepath, config.preload_tail_mb, offset_from_end=True)
-                    loaded_count += 1
-                    logger.info(f"✅ Live-Preload fertig: {filename}")
+            self.current = item["path"]
+            try:
+                result = await self._process(item)
+            except Exception as e:
+                logger.error(f"Work queue error for {item['path']}: {e}")
+                result = {"status": "error", "duration_ms": 0}
+            finally:
+                self.current = None
+
+            if result is not None:
+                self.stats["processed"] += 1
+                self._complete(item["path"], result)
+
+    async def _process(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Wärmt einen Eintrag (Head in Chunks, danach ggf. Tail).
+
+        Returns:
+            Ergebnis oder None, wenn der Eintrag verdrängt wurde.
+        """
+        filepath = item["path"]
+        filename = os.path.basename(filepath)
+        if not os.path.exists(filepath):
+            return {"status": "missing", "duration_ms": 0}
+        if state.is_running:
+            state.current_action = f"Checking: {filename}"
+
+        # Ledger-Wert: Klasse abzüglich Rang innerhalb der Klasse
+        value = item["priority"] - item["rank"] * 10
+        ranges = preload_ranges(filepath, item["head_mb"], item["tail_mb"])
+
+        if not item["admitted"]:
+            urgent = item["priority"] >= PRIORITY_PLAY
+            if not await memory_governor.wait_for_headroom("Preload", max_wait=0 if urgent else None):
+                if not urgent:
+                    self.drop_below(PRIORITY_MANUAL, "memory")
+                return {"status": "memory", "duration_ms": 0}
+            if not await asyncio.to_thread(preload_ledger.ensure_room, filepath, sum(r[1] for r in ranges), value):
+                return {"status": "budget", "duration_ms": 0}
+            item["admitted"] = True
+
+        head_bytes = min(item["head_mb"] * 1024 * 1024, os.path.getsize(filepath))
+        disk = disk_label(filepath)
+        source = item["sources"][0]
+        while item["offset"] < head_bytes:
+            if self._outranked(item):
+                self.stats["preempted"] += 1
+                logger.debug(f"Queue: {filename} pausiert (höhere Priorität wartet)")
+                return None
+            start_t = time.perf_counter()
+            read = await asyncio.to_thread(
+                read_file_range, filepath, item["offset"], min(self.CHUNK_SIZE, head_bytes - item["offset"])
+            )
+            elapsed = time.perf_counter() - start_t
+            item["head_ms"] += elapsed * 1000
+            METRIC_READ_SECONDS.observe(elapsed, disk=disk)
+            METRIC_BYTES_WARMED.inc(read, source=source, disk=disk)
+            if not read:
+                break
+            item["offset"] += read
+
+        cached = head_bytes > 0 and item["head_ms"] < config.cache_threshold_ms
+        METRIC_CACHE_CHECKS.inc(result="hit" if cached else "miss")
+        if item["head_ms"] > 0:
+            METRIC_READ_THROUGHPUT.observe(item["offset"] / (1024**2) / (item["head_ms"] / 1000), disk=disk)
+        read_bytes, read_ms = item["offset"], item["head_ms"]
+        if not cached and item["tail_mb"]:
+            tail_bytes = min(item["tail_mb"] * 1024 * 1024, os.path.getsize(filepath))
+            read_ms += await asyncio.to_thread(read_file_chunk, filepath, item["tail_mb"], True)
+            read_bytes += tail_bytes
+            METRIC_BYTES_WARMED.inc(tail_bytes, source=source, disk=disk)
+        await asyncio.to_thread(preload_ledger.record, filepath, ranges, value, item["sources"][0])
+        logger.info(
+            f"{'Cached' if cached else 'Loaded'}: {filename} ({item['head_ms']:.2f}ms, {item['sources'][0]})",
+            extra={"event": "cached" if cached else "loaded", "file": filename, "duration_ms": round(item["head_ms"], 2)}
+        )
+
+        return {
+            "status": "cached" if cached else "loaded",
+            "duration_ms": round(item["head_ms"], 2),
+            "bytes": read_bytes,
+            "read_ms": round(read_ms, 2),
+        }
 
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Eingereihte Einträge in Abarbeitungsreihenfolge."""
+        with self._lock:
+            items = sorted(self._items.values(), key=self._order)
+            return [
+                {
+                    "path": i["path"],
+                    "priority": i["priority"],
+                    "sources": list(i["sources"]),
+                    "progress_mb": round(i["offset"] / (1024**2), 1),
+                    "active": i["path"] == self.current,
+                }
+                for i in items
+            ]
+
+    def _load(self):
+        """Lädt die gespeicherte Warteschlange (Fortschritt beginnt neu)."""
+        if not os.path.exists(WORK_QUEUE_FILE):
+            return
+        try:
+            with open(WORK_QUEUE_FILE, 'r') as f:
+                for item in json.load(f):
+                    item.update(offset=0, head_ms=0.0, admitted=False)
+                    self._items[item["path"]] = item
+                    self._seq = max(self._seq, item["seq"])
         except Exception as e:
-            logger.warning(f"Live-Monitoring Error: {e}")
+            logger.error(f"Work queue load error: {e}")
 
-    return loaded_count
+    def save(self):
+        """Speichert die Warteschlange in die JSON-Datei."""
+        try:
+            with self._lock:
+                items = list(self._items.values())
+                self._dirty = False
+            os.makedirs(os.path.dirname(WORK_QUEUE_FILE), exist_ok=True)
+            with open(WORK_QUEUE_FILE, 'w') as f:
+                json.dump(items, f)
+        except Exception as e:
+            logger.error(f"Work queue save error: {e}")
 
 
-async def live_monitoring_task():
+work_queue = WorkQueue()
+
+
+# --- CANDIDATE SOURCES ---
+
+class CandidateSource:
     """
-    Hintergrund-Task der regelmäßig aktive Streams prüft
-    und nächste Episoden preloaded.
+    Eine registrierte Kandidatenquelle.
+
+    generate(settings) ist ein Async-Generator und liefert Kandidaten als
+    Dicts: path (Container-Pfad), optional score (0..1, Einschätzung der
+    Quelle), list (Liste innerhalb der Quelle, Standard = Quellenname) und
+    meta (Zusatzinfos für Ranking und Anzeige).
     """
-    while True:
-        try:
-            if config.live_monitoring_enabled and config.tautulli_enabled:
-                sessions = await fetch_current_activity()
 
-                for session in sessions:
-                    # Prüfe RAM vor jedem Preload
-                    if psutil.virtual_memory().percent > config.ram_max_usage_percent:
-                        logger.warning("Live-Monitoring: RAM-Limit erreicht, pausiere")
-                        break
+    def __init__(self, name: str, generate, priority: float, defaults):
+        self.name = name
+        self.generate = generate
+        self.priority = priority
+        self.defaults = defaults  # Callable -> Standard-Einstellungen aus der Config
+        self.last_run: Dict[str, Any] = {}
 
-                    loaded = await preload_next_episodes_for_session(session)
-                    if loaded > 0:
-                        logger.info(
-                            f"Live-Preload für '{session['show_title']}' "
-                            f"S{session['season']:02d}E{session['episode']:02d}: "
-                            f"{loaded} Episoden gecached"
-                        )
+    def settings(self) -> Dict[str, Any]:
+        """Standardwerte der Quelle, überschrieben durch config.candidate_sources[name]."""
+        settings = {"enabled": True, "timeout_seconds": config.candidate_source_timeout_seconds}
+        settings.update(self.defaults())
+        settings.update(config.candidate_sources.get(self.name, {}))
+        return settings
 
-        except Exception as e:
-            logger.debug(f"Live monitoring error: {e}")
 
-        # Warte bis zum nächsten Check
-        await asyncio.sleep(config.live_check_interval_seconds)
+# Name -> Quelle (Registrierungs-Reihenfolge = Reihenfolge bei gleicher Priorität)
+candidate_sources: Dict[str, CandidateSource] = {}
 
 
-# --- PLEX API CLIENT ---
+def register_candidate_source(name: str, priority: float = PRIORITY_STRATEGY, defaults=None):
+    """
+    Dekorator: registriert einen Async-Generator als Kandidatenquelle.
 
-async def fetch_plex_on_deck() -> List[str]:
+    Beispiel (Plugin unter /config/plugins/favorites.py):
+
+        from app.main import register_candidate_source
+
+        @register_candidate_source("favorites", priority=55, defaults=lambda: {"count": 10})
+        async def favorites(settings):
+            for path in load_favorites()[:settings["count"]]:
+                yield {"path": path, "score": 0.8, "meta": {"reason": "favorite"}}
     """
-    Holt 'On Deck' (Continue Watching) Inhalte von Plex.
+    def decorator(generate):
+        candidate_sources[name] = CandidateSource(name, generate, priority, defaults or dict)
+        return generate
+    return decorator
+
+
+async def _drain_source(source: CandidateSource, settings: Dict[str, Any], found: List[Dict[str, Any]]):
+    """Sammelt die Kandidaten einer Quelle (bei Abbruch bleibt das Bisherige erhalten)."""
+    generator = source.generate(settings)
+    try:
+        async for candidate in generator:
+            if candidate.get("path"):
+                found.append(candidate)
+    finally:
+        await generator.aclose()
+
+
+async def collect_candidates(timer: Optional[StageTimer] = None,
+                             names: Optional[List[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Führt alle aktiven Kandidatenquellen parallel aus.
+
+    Jede Quelle hat ein eigenes Zeitlimit; bei Überschreitung oder Fehler
+    werden die bis dahin gelieferten Kandidaten übernommen.
+
+    Args:
+        timer: Erfasst die Dauer je Quelle (Stage source:<name>).
+        names: Nur diese Quellen ausführen (Standard: alle).
 
     Returns:
-        Liste von Dateipfaden.
+        Quellenname -> Kandidaten, absteigend nach Priorität der Quelle.
     """
-    files = []
+    timer = timer or StageTimer()
+    active = []
+    for source in candidate_sources.values():
+        settings = source.settings()
+        if settings.get("enabled") and (names is None or source.name in names):
+            active.append((source, settings))
+    active.sort(key=lambda x: x[0].priority, reverse=True)
+    found: Dict[str, List[Dict[str, Any]]] = {source.name: [] for source, _ in active}
+
+    async def run(source: CandidateSource, settings: Dict[str, Any]):
+        status = "ok"
+        started = time.perf_counter()
+        try:
+            with timer.stage(f"source:{source.name}"):
+                await asyncio.wait_for(
+                    _drain_source(source, settings, found[source.name]), settings["timeout_seconds"] or None
+                )
+        except asyncio.TimeoutError:
+            status = "timeout"
+            logger.warning(
+                f"Candidate source {source.name}: Zeitlimit ({settings['timeout_seconds']}s) erreicht, "
+                f"{len(found[source.name])} Kandidaten übernommen"
+            )
+        except Exception as e:
+            status = "error"
+            logger.error(f"Candidate source {source.name} error: {e}")
+        source.last_run = {
+            "status": status,
+            "candidates": len(found[source.name]),
+            "ms": int((time.perf_counter() - started) * 1000),
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
 
-    if not config.plex_enabled or not config.plex_url or not config.plex_token:
-        return files
+    await asyncio.gather(*(run(source, settings) for source, settings in active))
+    return found
 
-    base_url = config.plex_url.rstrip('/')
-    headers = {
-        "X-Plex-Token": config.plex_token,
-        "Accept": "application/json"
-    }
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
+def load_candidate_source_plugins():
+    """Lädt Plugins (*.py in PLUGIN_DIR), die sich per register_candidate_source registrieren."""
+    if not os.path.isdir(PLUGIN_DIR):
+        return
+    for filename in sorted(os.listdir(PLUGIN_DIR)):
+        if not filename.endswith(".py"):
+            continue
+        before = set(candidate_sources)
         try:
-            # On Deck Endpoint
-            resp = await client.get(
-                f"{base_url}/library/onDeck",
-                headers=headers
+            spec = importlib.util.spec_from_file_location(
+                f"preloader_plugin_{filename[:-3]}", os.path.join(PLUGIN_DIR, filename)
             )
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        except Exception as e:
+            logger.error(f"Plugin {filename} error: {e}")
+            continue
+        added = sorted(set(candidate_sources) - before)
+        logger.info(f"Plugin {filename} geladen: {', '.join(added) or 'keine neuen Quellen'}")
 
-            if resp.status_code == 200:
-                data = resp.json()
-                items = data.get("MediaContainer", {}).get("Metadata", [])
 
-                for item in items:
-                    # Hole Mediendaten
-                    for media in item.get("Media", []):
-                        for part in media.get("Part", []):
-                            if "file" in part:
-                                files.append(part["file"])
+def _register_strategy(name: str, count_prefix: str):
+    """Registriert eine Caching-Strategie (Filme, dann Serien) als Kandidatenquelle."""
+    _, prefix, label = STRATEGIES[name]
 
-                logger.info(f"Plex On Deck: {len(files)} files found")
+    def defaults() -> Dict[str, Any]:
+        return {
+            "enabled": getattr(config, f"cache_{name}") and (config.tautulli_enabled or config.library_sync_enabled),
+            "movies": getattr(config, f"{count_prefix}_movies_count"),
+            "shows": getattr(config, f"{count_prefix}_shows_count"),
+            "backend": getattr(config, f"cache_{name}_backend"),
+        }
 
-        except Exception as e:
-            logger.error(f"Plex API error: {e}")
+    @register_candidate_source(name, PRIORITY_STRATEGY, defaults)
+    async def generate(settings: Dict[str, Any]):
+        counts = {}
+        for media_type, key in (("movie", "movies"), ("show", "shows")):
+            paths = await fetch_strategy(name, media_type, settings[key], settings["backend"])
+            counts[key] = len(paths)
+            for path in paths:
+                yield {"path": path, "list": f"{prefix}_{key}"}
+        logger.info(f"{label}: {counts['movies']} Filme, {counts['shows']} Serien")
 
-    return files
+
+_register_strategy("recent_releases", "cache_recent")
+_register_strategy("most_watched", "cache_most_watched")
+_register_strategy("recently_added", "cache_recently_added")
+
+
+@register_candidate_source("on_deck", PRIORITY_ON_DECK, lambda: {"enabled": config.plex_enabled})
+async def on_deck_source(settings: Dict[str, Any]):
+    """Plex On Deck (Continue Watching)."""
+    for plex_path in await fetch_plex_on_deck():
+        yield {"path": path_resolver.resolve(plex_path)}
+
+
+@register_candidate_source("filesystem", PRIORITY_SCAN, lambda: {"max_files": config.max_files_per_run})
+async def filesystem_source(settings: Dict[str, Any]):
+    """Dateisystem-Scan: Priority-Pfade zuerst, danach die neuesten Dateien."""
+    fs_files = await asyncio.to_thread(discover_files)
+    fs_files.sort(key=lambda x: (x[0], -x[1]))
+    for _, _, path in fs_files[:settings["max_files"]]:
+        yield {"path": path}
 
 
 # --- PRELOAD LOGIC ---
@@ -1215,6 +5245,7 @@ def discover_files() -> List[tuple]:
     files = []
     min_size_bytes = config.min_size_mb * 1024 * 1024
     scanned_count = 0
+    scan_started = time.perf_counter()
 
     def scan_path(path: str, priority: int = 0):
         nonlocal scanned_count
@@ -1255,10 +5286,53 @@ def discover_files() -> List[tuple]:
     for path in config.video_paths:
         scan_path(path, priority=100)
 
+    METRIC_SCAN_SECONDS.observe(time.perf_counter() - scan_started)
+    METRIC_FILES_SCANNED.inc(scanned_count)
     logger.info(f"Filesystem scan: {len(files)} video files found ({scanned_count} total scanned)")
     return files
 
 
+async def _sample_ram(trajectory: List[float], interval: float = 5):
+    """Zeichnet die RAM-Auslastung während eines Laufs auf."""
+    while True:
+        trajectory.append(memory_governor.usage()["percent"])
+        await asyncio.sleep(interval)
+
+
+def history_items(candidates: List[Dict[str, Any]], results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Datei-Einträge eines Laufs für den History-Store."""
+    return [
+        {
+            "file": os.path.basename(c["path"]), "path": c["path"], "source": c["strategy"],
+            "status": r["status"], "bytes": r.get("bytes", 0), "read_ms": r.get("read_ms", 0),
+            "disk": disk_label(c["path"]),
+        }
+        for c, r in zip(candidates, results)
+    ]
+
+
+def _add_candidates(candidates: Dict[str, Dict[str, Any]], found: List[Dict[str, Any]], source: CandidateSource):
+    """
+    Fügt die Kandidaten einer Quelle hinzu und merkt sich ihre relative Position
+    je Liste, die Bewertung der Quelle und ihre Metadaten.
+    """
+    lists: Dict[str, List[Dict[str, Any]]] = {}
+    for item in found:
+        lists.setdefault(item.get("list") or source.name, []).append(item)
+
+    for list_key, items in lists.items():
+        for i, item in enumerate(items):
+            candidate = candidates.setdefault(item["path"], {
+                "path": item["path"], "priority": source.priority, "source": source.name,
+                "strategy": source.name, "lists": {}, "scores": {}, "meta": {}
+            })
+            candidate["lists"].setdefault(list_key, i / len(items))
+            if item.get("score") is not None:
+                candidate["scores"].setdefault(source.name, float(item["score"]))
+            if item.get("meta"):
+                candidate["meta"].setdefault(source.name, item["meta"])
+
+
 async def run_preload(source: str = "manual"):
     """
     Führt den Preload-Prozess aus.
@@ -1266,61 +5340,69 @@ async def run_preload(source: str = "manual"):
     Args:
         source: Quelle des Aufrufs (manual, scheduler, webhook).
     """
-    global state, config
+    global state, config, last_preload_plan
 
     if state.is_running:
-        logger.warning("Preload already running, skipping.")
+        # Trigger während eines Laufs werden zu einem Folgelauf zusammengefasst
+        state.rerun_requested = source
+        logger.info(f"Preload already running, {source} trigger queued as follow-up run.")
         return
 
     state.is_running = True
     state.current_action = "Starting Preload..."
     stats = {"preloaded": 0, "skipped": 0, "start_time": time.time(), "files": []}
+    timer = StageTimer()
+    ram_trajectory: List[float] = []
+    ram_sampler = asyncio.create_task(_sample_ram(ram_trajectory))
 
     logger.info(f"Starting Preload Run (source: {source})")
 
     try:
-        # RAM Check
-        mem = psutil.virtual_memory()
-        if mem.percent > config.ram_max_usage_percent:
-            logger.warning(f"RAM usage high ({mem.percent}%), aborting.")
-            state.current_action = f"Aborted: RAM High ({mem.percent}%)"
+        # Speicherdruck prüfen (cgroup v2 / PSI, sonst Host-RAM)
+        if not await memory_governor.wait_for_headroom("Preload"):
+            state.current_action = f"Aborted: Memory pressure ({memory_governor.last_verdict['reason']})"
             return
 
-        # Sammle Dateien aus verschiedenen Quellen
-        files_to_check: List[str] = []
-
-        # 1. Tautulli-Daten (höchste Priorität) - alle aktiven Strategien
-        if config.tautulli_enabled:
-            state.current_action = "Fetching Tautulli data..."
-            tautulli_data = await fetch_tautulli_data()
-            # Alle Strategien hinzufügen (Duplikate werden später gefiltert)
-            files_to_check.extend(tautulli_data.get("recent_movies", []))
-            files_to_check.extend(tautulli_data.get("recent_shows", []))
-            files_to_check.extend(tautulli_data.get("watched_movies", []))
-            files_to_check.extend(tautulli_data.get("watched_shows", []))
-            files_to_check.extend(tautulli_data.get("added_movies", []))
-            files_to_check.extend(tautulli_data.get("added_shows", []))
-
-        # 2. Plex On Deck
-        if config.plex_enabled:
-            state.current_action = "Fetching Plex On Deck..."
-            plex_files = await fetch_plex_on_deck()
-            files_to_check.extend(plex_files)
-
-        # 3. Filesystem-Scan
-        state.current_action = "Scanning filesystem..."
-        fs_files = discover_files()
-        # Sortieren: erst nach Priorität, dann nach mtime (neueste zuerst)
-        fs_files.sort(key=lambda x: (x[0], -x[1]))
-        files_to_check.extend([f[2] for f in fs_files])
-
-        # Duplikate entfernen (behalte Reihenfolge)
-        seen = set()
-        unique_files = []
-        for f in files_to_check:
-            if f not in seen and os.path.exists(f):
-                seen.add(f)
-                unique_files.append(f)
+        # Sammle Dateien aus verschiedenen Quellen (Pfad -> Kandidat, Reihenfolge bleibt erhalten)
+        candidates: Dict[str, Dict[str, Any]] = {}
+
+        # 1. Bibliotheks-Snapshot aktualisieren (Grundlage der Strategien)
+        if config.library_sync_enabled:
+            state.current_action = "Syncing library..."
+            with timer.stage("library_sync"):
+                await sync_library()
+
+        # 2. Alle aktiven Quellen parallel (Strategien, On Deck, Dateisystem, Plugins);
+        # zusammengeführt nach Priorität der Quelle, Duplikate behalten die erste
+        state.current_action = "Collecting candidates..."
+        found = await collect_candidates(timer)
+        for name, items in found.items():
+            _add_candidates(candidates, items, candidate_sources[name])
+
+        with timer.stage("dedup"):
+            unique_files = [c for c in candidates.values() if os.path.exists(c["path"])]
+        for c in unique_files:
+            METRIC_CANDIDATES.inc(source=c["source"])
+
+        # Nach erwartetem Nutzen pro gewärmtem Byte ordnen (sonst feste Quellen-Reihenfolge)
+        preload_size = config.get_current_preload_size()
+        if config.candidate_scoring_enabled:
+            state.current_action = f"Scoring {len(unique_files)} candidates..."
+            with timer.stage("score"):
+                unique_files = await candidate_scorer.rank(unique_files, preload_size)
+            for c in unique_files:
+                c["priority"] = PRIORITY_STRATEGY
+
+            # Größenstufen je Datei im Budget optimieren
+            if plan_budget_bytes():
+                with timer.stage("plan"):
+                    last_preload_plan = optimise_plan(unique_files, plan_budget_bytes(), preload_size, config.preload_tail_mb)
+                tiers = {item["path"]: item for item in last_preload_plan["items"]}
+                unique_files = [dict(c, **tiers[c["path"]]) for c in unique_files if c["path"] in tiers]
+                logger.info(
+                    f"Plan: {len(unique_files)} files, {last_preload_plan['used_mb']}/{last_preload_plan['budget_mb']} MB, "
+                    f"{last_preload_plan['expected_hits']} expected hits ({last_preload_plan['elapsed_ms']}ms)"
+                )
 
         # Limitieren
         unique_files = unique_files[:config.max_files_per_run]
@@ -1328,30 +5410,29 @@ async def run_preload(source: str = "manual"):
         state.current_action = f"Processing {len(unique_files)} candidates..."
         logger.info(f"Found {len(unique_files)} files to check")
 
-        # Zeitbasierte Preload-Größe
-        preload_size = config.get_current_preload_size()
-
-        for filepath in unique_files:
-            filename = os.path.basename(filepath)
-            state.current_action = f"Checking: {filename}"
-
-            # Preload Head
-            duration = read_file_chunk(filepath, preload_size)
+        # In die zentrale Warteschlange einreihen (Live/Webhook gehen vor)
+        with timer.stage("warm"):
+            futures = [
+                work_queue.enqueue(
+                    c["path"], c["priority"], c["strategy"], rank=i / len(unique_files),
+                    head_mb=c.get("head_mb", preload_size), tail_mb=c.get("tail_mb")
+                )
+                for i, c in enumerate(unique_files)
+            ]
+            results = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
 
-            if duration < config.cache_threshold_ms:
+        for c, result in zip(unique_files, results):
+            if result["status"] == "cached":
                 stats["skipped"] += 1
-                logger.info(f"Cached: {filename} ({duration:.2f}ms)")
-            else:
+            elif result["status"] == "loaded":
                 stats["preloaded"] += 1
-                stats["files"].append(filename)
-                logger.info(f"Loaded: {filename} ({duration:.2f}ms)")
-                # Preload Tail
-                read_file_chunk(filepath, config.preload_tail_mb, offset_from_end=True)
-
-            # RAM-Check während des Laufs
-            if psutil.virtual_memory().percent > config.ram_max_usage_percent:
-                logger.warning("RAM limit reached during preload, stopping.")
-                break
+                stats["files"].append(os.path.basename(c["path"]))
+
+        statuses = [r["status"] for r in results]
+        if "budget" in statuses:
+            logger.info(f"Preload budget exhausted ({config.preload_budget_mb} MB) for {statuses.count('budget')} files.")
+        if "memory" in statuses:
+            logger.warning(f"Memory pressure: {statuses.count('memory')} files not preloaded.")
 
         # Stats aktualisieren
         duration_secs = int(time.time() - stats["start_time"])
@@ -1364,6 +5445,12 @@ async def run_preload(source: str = "manual"):
             "last_run": time.strftime("%Y-%m-%d %H:%M:%S")
         }
 
+        # Bytes, Durchsatz und langsamste Dateien
+        bytes_read = sum(r.get("bytes", 0) for r in results)
+        read_secs = sum(r.get("read_ms", 0) for r in results) / 1000
+        slowest = sorted(zip(unique_files, results), key=lambda x: x[1].get("read_ms", 0), reverse=True)[:5]
+        ram_trajectory.append(memory_governor.usage()["percent"])
+
         # Historie speichern
         history_entry = PreloadHistoryEntry(
             timestamp=time.strftime("%Y-%m-%d %H:%M:%S"),
@@ -1371,9 +5458,17 @@ async def run_preload(source: str = "manual"):
             skipped=stats["skipped"],
             duration_seconds=duration_secs,
             source=source,
-            files_processed=stats["files"][:20]  # Max 20 Dateien speichern
+            files_processed=stats["files"][:20],  # Max 20 Dateien speichern
+            stages=timer.stages,
+            bytes_read=bytes_read,
+            mb_per_s=round(bytes_read / (1024**2) / read_secs, 1) if read_secs else 0.0,
+            slowest_files=[
+                {"file": os.path.basename(c["path"]), "ms": r["read_ms"], "mb": round(r["bytes"] / (1024**2), 1)}
+                for c, r in slowest if r.get("read_ms")
+            ],
+            ram_trajectory=ram_trajectory[::max(1, len(ram_trajectory) // 30)]
         )
-        state.add_history_entry(history_entry)
+        state.add_history_entry(history_entry, history_items(unique_files, results))
 
         logger.info(f"Preload finished: {stats['preloaded']} loaded, {stats['skipped']} cached, {duration_secs}s")
 
@@ -1381,9 +5476,14 @@ async def run_preload(source: str = "manual"):
         logger.error(f"Preload task error: {e}")
         state.current_action = f"Error: {e}"
     finally:
+        ram_sampler.cancel()
         state.current_action = "Idle"
         state.is_running = False
 
+    if state.rerun_requested:
+        follow_up, state.rerun_requested = state.rerun_requested, None
+        await run_preload(follow_up)
+
 
 def preload_task():
     """Synchroner Wrapper für run_preload (für Background-Tasks)."""
@@ -1406,6 +5506,226 @@ def scheduled_preload_task():
     finally:
         loop.close()
 
+# --- PRELOAD JOBS ---
+
+# Höchstens so viele Dateien je Job, abgeschlossene Jobs im Speicher
+JOB_MAX_FILES = 2000
+JOB_HISTORY = 50
+
+
+class PreloadJobRequest(BaseModel):
+    """Batch-Preload: Pfade/Verzeichnisse/Glob-Muster und Rating Keys."""
+    paths: List[str] = []
+    rating_keys: List[str] = []
+    head_mb: Optional[int] = None  # Standard: aktuelle Preload-Größe
+    tail_mb: Optional[int] = None
+
+
+def expand_job_path(target: str, limit: int = JOB_MAX_FILES) -> List[str]:
+    """
+    Löst einen Job-Eintrag zu Video-Dateien auf.
+
+    Existierende Pfade gelten wörtlich (auch mit [ ] im Namen), sonst werden
+    Glob-Muster (*, ?, [ ], auch **) expandiert. Verzeichnisse werden rekursiv
+    durchsucht; exclude_patterns gelten dabei, nicht für einzelne Dateien.
+    Die Suche endet nach limit Dateien.
+    """
+    if os.path.exists(target) or not any(ch in target for ch in "*?["):
+        matches = iter([target])
+    else:
+        matches = glob.iglob(target, recursive=True)
+
+    files = []
+    for match in matches:
+        if len(files) >= limit:
+            break
+        if os.path.isdir(match):
+            for root, dirs, filenames in os.walk(match):
+                dirs.sort()
+                for filename in sorted(filenames):
+                    full_path = os.path.join(root, filename)
+                    if is_video_file(filename, config.video_extensions) and not matches_exclude_pattern(full_path, config.exclude_patterns):
+                        files.append(full_path)
+                        if len(files) >= limit:
+                            return files
+        elif os.path.isfile(match) and is_video_file(match, config.video_extensions):
+            if match == target or not matches_exclude_pattern(match, config.exclude_patterns):
+                files.append(match)
+    return files
+
+
+async def expand_rating_key(client: httpx.AsyncClient, rating_key: str) -> List[str]:
+    """
+    Löst einen Rating Key zu Container-Pfaden auf (Plex wenn konfiguriert,
+    sonst Tautulli). Serien und Staffeln werden zu allen Episoden.
+    """
+    if _resolve_backend("plex") == "plex":
+        base_url = config.plex_url.rstrip('/')
+        container = await _plex_get(client, base_url, f"/library/metadata/{rating_key}")
+        entries = (container or {}).get("Metadata", [])
+        if not entries:
+            return []
+        if entries[0].get("type") in ("show", "season"):
+            # allLeaves liefert für Serien und Staffeln alle Episoden
+            return await _plex_find_next_episodes(client, base_url, rating_key, 0, 0, JOB_MAX_FILES)
+        plex_path = _plex_media_path(entries[0])
+        file_path = path_resolver.resolve(plex_path) if plex_path else None
+        return [file_path] if file_path else []
+
+    if not config.tautulli_url or not config.tautulli_api_key:
+        return []
+    base_url = config.tautulli_url.rstrip('/')
+    metadata = await _fetch_metadata(client, base_url, rating_key)
+    media_type = metadata.get("media_type")
+    if media_type == "show":
+        return await _find_next_episodes(client, base_url, rating_key, 0, 0, JOB_MAX_FILES)
+    if media_type == "season":
+        data = await _tautulli_get(client, base_url, "get_children_metadata", rating_key=rating_key)
+        episodes = sorted((data or {}).get("children_list", []), key=lambda ep: _to_int(ep.get("media_index")))
+        files = [await _find_media_file(client, base_url, ep.get("rating_key")) for ep in episodes]
+        return [f for f in files if f]
+    plex_path = _extract_media_path(metadata)
+    file_path = path_resolver.resolve(plex_path) if plex_path else None
+    return [file_path] if file_path else []
+
+
+class PreloadJobManager:
+    """
+    Asynchrone Batch-Preloads (z.B. eine ganze Staffel vor dem Besuch).
+
+    Ein Job löst seine Einträge zu Dateien auf und reiht sie als manuelle
+    Preloads in die zentrale Warteschlange ein. Dort gelten Budget und
+    Speicher-Governor, Live-Wiedergaben gehen vor. Fortschritt und Ergebnis
+    werden je Datei geführt. Am Ende wird der Job in die Historie
+    geschrieben (Quelle "job").
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._tasks: set = set()
+
+    def create(self, request: PreloadJobRequest) -> Dict[str, Any]:
+        """Legt einen Job an und startet ihn im Hintergrund."""
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "status": "resolving",
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "finished": None,
+            "request": request.model_dump(),
+            "errors": [],
+            "items": [],
+        }
+        self.jobs[job["id"]] = job
+        # Nur die letzten JOB_HISTORY Jobs behalten (laufende nie verwerfen)
+        for job_id in [j["id"] for j in self.jobs.values() if j["status"] == "done"][:-JOB_HISTORY]:
+            del self.jobs[job_id]
+
+        task = asyncio.create_task(self._run(job, request))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _resolve(self, job: Dict[str, Any], request: PreloadJobRequest) -> List[Dict[str, Any]]:
+        items: Dict[str, Dict[str, Any]] = {}
+        for target in request.paths:
+            remaining = JOB_MAX_FILES - len(items)
+            if remaining <= 0:
+                job["errors"].append({"input": target, "error": f"Skipped, job limit of {JOB_MAX_FILES} files reached"})
+                continue
+            files = await asyncio.to_thread(expand_job_path, target, remaining)
+            if not files:
+                job["errors"].append({"input": target, "error": "No video files found"})
+            for path in files:
+                items.setdefault(path, {"path": path, "input": target, "status": "queued"})
+
+        if request.rating_keys:
+            async with httpx.AsyncClient(timeout=60.0) as client:
+                for rating_key in request.rating_keys:
+                    try:
+                        files = await expand_rating_key(client, str(rating_key))
+                    except Exception as e:
+                        logger.error(f"Job {job['id']}: rating key {rating_key} error: {e}")
+                        files = []
+                    if not files:
+                        job["errors"].append({"input": rating_key, "error": "No files found"})
+                    for path in files:
+                        items.setdefault(path, {"path": path, "input": rating_key, "status": "queued"})
+        return list(items.values())[:JOB_MAX_FILES]
+
+    async def _run(self, job: Dict[str, Any], request: PreloadJobRequest):
+        started = time.time()
+        try:
+            job["items"] = await self._resolve(job, request)
+            job["status"] = "running"
+            logger.info(f"Preload job {job['id']}: {len(job['items'])} files queued")
+
+            async def track(item: Dict[str, Any], rank: float):
+                future = work_queue.enqueue(
+                    item["path"], PRIORITY_MANUAL, "job", rank=rank,
+                    head_mb=request.head_mb, tail_mb=request.tail_mb
+                )
+                result = await asyncio.wrap_future(future)
+                item.update(
+                    status=result["status"], duration_ms=result.get("duration_ms", 0),
+                    bytes=result.get("bytes", 0), read_ms=result.get("read_ms", 0)
+                )
+
+            total = len(job["items"])
+            await asyncio.gather(*(track(item, i / total) for i, item in enumerate(job["items"])))
+        except Exception as e:
+            logger.error(f"Preload job {job['id']} error: {e}")
+            job["errors"].append({"input": None, "error": str(e)})
+        finally:
+            job["status"] = "done"
+            job["finished"] = time.strftime("%Y-%m-%d %H:%M:%S")
+
+        done = [item for item in job["items"] if item["status"] != "queued"]
+        loaded = [os.path.basename(item["path"]) for item in done if item["status"] == "loaded"]
+        state.add_history_entry(PreloadHistoryEntry(
+            timestamp=job["finished"],
+            preloaded=len(loaded),
+            skipped=sum(1 for item in done if item["status"] == "cached"),
+            duration_seconds=int(time.time() - started),
+            source="job",
+            files_processed=loaded[:20],
+            bytes_read=sum(item.get("bytes", 0) for item in done)
+        ), history_items([dict(item, strategy="job") for item in done], done))
+        logger.info(f"Preload job {job['id']} finished: {len(loaded)} loaded, {len(done) - len(loaded)} other")
+
+    def summary(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Status eines Jobs ohne Einträge (Anzahl je Status, Fortschritt)."""
+        counts: Dict[str, int] = {}
+        for item in job["items"]:
+            counts[item["status"]] = counts.get(item["status"], 0) + 1
+        total = len(job["items"])
+        return {
+            "id": job["id"],
+            "status": job["status"],
+            "created": job["created"],
+            "finished": job["finished"],
+            "total": total,
+            "done": total - counts.get("queued", 0),
+            "counts": counts,
+            "bytes": sum(item.get("bytes", 0) for item in job["items"]),
+            "errors": job["errors"],
+        }
+
+    def detail(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Status eines Jobs mit Fortschritt je Datei (aus der Warteschlange)."""
+        queued = {entry["path"]: entry for entry in work_queue.snapshot()}
+        items = []
+        for item in job["items"]:
+            entry = dict(item)
+            if item["status"] == "queued" and item["path"] in queued:
+                entry["progress_mb"] = queued[item["path"]]["progress_mb"]
+                entry["active"] = queued[item["path"]]["active"]
+            items.append(entry)
+        return dict(self.summary(job), request=job["request"], items=items)
+
+
+preload_jobs = PreloadJobManager()
+
+
 # --- SCHEDULER MANAGEMENT ---
 
 def setup_scheduler():
@@ -1428,20 +5748,59 @@ def setup_scheduler():
         except Exception as e:
             logger.error(f"Invalid cron schedule: {e}")
 
+    if config.predictive_enabled:
+        scheduler.add_job(
+            predictive_refresh_task,
+            trigger=IntervalTrigger(hours=1),
+            id="predictive_refresh_job",
+            next_run_time=datetime.now(),
+            replace_existing=True
+        )
+        logger.info("Predictive warm-up enabled")
+
+    scheduler.add_job(
+        history_store.compact,
+        trigger=IntervalTrigger(hours=24),
+        id="history_compact_job",
+        next_run_time=datetime.now(),
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        effectiveness_tracker.flush,
+        trigger=IntervalTrigger(seconds=EffectivenessTracker.SAVE_INTERVAL),
+        id="effectiveness_save_job",
+        replace_existing=True
+    )
+
+    if config.effectiveness_history_import and config.tautulli_url and config.tautulli_api_key:
+        scheduler.add_job(
+            effectiveness_history_task,
+            trigger=IntervalTrigger(hours=1),
+            id="effectiveness_history_job",
+            replace_existing=True
+        )
+
 
 # --- APP LIFECYCLE ---
 
 # Globaler Task-Handle für Live-Monitoring
 _live_monitoring_task_handle: Optional[asyncio.Task] = None
+# Worker der Preload-Warteschlange
+_work_queue_task_handle: Optional[asyncio.Task] = None
+# Stats-Push für SSE-Abonnenten (läuft nur, solange jemand verbunden ist)
+_stats_ticker_handle: Optional[asyncio.Task] = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifecycle-Manager für FastAPI App."""
-    global _live_monitoring_task_handle
+    global _live_monitoring_task_handle, _work_queue_task_handle
 
     # Startup
     logger.info("Video Preloader starting...")
+    load_candidate_source_plugins()
+    _work_queue_task_handle = asyncio.create_task(work_queue.run())
     setup_scheduler()
     if not scheduler.running:
         scheduler.start()
@@ -1466,6 +5825,14 @@ async def lifespan(app: FastAPI):
             pass
         logger.info("Live-Monitoring gestoppt")
 
+    _work_queue_task_handle.cancel()
+    try:
+        await _work_queue_task_handle
+    except asyncio.CancelledError:
+        pass
+    work_queue.save()
+    effectiveness_tracker.flush()
+
     scheduler.shutdown()
 
 
@@ -1525,19 +5892,83 @@ async def set_language(lang: str = Query("de"), redirect: str = Query("/")):
     return RedirectResponse(url=redirect, status_code=303)
 
 
-@app.get("/api/stats")
-async def get_stats():
-    """Gibt aktuelle System-Statistiken als JSON zurück."""
+@app.get("/metrics")
+async def get_metrics():
+    """Gibt die Metriken im Prometheus-Textformat zurück."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+def stats_snapshot() -> Dict[str, Any]:
+    """Aktuelle System-Statistiken (für /api/stats und den SSE-Stream)."""
     mem = get_ram_usage()
-    return JSONResponse({
+    return {
         "ram_percent": mem['percent'],
         "ram_text": f"{mem['available']} available",
         "status": state.current_action,
         "is_running": state.is_running,
         "last_run": state.last_run_stats,
         "scheduler_enabled": config.scheduler_enabled,
-        "next_run": _get_next_run_time()
-    })
+        "next_run": _get_next_run_time(),
+        "upstream": upstream_flight.stats,
+        "notifications": {
+            "connected": plex_notifications.connected,
+            "events": plex_notifications.events,
+            "reconnects": plex_notifications.reconnects
+        },
+        "readahead_mb": round(playhead_readahead.bytes_read / (1024**2), 1),
+        "budget": preload_ledger.stats(),
+        "memory": memory_governor.stats(),
+        "queue": {"queued": len(work_queue.snapshot()), "active": work_queue.current, **work_queue.stats}
+    }
+
+
+@app.get("/api/stats")
+async def get_stats():
+    """Gibt aktuelle System-Statistiken als JSON zurück."""
+    return JSONResponse(stats_snapshot())
+
+
+async def stats_ticker_task(interval: float = 2):
+    """Schickt Stats-Snapshots an die SSE-Abonnenten (nur bei Änderung, endet ohne Abonnenten)."""
+    last = stats_snapshot()
+    while True:
+        await asyncio.sleep(interval)
+        if not event_bus.subscribers:
+            break
+        snapshot = stats_snapshot()
+        if snapshot != last:
+            event_bus.publish("stats", snapshot)
+            last = snapshot
+
+
+@app.get("/api/events")
+async def stream_events():
+    """
+    Server-Sent Events für das Dashboard statt Polling.
+
+    Events: status (Laufstatus), stats (wie /api/stats, nur bei Änderung),
+    log und history (fertiges HTML). Direkt nach dem Verbinden kommt ein
+    aktueller Stats-Snapshot.
+    """
+    async def stream():
+        global _stats_ticker_handle
+        queue = event_bus.subscribe()
+        try:
+            if not _stats_ticker_handle or _stats_ticker_handle.done():
+                _stats_ticker_handle = asyncio.create_task(stats_ticker_task())
+            yield EventBus.frame("stats", stats_snapshot())
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            event_bus.unsubscribe(queue)
+
+    return StreamingResponse(
+        stream(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 def _get_next_run_time() -> Optional[str]:
@@ -1552,115 +5983,31 @@ def _get_next_run_time() -> Optional[str]:
 
 
 @app.get("/api/logs")
-async def get_logs():
+async def get_logs(limit: int = Query(20)):
     """
-    Gibt die letzten 20 Log-Zeilen formatiert als HTML zurück.
+    Gibt die letzten Log-Einträge aus dem Ring-Puffer zurück.
 
-    Formatierung:
-    - Zeitstempel in grau
-    - INFO in blau, WARNING in gelb, ERROR in rot
-    - Dateinamen hervorgehoben
-    - Zeiten in grün
+    Returns:
+        records (strukturiert), logs (Text wie in der Log-Datei) und html.
     """
-    raw_logs = read_log_tail(LOG_FILE, num_lines=20)
-    if not raw_logs:
-        return {"logs": "", "html": "<div class='text-gray-500'>Keine Logs vorhanden...</div>"}
-
-    import re
-    formatted_lines = []
-
-    for line in raw_logs.split('\n'):
-        if not line.strip():
-            continue
-
-        # Parse: 2025-12-02 19:06:45 - INFO - Message
-        match = re.match(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) - (\w+) - (.*)$', line)
-
-        if match:
-            timestamp, level, message = match.groups()
-
-            # Level-Farben
-            level_colors = {
-                'INFO': 'text-blue-400',
-                'WARNING': 'text-yellow-400',
-                'ERROR': 'text-red-400',
-                'DEBUG': 'text-gray-500'
-            }
-            level_class = level_colors.get(level, 'text-gray-400')
-
-            # Icons für verschiedene Nachrichten
-            icon = ""
-            msg_class = "text-gray-300"
-
-            if "Loaded:" in message:
-                icon = "📦 "
-                # Extrahiere Dateiname und Zeit
-                file_match = re.match(r'Loaded: (.+) \((\d+\.\d+)ms\)', message)
-                if file_match:
-                    filename, duration = file_match.groups()
-                    message = f'<span class="text-white">{filename}</span> <span class="text-emerald-400">({duration}ms)</span>'
-                    icon = "📦 "
-            elif "Skipped:" in message or "cached" in message.lower():
-                icon = "⚡ "
-                msg_class = "text-emerald-400"
-            elif "Preload finished" in message:
-                icon = "✅ "
-                msg_class = "text-emerald-400 font-semibold"
-            elif "Starting Preload" in message:
-                icon = "🚀 "
-                msg_class = "text-blue-300 font-semibold"
-            elif "Scheduler" in message:
-                icon = "⏰ "
-            elif "Tautulli" in message:
-                icon = "📊 "
-            elif "Plex" in message:
-                icon = "🎬 "
-            elif "Live" in message:
-                icon = "📡 "
-                msg_class = "text-purple-400"
-            elif "Error" in message or "error" in message:
-                icon = "❌ "
-                msg_class = "text-red-400"
-            elif "Warning" in message or "warning" in message:
-                icon = "⚠️ "
-                msg_class = "text-yellow-400"
-            elif "starting" in message.lower():
-                icon = "🔄 "
-            elif "Shutting" in message:
-                icon = "🛑 "
-                msg_class = "text-orange-400"
-
-            # Formatierte Zeile
-            formatted = (
-                f'<div class="flex gap-2 py-0.5 border-b border-slate-800/50">'
-                f'<span class="text-gray-500 shrink-0">{timestamp.split(" ")[1]}</span>'
-                f'<span class="{level_class} shrink-0 w-12">{level}</span>'
-                f'<span class="{msg_class}">{icon}{message}</span>'
-                f'</div>'
-            )
-            formatted_lines.append(formatted)
-        else:
-            # Unformatierte Zeile
-            formatted_lines.append(f'<div class="text-gray-400 py-0.5">{line}</div>')
-
-    html_output = ''.join(formatted_lines)
-    return {"logs": raw_logs, "html": html_output}
+    records = log_buffer.tail(min(limit, LOG_BUFFER_SIZE))
+    if not records:
+        return {"records": [], "logs": "", "html": "<div class='text-gray-500'>Keine Logs vorhanden...</div>"}
 
+    raw_logs = "\n".join(
+        f"{time.strftime(LOG_DATE_FORMAT, time.localtime(r['time']))} - {r['level']} - {r['message']}" for r in records
+    )
+    return {"records": records, "logs": raw_logs, "html": "".join(render_log_entry(r) for r in records)}
 
-@app.get("/api/history")
-async def get_history():
-    """
-    Gibt die Preload-Historie als formatiertes HTML zurück.
 
-    Returns:
-        HTMLResponse mit formatierten History-Karten.
-    """
+def render_history_html() -> str:
+    """Rendert die letzten 10 Läufe der Historie als History-Karten (HTML)."""
     lang = config.language if config.language in TRANSLATIONS else "en"
     t = TRANSLATIONS[lang]
     entries = state.history[-10:][::-1]  # Letzte 10, neueste zuerst
 
     if not entries:
-        return HTMLResponse(f'<p class="text-gray-500 text-sm">{t.get("no_history", "No history yet")}</p>')
+        return f'<p class="text-gray-500 text-sm">{t.get("no_history", "No history yet")}</p>'
 
     html_parts = []
     for entry in entries:
@@ -1672,7 +6019,9 @@ async def get_history():
             "scheduler": "⏰ Scheduler",
             "live_monitoring": "📡 Live",
             "webhook": "🎬 Webhook",
-            "tautulli": "📺 Tautulli"
+            "tautulli": "📺 Tautulli",
+            "predictive": "🔮 Predictive",
+            "job": "📦 Job"
         }
         source_label = source_labels.get(entry.source, f"📁 {entry.source}")
 
@@ -1684,6 +6033,28 @@ async def get_history():
             if len(entry.files_processed) > 5:
                 files_preview += f" (+{len(entry.files_processed) - 5})"
 
+        # Stufen als gestapelter Balken (Anteil an der Summe)
+        stages_html = ""
+        stage_total = sum(entry.stages.values())
+        if stage_total:
+            colors = ["bg-blue-500", "bg-emerald-500", "bg-yellow-500", "bg-purple-500", "bg-pink-500", "bg-cyan-500", "bg-orange-500"]
+            segments = "".join(
+                f'<div class="{colors[i % len(colors)]}" style="width:{secs / stage_total * 100:.1f}%" title="{name}: {secs}s"></div>'
+                for i, (name, secs) in enumerate(sorted(entry.stages.items(), key=lambda x: -x[1]))
+            )
+            stages_html = f'<div class="flex h-1.5 rounded overflow-hidden mt-2 bg-slate-700">{segments}</div>'
+
+        throughput_html = ""
+        if entry.bytes_read:
+            slowest = entry.slowest_files[0] if entry.slowest_files else None
+            throughput_html = (
+                f'<div class="flex gap-4 text-xs text-gray-400 mt-1">'
+                f'<span>💾 {entry.bytes_read / (1024**2):.0f} MB</span>'
+                f'<span>⚡ {entry.mb_per_s} MB/s</span>'
+                + (f'<span class="truncate">🐢 {slowest["file"]} ({slowest["ms"]} ms)</span>' if slowest else '')
+                + '</div>'
+            )
+
         html_parts.append(f'''
         <div class="bg-slate-800/50 rounded-lg p-3 mb-2">
             <div class="flex justify-between items-start mb-1">
@@ -1695,20 +6066,97 @@ async def get_history():
                 <span class="text-yellow-400">⏭ {entry.skipped} {t.get("skipped", "cached")}</span>
                 <span class="text-gray-400">⏱ {entry.duration_seconds}s</span>
             </div>
+            {throughput_html}
             {f'<p class="text-xs text-gray-500 mt-1 truncate">{files_preview}</p>' if files_preview else ''}
+            {stages_html}
         </div>
         ''')
 
-    return HTMLResponse("".join(html_parts))
+    return "".join(html_parts)
+
+
+@app.get("/api/history")
+async def get_history():
+    """
+    Gibt die Preload-Historie als formatiertes HTML zurück.
+
+    Returns:
+        HTMLResponse mit formatierten History-Karten.
+    """
+    return HTMLResponse(render_history_html())
+
+
+@app.get("/api/history/runs")
+async def list_history_runs(page: int = Query(1, ge=1), per_page: int = Query(20, ge=1, le=200),
+                            source: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None):
+    """
+    Läufe aus dem History-Store, seitenweise und neueste zuerst.
+
+    Args:
+        source: Nur Läufe dieser Quelle (manual, scheduler, webhook, ...).
+        since / until: Datumsbereich (YYYY-MM-DD, inklusive).
+    """
+    return JSONResponse(history_store.query(page, per_page, source, since, until))
+
+
+@app.get("/api/history/runs/{run_id}")
+async def get_history_run(run_id: int):
+    """Ein Lauf mit allen Datei-Einträgen (innerhalb von history_detail_days)."""
+    run = await asyncio.to_thread(history_store.get, run_id)
+    if run is None:
+        return JSONResponse({"error": "Run not found"}, status_code=404)
+    return JSONResponse(run)
+
+
+@app.get("/api/history/aggregates")
+async def get_history_aggregates(days: int = Query(30, ge=1)):
+    """Gewärmte Bytes je Tag, Trefferquote je Quelle und langsamste Disks."""
+    return JSONResponse(history_store.aggregates(days))
+
+
+@app.get("/api/history/compare")
+async def compare_history(a: Optional[int] = None, b: Optional[int] = None):
+    """
+    Vergleicht zwei Läufe des History-Stores Stufe für Stufe.
+
+    Args:
+        a: ID des ersten Laufs (Standard: der Lauf vor b).
+        b: ID des zweiten Laufs (Standard: letzter Lauf).
+
+    Returns:
+        Beide Läufe (ohne Datei-Einträge) und die Differenzen (b - a) je Stufe.
+    """
+    run_b = history_store.summary(b)
+    if run_b is None:
+        return JSONResponse({"error": "Run not found" if b is not None else "Not enough history to compare"}, status_code=404)
+    run_a = history_store.summary(run_b["id"], before=True) if a is None else history_store.summary(a)
+    if run_a is None:
+        return JSONResponse({"error": "Run not found" if a is not None else "Not enough history to compare"}, status_code=404)
+
+    stages_a, stages_b = run_a.get("stages") or {}, run_b.get("stages") or {}
+    return {
+        "a": run_a,
+        "b": run_b,
+        "delta": {
+            "duration_seconds": round(run_b.get("duration_seconds", 0) - run_a.get("duration_seconds", 0), 2),
+            "bytes_read": run_b.get("bytes_read", 0) - run_a.get("bytes_read", 0),
+            "mb_per_s": round(run_b.get("mb_per_s", 0) - run_a.get("mb_per_s", 0), 1),
+            "stages": {
+                name: round(stages_b.get(name, 0) - stages_a.get(name, 0), 3)
+                for name in sorted(set(stages_a) | set(stages_b))
+            },
+        },
+    }
 
 
 @app.post("/start")
 async def start_preload(background_tasks: BackgroundTasks):
-    """Startet den Preload-Task als Background-Prozess."""
+    """Startet den Preload-Task als Background-Prozess (während eines Laufs als Folgelauf)."""
     if not state.is_running:
         background_tasks.add_task(preload_task)
         return {"status": "Started"}
-    return {"status": "Already running"}
+    state.rerun_requested = "manual"
+    return {"status": "Queued"}
 
 
 @app.post("/api/preload")
@@ -1728,20 +6176,54 @@ async def preload_single_file(
     if not is_video_file(path, config.video_extensions):
         return JSONResponse({"error": "Not a video file"}, status_code=400)
 
-    preload_size = config.get_current_preload_size()
-    duration = read_file_chunk(path, preload_size)
-    read_file_chunk(path, config.preload_tail_mb, offset_from_end=True)
+    result = await asyncio.wrap_future(work_queue.enqueue(path, PRIORITY_MANUAL, "manual"))
+    if result["status"] == "budget":
+        return JSONResponse({"error": "Preload budget exhausted"}, status_code=507)
+    if result["status"] == "memory":
+        return JSONResponse({"error": "Memory pressure"}, status_code=503)
 
-    cached = duration < config.cache_threshold_ms
+    cached = result["status"] == "cached"
 
     return JSONResponse({
         "path": path,
-        "duration_ms": round(duration, 2),
+        "duration_ms": result["duration_ms"],
         "was_cached": cached,
         "status": "already_cached" if cached else "loaded"
     })
 
 
+@app.post("/api/jobs")
+async def create_preload_job(request: PreloadJobRequest):
+    """
+    Startet einen asynchronen Batch-Preload.
+
+    Body (JSON): paths (Dateien, Verzeichnisse, Glob-Muster), rating_keys
+    (Filme, Episoden, Staffeln, Serien), optional head_mb/tail_mb.
+
+    Returns:
+        Job-ID und Status (202), Fortschritt unter /api/jobs/{id}.
+    """
+    if not request.paths and not request.rating_keys:
+        return JSONResponse({"error": "No paths or rating keys given"}, status_code=400)
+    job = preload_jobs.create(request)
+    return JSONResponse({"id": job["id"], "status": job["status"], "url": f"/api/jobs/{job['id']}"}, status_code=202)
+
+
+@app.get("/api/jobs")
+async def list_preload_jobs():
+    """Listet die Batch-Preload-Jobs (neueste zuerst) ohne Einträge je Datei."""
+    return JSONResponse({"jobs": [preload_jobs.summary(job) for job in reversed(list(preload_jobs.jobs.values()))]})
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_preload_job(job_id: str):
+    """Status eines Jobs mit Fortschritt und Ergebnis je Datei."""
+    job = preload_jobs.jobs.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "Job not found"}, status_code=404)
+    return JSONResponse(preload_jobs.detail(job))
+
+
 @app.get("/api/cache-status")
 async def check_cache_status(path: str = Query(...)):
     """
@@ -1763,12 +6245,173 @@ async def check_cache_status(path: str = Query(...)):
     })
 
 
+@app.get("/api/forecast")
+async def get_forecast():
+    """
+    Gibt Prognose/Ist der letzten 24 Stunden, die Prognose der nächsten
+    24 Stunden und die geplanten Warm-ups als HTML zurück.
+    """
+    lang = config.language if config.language in TRANSLATIONS else "en"
+    t = TRANSLATIONS[lang]
+
+    if not viewing_predictor.updated_at:
+        return HTMLResponse(f'<p class="text-gray-500 text-sm">{t["forecast_empty"]}</p>')
+
+    hours = viewing_predictor.forecast(time.time() - 23 * 3600, 48)
+    scale = max([h["expected"] for h in hours] + [h["actual"] or 0 for h in hours] + [1])
+
+    bars = []
+    for h in hours:
+        label = datetime.fromtimestamp(h["hour"]).strftime("%a %H:00")
+        expected_pct = h["expected"] / scale * 100
+        bar = f'<div class="flex-1 bg-blue-500/60 rounded-t" style="height:{expected_pct:.0f}%"></div>'
+        if h["actual"] is not None:
+            actual_pct = h["actual"] / scale * 100
+            bar += f'<div class="flex-1 bg-emerald-400 rounded-t" style="height:{actual_pct:.0f}%"></div>'
+        bars.append(
+            f'<div class="flex-1 flex items-end gap-px h-full" '
+            f'title="{html.escape(label)}: {h["expected"]:.1f} / {h["actual"] if h["actual"] is not None else "-"}">{bar}</div>'
+        )
+
+    warmups = []
+    for peak_hour, plan in sorted(viewing_predictor.warmups.items()):
+        files = f' · {len(plan["files"])} ✓' if plan["files"] is not None else ''
+        warmups.append(
+            f'<div class="flex justify-between text-xs"><span class="text-gray-400">'
+            f'{datetime.fromtimestamp(plan["run_at"]).strftime("%a %H:%M")} → '
+            f'{datetime.fromtimestamp(peak_hour).strftime("%H:00")}</span>'
+            f'<span class="text-white truncate ml-2">{html.escape(", ".join(plan["users"][:3]))} '
+            f'({plan["expected"]:.1f}){files}</span></div>'
+        )
+
+    return HTMLResponse(f'''
+    <div class="flex items-end gap-0.5 h-24 border-b border-slate-700">{"".join(bars)}</div>
+    <div class="flex justify-between text-xs text-gray-500 mt-1 mb-3">
+        <span><span class="inline-block w-2 h-2 bg-blue-500/60 mr-1"></span>{t["forecast_expected"]}
+        <span class="inline-block w-2 h-2 bg-emerald-400 ml-3 mr-1"></span>{t["forecast_actual"]}</span>
+        <span>-24h · {datetime.now().strftime("%H:%M")} · +24h</span>
+    </div>
+    <div class="text-xs font-semibold text-gray-400 mb-1">{t["forecast_warmups"]}</div>
+    {"".join(warmups) or '<p class="text-gray-500 text-xs">-</p>'}
+    ''')
+
+
+@app.get("/api/candidates")
+async def get_candidates(limit: int = Query(50)):
+    """Gibt die Bewertung der Kandidaten des letzten Laufs zurück (bester Nutzen pro Byte zuerst)."""
+    return JSONResponse({"candidates": candidate_scorer.ranking[:limit]})
+
+
+@app.get("/api/effectiveness")
+async def get_effectiveness(days: int = Query(30)):
+    """
+    Gibt die gemessene Wirksamkeit zurück: Anteil der Wiedergabestarts, die
+    beim Start gewärmt waren, gesamt, je Quelle/Strategie und je Tag.
+
+    Args:
+        days: Betrachteter Zeitraum in Tagen.
+    """
+    return JSONResponse(await asyncio.to_thread(effectiveness_tracker.report, days))
+
+
+@app.get("/api/sources")
+async def get_candidate_sources():
+    """Listet die registrierten Kandidatenquellen mit Einstellungen und letztem Lauf."""
+    return JSONResponse({"sources": [
+        {"name": source.name, "priority": source.priority, "settings": source.settings(), "last_run": source.last_run}
+        for source in sorted(candidate_sources.values(), key=lambda s: s.priority, reverse=True)
+    ]})
+
+
+@app.get("/api/plan")
+async def get_preload_plan():
+    """Gibt den zuletzt berechneten Knapsack-Plan (Größenstufen je Datei) zurück."""
+    return JSONResponse(last_preload_plan or {"items": []})
+
+
+@app.post("/api/plan")
+async def simulate_preload_plan(budget_mb: int = Query(...)):
+    """
+    Berechnet einen Plan für die Kandidaten des letzten Laufs mit anderem Budget.
+
+    Args:
+        budget_mb: Byte-Budget in MB.
+    """
+    plan = optimise_plan(
+        candidate_scorer.ranking, budget_mb * 1024 * 1024,
+        config.get_current_preload_size(), config.preload_tail_mb
+    )
+    return JSONResponse(plan)
+
+
+@app.get("/api/queue")
+async def get_work_queue():
+    """Gibt die Preload-Warteschlange in Abarbeitungsreihenfolge zurück."""
+    return JSONResponse({"items": work_queue.snapshot(), **work_queue.stats})
+
+
+@app.get("/api/path-mappings")
+async def get_path_mappings():
+    """
+    Gibt konfigurierte und gelernte Pfad-Mappings zurück.
+
+    'learned' enthält automatisch erkannte Präfix-Mappings im Config-Format,
+    'unresolved' die Plex-Pfade, die aktuell nicht auflösbar sind.
+    """
+    return JSONResponse({
+        "configured": config.path_mappings,
+        "learned": path_resolver.learned_mappings(),
+        "unresolved": path_resolver.unresolved_paths()
+    })
+
+
+@app.post("/api/path-mappings/promote")
+async def promote_learned_mappings():
+    """Übernimmt alle gelernten Pfad-Mappings in die Konfiguration."""
+    added = []
+    for plex_prefix, container_prefix in path_resolver.learned_pairs():
+        # Das Config-Format trennt am ersten ':', Präfixe mit ':' (Windows) passen nicht hinein
+        if ':' in plex_prefix:
+            logger.warning(f"Pfad-Mapping {plex_prefix} nicht übernehmbar (':' im Plex-Pfad)")
+            continue
+        mapping = f"{plex_prefix}:{container_prefix}"
+        if mapping not in config.path_mappings:
+            added.append(mapping)
+    if added:
+        config.path_mappings.extend(added)
+        config.save()
+        path_resolver.clear_caches()
+        logger.info(f"Pfad-Mappings übernommen: {', '.join(added)}")
+    return JSONResponse({"added": added, "path_mappings": config.path_mappings})
+
+
+@app.get("/api/library")
+async def get_library_snapshot():
+    """Gibt Kennzahlen zum lokalen Bibliotheks-Snapshot zurück."""
+    return JSONResponse({
+        "enabled": config.library_sync_enabled,
+        **library_snapshot.stats()
+    })
+
+
+@app.post("/api/library/sync")
+async def trigger_library_sync(full: bool = Query(False)):
+    """
+    Synchronisiert den Bibliotheks-Snapshot sofort.
+
+    Args:
+        full: Vollständigen statt inkrementellen Sync erzwingen.
+    """
+    return JSONResponse(await sync_library(full=full))
+
+
 @app.post("/api/webhook/plex")
 async def plex_webhook(request: Request, background_tasks: BackgroundTasks):
     """
     Empfängt Webhooks von Plex und triggert Preload bei Bedarf.
 
-    Reagiert auf 'media.play' Events.
+    Reagiert auf 'media.play' Events mit einem gezielten Preload (nächste
+    Episoden + Tail der laufenden Datei) statt eines vollen Laufs.
     """
     try:
         # Plex sendet multipart/form-data
@@ -1779,11 +6422,18 @@ async def plex_webhook(request: Request, background_tasks: BackgroundTasks):
         event = payload.get("event", "")
 
         if event == "media.play":
-            # Jemand schaut etwas - preloade verwandte Inhalte
-            logger.info(f"Plex webhook: {event}")
-            if not state.is_running:
-                background_tasks.add_task(preload_task)
-                return {"status": "Preload triggered"}
+            # Jemand schaut etwas - gezielt nächste Episoden + Tail laden
+            play = parse_webhook_play(payload)
+            if play is None:
+                return {"status": "OK", "event": event}
+
+            if _play_debounced(play):
+                logger.debug(f"Plex webhook: {event} für {play['title']} bereits behandelt")
+                return {"status": "Debounced", "event": event}
+
+            logger.info(f"Plex webhook: {event} ({play['title']}, User: {play['user']})")
+            background_tasks.add_task(targeted_play_preload, play)
+            return {"status": "Targeted preload queued", "event": event}
 
         return {"status": "OK", "event": event}
 
@@ -1891,6 +6541,7 @@ async def save_config_all(
     config.live_episodes_to_preload = live_episodes_to_preload
     # Pfad-Mappings (Zeilen-separiert)
     config.path_mappings = [p.strip() for p in path_mappings.split('\n') if p.strip() and ':' in p]
+    path_resolver.clear_caches()
 
     # Plex
     config.plex_enabled = plex_enabled
@@ -1911,7 +6562,7 @@ async def save_config_all(
     if old_live_monitoring != live_monitoring_enabled:
         if _live_monitoring_task_handle and not _live_monitoring_task_handle.done():
             _live_monitoring_task_handle.cancel()
-        if live_monitoring_enabled and tautulli_enabled:
+        if live_monitoring_enabled and (tautulli_enabled or config.live_activity_source == "websocket"):
             _live_monitoring_task_handle = asyncio.create_task(live_monitoring_task())
             logger.info(f"Live-Monitoring gestartet (Intervall: {live_check_interval_seconds}s)")
         else:
@@ -2006,11 +6657,10 @@ async def test_live_monitoring():
         # Für jede Session: Finde nächste Episoden
         results = []
         for session in sessions:
-            base_url = config.tautulli_url.rstrip('/')
             async with httpx.AsyncClient(timeout=30.0) as client:
-                next_eps = await _find_next_episodes(
+                next_eps = await find_next_episodes(
                     client,
-                    base_url,
+                    config.live_next_episodes_backend,
                     session["show_key"],
                     session["season"],
                     session["episode"],
@@ -0,0 +1,585 @@
+"""
+Benchmark-Suite für den Video Preloader.
+
+Erzeugt eine synthetische Medienbibliothek aus Sparse-Dateien (Filme,
+Serien mit Staffeln, ausgeschlossene Ordner, Nicht-Video-Dateien), startet
+lokale Stand-ins für Tautulli und Plex mit einstellbarer Latenz und misst:
+
+    scan      discover_files() über den Baum (Dateien/s)
+    warm      read_file_chunk() auf zuvor verdrängten Dateien (MB/s)
+    upstream  Strategien über Tautulli bzw. Plex und Library-Sync
+              (Dauer, Anfragen je cmd)
+    run       einen kompletten Preload-Lauf inkl. Warteschlange
+
+Das Ergebnis ist ein JSON-Report, der sich zwischen zwei Ständen
+vergleichen lässt. Löcher in Sparse-Dateien kosten keinen Disk-I/O; für
+den Durchsatz zählen nur die --dense-files, die echte Daten enthalten.
+Im run-Schritt liest der Preloader Löcher in Mikrosekunden und wertet
+solche Dateien deshalb als "cached"; der Report weist dense und sparse
+Dateien getrennt aus, aussagekräftig für den Warm-Pfad ist nur "dense".
+Auch dort entscheidet cache_threshold_ms über loaded/cached, auf schnellen
+Platten landen verdrängte Dense-Dateien also ebenfalls unter "cached" –
+dann zählt dense.mb_per_s.
+Konfiguration, Ledger, Historie usw. landen in einem temporären
+Verzeichnis (PRELOADER_CONFIG_DIR), /config bleibt unberührt.
+
+Beispiel:
+    python bench/benchmark.py --movies 2000 --shows 100 --latency-ms 20 --out report.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import tempfile
+import platform
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Optional, Any, Tuple
+from urllib.parse import urlparse, parse_qs
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# So meldet Plex die Pfade; per path_mappings auf den synthetischen Baum gemappt
+PLEX_ROOT = "/plexmedia"
+
+# Tautulli-Spalte -> Feld im Modell (Plex-Sortierfelder siehe PLEX_SORT)
+TAUTULLI_SORT = {
+    "added_at": "added_at",
+    "originally_available_at": "released",
+    "play_count": "play_count",
+    "last_played": "last_played",
+}
+PLEX_SORT = {
+    "addedAt": "added_at",
+    "originallyAvailableAt": "released",
+    "viewCount": "play_count",
+    "lastViewedAt": "last_played",
+}
+
+
+# --- SYNTHETISCHE BIBLIOTHEK ---
+
+class SyntheticLibrary:
+    """
+    Synthetischer Medienbaum mit passendem Plex/Tautulli-Modell.
+
+    Jede Video-Datei ist eine Sparse-Datei der Größe file_mb; die ersten
+    dense_files Filme (neueste Releases, also die ersten Kandidaten der
+    Strategien) enthalten zusätzlich dense_mb echte Daten am Anfang.
+    """
+
+    def __init__(self, root: str, movies: int, shows: int, seasons: int, episodes: int,
+                 file_mb: int, dense_files: int, dense_mb: int, seed: int):
+        self.root = root
+        self.counts = {"movies": movies, "shows": shows, "seasons": seasons, "episodes": episodes}
+        self.file_mb = file_mb
+        self.dense_files = dense_files
+        self.dense_mb = dense_mb
+        self.rng = random.Random(seed)
+        self.items: Dict[str, Dict[str, Any]] = {}  # rating_key -> Eintrag
+        self.children: Dict[str, List[str]] = {}  # rating_key -> Kinder (Staffeln/Episoden)
+        self.dense_paths: List[str] = []
+        self.total_files = 0
+        self.video_files = 0
+        self._next_key = 1000
+
+    def _add(self, **item) -> Dict[str, Any]:
+        self._next_key += 1
+        item["rating_key"] = str(self._next_key)
+        self.items[item["rating_key"]] = item
+        if item.get("parent"):
+            self.children.setdefault(item["parent"], []).append(item["rating_key"])
+        return item
+
+    def _touch(self, rel_path: str, size: int, dense_bytes: int = 0):
+        """Legt eine (Sparse-)Datei an."""
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.truncate(size)
+            if dense_bytes:
+                chunk = os.urandom(1024 * 1024)
+                for _ in range(dense_bytes // len(chunk)):
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+        self.total_files += 1
+        return path
+
+    def _video(self, rel_path: str, dense: bool = False) -> str:
+        self.video_files += 1
+        dense_bytes = self.dense_mb * 1024 * 1024 if dense else 0
+        path = self._touch(rel_path, self.file_mb * 1024 * 1024, dense_bytes)
+        if dense:
+            self.dense_paths.append(path)
+        return f"{PLEX_ROOT}/{rel_path}"
+
+    def _dates(self) -> Tuple[int, str, int, int]:
+        """Zufälliges Hinzufüge-/Erscheinungsdatum und Wiedergabe-Statistik."""
+        now = int(time.time())
+        added_at = now - self.rng.randrange(3 * 365 * 86400)
+        released = time.strftime("%Y-%m-%d", time.gmtime(added_at - self.rng.randrange(5 * 365 * 86400)))
+        play_count = self.rng.choice([0, 0, 0, 1, 2, 5, 12])
+        last_played = now - self.rng.randrange(60 * 86400) if play_count else 0
+        return added_at, released, play_count, last_played
+
+    def build(self) -> "SyntheticLibrary":
+        """Erzeugt Dateien und Modell."""
+        movies = []
+        for i in range(self.counts["movies"]):
+            added_at, released, play_count, last_played = self._dates()
+            movies.append(dict(title=f"Movie {i:05d}", added_at=added_at, released=released,
+                               play_count=play_count, last_played=last_played))
+        # Die neuesten Releases bekommen echte Daten (erste Kandidaten der Strategien)
+        movies.sort(key=lambda m: m["released"], reverse=True)
+
+        for i, movie in enumerate(movies):
+            year = movie["released"][:4]
+            folder = f"movies/{movie['title']} ({year})"
+            file = self._video(f"{folder}/{movie['title']} ({year}).mkv", dense=i < self.dense_files)
+            self._add(type="movie", section="1", file=file, **movie)
+            self._touch(f"{folder}/{movie['title']} ({year}).nfo", 2048)
+            self._touch(f"{folder}/poster.jpg", 65536)
+            if i % 10 == 0:
+                # Ausgeschlossene Ordner (exclude_patterns) mit Video-Dateien
+                self._video(f"{folder}/Extras/Behind the Scenes.mkv")
+                self._video(f"{folder}/Samples/sample.mkv")
+
+        for s in range(self.counts["shows"]):
+            added_at, released, play_count, last_played = self._dates()
+            title = f"Show {s:04d}"
+            show = self._add(type="show", section="2", title=title, file=None, added_at=added_at,
+                             released=released, play_count=play_count, last_played=last_played)
+            for season_num in range(1, self.counts["seasons"] + 1):
+                season = self._add(type="season", section="2", title=f"Season {season_num}", file=None,
+                                   parent=show["rating_key"], index=season_num)
+                for ep_num in range(1, self.counts["episodes"] + 1):
+                    rel = f"tv/{title}/Season {season_num:02d}/{title} S{season_num:02d}E{ep_num:02d}.mkv"
+                    self._add(type="episode", section="2", title=f"{title} S{season_num:02d}E{ep_num:02d}",
+                              file=self._video(rel), parent=season["rating_key"], show=show["rating_key"],
+                              season=season_num, index=ep_num, added_at=added_at, released=released,
+                              play_count=0, last_played=0)
+                    self._touch(rel[:-4] + ".en.srt", 4096)
+        return self
+
+    def of_type(self, media_type: str, section: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [i for i in self.items.values()
+                if i["type"] == media_type and (section is None or i["section"] == section)]
+
+    def episodes(self, show_key: str) -> List[Dict[str, Any]]:
+        return [self.items[e] for s in self.children.get(show_key, []) for e in self.children.get(s, [])]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counts,
+            "total_files": self.total_files,
+            "video_files": self.video_files,
+            "dense_files": len(self.dense_paths),
+            "apparent_gb": round(self.video_files * self.file_mb / 1024, 1),
+        }
+
+
+# --- FAKE UPSTREAMS ---
+
+class FakeUpstream:
+    """
+    Stand-in für Tautulli (/tautulli/api/v2) und Plex (/plex/...) auf einem
+    lokalen Port. Jede Anfrage wartet latency_ms und wird je Backend und
+    cmd bzw. Pfad gezählt.
+    """
+
+    def __init__(self, library: SyntheticLibrary, latency_ms: float, on_deck: int):
+        self.library = library
+        self.latency = latency_ms / 1000
+        self.on_deck = on_deck
+        self.requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                time.sleep(upstream.latency)
+                status, payload = upstream.handle(url.path, query)
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+
+    def reset(self) -> Dict[str, int]:
+        """Gibt die Anfragezähler zurück und setzt sie zurück."""
+        with self._lock:
+            counts, self.requests = self.requests, {}
+        return dict(sorted(counts.items()))
+
+    def _count(self, name: str):
+        with self._lock:
+            self.requests[name] = self.requests.get(name, 0) + 1
+
+    def handle(self, path: str, query: Dict[str, str]) -> Tuple[int, Any]:
+        if path == "/tautulli/api/v2":
+            cmd = query.get("cmd", "")
+            self._count(f"tautulli:{cmd}")
+            data = self._tautulli(cmd, query)
+            if data is None:
+                return 200, {"response": {"result": "error", "message": f"Unknown cmd {cmd}"}}
+            return 200, {"response": {"result": "success", "data": data}}
+
+        if path.startswith("/plex/"):
+            plex_path = path[len("/plex"):]
+            self._count("plex:" + "/".join(":id" if p.replace(",", "").isdigit() else p for p in plex_path.split("/")))
+            container = self._plex(plex_path, query)
+            if container is None:
+                return 404, {}
+            return 200, {"MediaContainer": container}
+
+        return 404, {}
+
+    @staticmethod
+    def _sorted(items: List[Dict[str, Any]], field: str, order_dir: str) -> List[Dict[str, Any]]:
+        return sorted(items, key=lambda i: i.get(field) or 0, reverse=order_dir == "desc")
+
+    # Tautulli
+
+    def _tautulli_row(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "rating_key": item["rating_key"],
+            "title": item["title"],
+            "added_at": str(item.get("added_at", "")),
+            "play_count": item.get("play_count"),
+            "last_played": item.get("last_played") or None,
+        }
+
+    def _tautulli(self, cmd: str, q: Dict[str, str]) -> Any:
+        lib = self.library
+        if cmd == "get_libraries":
+            return [
+                {"section_id": "1", "section_type": "movie", "section_name": "Movies"},
+                {"section_id": "2", "section_type": "show", "section_name": "TV Shows"},
+            ]
+        if cmd == "get_library_media_info":
+            media_type = "movie" if q.get("section_id") == "1" else "show"
+            field = TAUTULLI_SORT.get(q.get("order_column", ""), "added_at")
+            rows = self._sorted(lib.of_type(media_type), field, q.get("order_dir", "desc"))
+            start, length = int(q.get("start", 0)), int(q.get("length", 25))
+            return {"recordsTotal": len(rows), "data": [self._tautulli_row(i) for i in rows[start:start + length]]}
+        if cmd == "get_metadata":
+            item = lib.items.get(q.get("rating_key", ""))
+            if not item:
+                return {}
+            metadata = {"rating_key": item["rating_key"], "originally_available_at": item.get("released", "")}
+            if item.get("file"):
+                metadata["media_info"] = [{"parts": [{"file": item["file"]}]}]
+            return metadata
+        if cmd == "get_children_metadata":
+            children = [lib.items[k] for k in lib.children.get(q.get("rating_key", ""), [])]
+            return {"children_list": [{"rating_key": c["rating_key"], "media_index": str(c["index"])} for c in children]}
+        if cmd == "get_home_stats":
+            count = int(q.get("stats_count", 10))
+            if q.get("stat_id") == "top_movies":
+                rows = self._sorted(lib.of_type("movie"), "play_count", "desc")[:count]
+                return {"rows": [{"rating_key": i["rating_key"]} for i in rows]}
+            rows = self._sorted(lib.of_type("show"), "play_count", "desc")[:count]
+            return {"rows": [{"grandparent_rating_key": i["rating_key"]} for i in rows]}
+        if cmd == "get_activity":
+            return {"sessions": []}
+        if cmd == "get_history":
+            return {"recordsTotal": 0, "data": []}
+        return None
+
+    # Plex
+
+    def _plex_entry(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        entry = {
+            "ratingKey": item["rating_key"],
+            "title": item["title"],
+            "addedAt": item.get("added_at", 0),
+            "originallyAvailableAt": item.get("released", ""),
+            "viewCount": item.get("play_count", 0),
+            "lastViewedAt": item.get("last_played", 0),
+        }
+        if item["type"] == "episode":
+            entry.update(grandparentRatingKey=item["show"], parentIndex=item["season"], index=item["index"])
+        if item.get("file"):
+            entry["Media"] = [{"Part": [{"file": item["file"]}]}]
+        return entry
+
+    def _plex(self, path: str, q: Dict[str, str]) -> Any:
+        lib = self.library
+        parts = path.strip("/").split("/")
+        if path == "/library/sections":
+            return {"Directory": [{"key": "1", "type": "movie", "title": "Movies"},
+                                  {"key": "2", "type": "show", "title": "TV Shows"}]}
+        if len(parts) == 4 and parts[:2] == ["library", "sections"] and parts[3] == "all":
+            media_type = {"1": "movie", "2": "show", "4": "episode"}.get(q.get("type", "1"), "movie")
+            field, _, order_dir = q.get("sort", "addedAt:desc").partition(":")
+            items = self._sorted(lib.of_type(media_type), PLEX_SORT.get(field, "added_at"), order_dir or "asc")
+            start = int(q.get("X-Plex-Container-Start", 0))
+            size = int(q.get("X-Plex-Container-Size", 50))
+            return {"Metadata": [self._plex_entry(i) for i in items[start:start + size]]}
+        if path == "/library/onDeck":
+            shows = self._sorted(lib.of_type("show"), "last_played", "desc")[:self.on_deck]
+            entries = [self._plex_entry(eps[0]) for eps in (lib.episodes(s["rating_key"]) for s in shows) if eps]
+            return {"Metadata": entries}
+        if len(parts) == 4 and parts[:2] == ["library", "metadata"] and parts[3] == "allLeaves":
+            return {"Metadata": [self._plex_entry(e) for e in lib.episodes(parts[2])]}
+        if len(parts) == 3 and parts[:2] == ["library", "metadata"]:
+            items = [lib.items[k] for k in parts[2].split(",") if k in lib.items]
+            return {"Metadata": [self._plex_entry(i) for i in items]}
+        return None
+
+
+# --- MESSUNGEN ---
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def bench_scan(preloader, library: SyntheticLibrary, repeat: int) -> Dict[str, Any]:
+    """discover_files() über den gesamten Baum (ab dem 2. Durchgang mit warmem Dentry-Cache)."""
+    preloader.config.video_paths = [os.path.join(library.root, "movies"), os.path.join(library.root, "tv")]
+    timings = []
+    found = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        found = len(preloader.discover_files())
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    return {
+        "seconds": [round(t, 4) for t in timings],
+        "files_per_s": round(library.total_files / best) if best else None,
+        "video_files_found": found,
+    }
+
+
+def bench_warm(preloader, library: SyntheticLibrary) -> Dict[str, Any]:
+    """read_file_chunk() auf den Dense-Dateien, vorher per fadvise verdrängt."""
+    if not library.dense_paths:
+        return {"files": 0}
+    size = library.dense_mb * 1024 * 1024
+    evicted = all(preloader.evict_file_range(p, 0, size) for p in library.dense_paths)
+    per_file = []
+    started = time.perf_counter()
+    for path in library.dense_paths:
+        per_file.append(preloader.read_file_chunk(path, library.dense_mb))
+    elapsed = time.perf_counter() - started
+    total_mb = library.dense_mb * len(library.dense_paths)
+    return {
+        "files": len(library.dense_paths),
+        "mb": total_mb,
+        "evicted_before": evicted,
+        "seconds": round(elapsed, 4),
+        "mb_per_s": round(total_mb / elapsed, 1) if elapsed else None,
+        "file_ms_p50": round(_percentile(per_file, 0.5), 2),
+        "file_ms_p95": round(_percentile(per_file, 0.95), 2),
+    }
+
+
+def _timed(coro) -> Tuple[float, Any]:
+    started = time.perf_counter()
+    result = asyncio.run(coro)
+    return round(time.perf_counter() - started, 4), result
+
+
+def bench_upstream(preloader, upstream: FakeUpstream) -> Dict[str, Any]:
+    """Strategien direkt über Tautulli bzw. Plex sowie Library-Sync und Snapshot-Abfrage."""
+    config = preloader.config
+    report = {}
+
+    config.library_sync_enabled = False
+    for backend in ("tautulli", "plex"):
+        config.cache_recent_releases_backend = backend
+        config.cache_most_watched_backend = backend
+        config.cache_recently_added_backend = backend
+        upstream.reset()
+        seconds, data = _timed(preloader.fetch_tautulli_data())
+        report[f"strategies_{backend}"] = {
+            "seconds": seconds,
+            "files": sum(len(v) for v in data.values()),
+            "requests": upstream.reset(),
+        }
+
+    config.library_sync_enabled = True
+    for backend in ("tautulli", "plex"):
+        config.library_sync_backend = backend
+        upstream.reset()
+        seconds, _ = _timed(preloader.sync_library(full=True))
+        full = {"seconds": seconds, "requests": upstream.reset()}
+        seconds, data = _timed(preloader.fetch_tautulli_data())
+        report[f"library_sync_{backend}"] = {
+            "full_sync": full,
+            "incremental_run": {
+                "seconds": seconds,
+                "files": sum(len(v) for v in data.values()),
+                "requests": upstream.reset(),
+            },
+        }
+    return report
+
+
+def bench_run(preloader, library: SyntheticLibrary, upstream: FakeUpstream, backend: str) -> Dict[str, Any]:
+    """Kompletter Preload-Lauf (Strategien, On Deck, Scan, Warteschlange)."""
+    config = preloader.config
+    config.library_sync_enabled = True
+    config.library_sync_backend = backend
+    for path in library.dense_paths:
+        preloader.evict_file_range(path, 0, library.dense_mb * 1024 * 1024)
+    upstream.reset()
+
+    async def run():
+        worker = asyncio.create_task(preloader.work_queue.run())
+        try:
+            await preloader.run_preload("benchmark")
+        finally:
+            worker.cancel()
+
+    seconds, _ = _timed(run())
+    entry = preloader.state.history[-1]
+    runs = preloader.history_store.recent(1)
+    items = preloader.history_store.get(runs[0]["id"])["items"] if runs else []
+    dense = set(library.dense_paths)
+    return {
+        "backend": backend,
+        "seconds": seconds,
+        "loaded": entry.preloaded,
+        "cached": entry.skipped,
+        "bytes_read": entry.bytes_read,
+        "mb_per_s": entry.mb_per_s,
+        "cache_threshold_ms": config.cache_threshold_ms,
+        "dense": _run_group([i for i in items if i["path"] in dense]),
+        "sparse": _run_group([i for i in items if i["path"] not in dense]),
+        "stages": entry.stages,
+        "requests": upstream.reset(),
+    }
+
+
+def _run_group(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Kennzahlen eines Teils der Dateien eines Laufs (dense bzw. sparse)."""
+    read_bytes = sum(i["bytes"] for i in items)
+    read_ms = sum(i["read_ms"] for i in items)
+    return {
+        "files": len(items),
+        "loaded": sum(1 for i in items if i["status"] == "loaded"),
+        "cached": sum(1 for i in items if i["status"] == "cached"),
+        "bytes_read": read_bytes,
+        "mb_per_s": round(read_bytes / 1024 / 1024 / (read_ms / 1000), 1) if read_ms else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Video Preloader benchmark suite")
+    parser.add_argument("--movies", type=int, default=1000)
+    parser.add_argument("--shows", type=int, default=50)
+    parser.add_argument("--seasons", type=int, default=3)
+    parser.add_argument("--episodes", type=int, default=10, help="episodes per season")
+    parser.add_argument("--file-mb", type=int, default=2048, help="apparent size of each (sparse) video file")
+    parser.add_argument("--dense-files", type=int, default=20, help="files with real data for warm throughput")
+    parser.add_argument("--dense-mb", type=int, default=16, help="real data at the start of each dense file")
+    parser.add_argument("--latency-ms", type=float, default=10, help="latency of every fake upstream request")
+    parser.add_argument("--on-deck", type=int, default=10)
+    parser.add_argument("--strategy-count", type=int, default=20, help="items per strategy and media type")
+    parser.add_argument("--max-files", type=int, default=50, help="max_files_per_run")
+    parser.add_argument("--backend", choices=("tautulli", "plex"), default="tautulli", help="backend for the end-to-end run")
+    parser.add_argument("--scan-repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", help="directory for the synthetic tree (default: temporary)")
+    parser.add_argument("--keep", action="store_true", help="keep the synthetic tree afterwards")
+    parser.add_argument("--out", help="write the JSON report to this file (default: stdout)")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="preloader-bench-")
+    media_root = os.path.join(workdir, "media")
+    os.environ["PRELOADER_CONFIG_DIR"] = os.path.join(workdir, "config")
+    sys.path.insert(0, REPO_ROOT)
+    from app import main as preloader  # erst nach PRELOADER_CONFIG_DIR importieren
+
+    preloader.logger.setLevel("WARNING")
+    upstream = None
+    try:
+        started = time.perf_counter()
+        library = SyntheticLibrary(
+            media_root, args.movies, args.shows, args.seasons, args.episodes,
+            args.file_mb, args.dense_files, args.dense_mb, args.seed
+        ).build()
+        build_seconds = round(time.perf_counter() - started, 2)
+
+        upstream = FakeUpstream(library, args.latency_ms, args.on_deck)
+        upstream.start()
+
+        config = preloader.config
+        config.tautulli_enabled = True
+        config.tautulli_url = f"{upstream.base_url}/tautulli"
+        config.tautulli_api_key = "benchmark"
+        config.plex_enabled = True
+        config.plex_url = f"{upstream.base_url}/plex"
+        config.plex_token = "benchmark"
+        config.path_mappings = [f"{PLEX_ROOT}:{media_root}"]
+        config.min_size_mb = min(config.min_size_mb, args.file_mb)
+        config.preload_head_mb = args.dense_mb
+        config.max_files_per_run = args.max_files
+        config.cache_recent_releases = config.cache_most_watched = config.cache_recently_added = True
+        for key in ("recent", "most_watched", "recently_added"):
+            setattr(config, f"cache_{key}_movies_count", args.strategy_count)
+            setattr(config, f"cache_{key}_shows_count", args.strategy_count)
+        # Ergebnisse nicht zwischen den Messungen wiederverwenden
+        config.upstream_result_ttl_seconds = 0
+        # Der Speicher-Governor soll die Messung nicht ausbremsen
+        config.ram_max_usage_percent = 100
+        config.memory_psi_pace_threshold = config.memory_psi_suspend_threshold = 100
+
+        report = {
+            "benchmark": "video-preloader",
+            "version": preloader.VERSION,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": vars(args),
+            "library": {**library.stats(), "build_seconds": build_seconds},
+            "scan": bench_scan(preloader, library, args.scan_repeat),
+            "warm": bench_warm(preloader, library),
+            "upstream": bench_upstream(preloader, upstream),
+            "run": bench_run(preloader, library, upstream, args.backend),
+        }
+    finally:
+        if upstream:
+            upstream.stop()
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
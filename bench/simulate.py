@@ -0,0 +1,498 @@
+"""
+Offline-Simulator für Preload-Policies.
+
+Spielt eine exportierte Tautulli-Historie (get_history) gegen ein Modell
+des Page-Caches (Kapazität, LRU-Verdrängung) und beliebige Preloader-
+Konfigurationen ab. Je Policy werden Start-Trefferquote, gelesene Bytes
+und Disk-Wake-ups (Spin-up nach spindown_minutes Leerlauf) berichtet,
+damit sich z.B. max_files_per_run, preload_head_mb, Strategie-Anzahlen
+oder die Cron-Frequenz in Sekunden vergleichen lassen statt über Tage in
+Produktion.
+
+Modelliert werden die Strategien (neueste Releases, meistgesehen,
+zuletzt hinzugefügt), On Deck (nächste Episode angefangener Serien je
+User), der Dateisystem-Scan (neueste Dateien), die Cron-Läufe mit
+max_files_per_run, Zeitprofile und das Live-Monitoring bzw. der Webhook
+(nächste Episoden nach einem Start). Nicht modelliert werden
+Kandidaten-Bewertung, Knapsack-Plan, Byte-Budget und Prognose; Dateien
+liegen ohne Snapshot per Hash auf --disks Platten (mit Snapshot aus
+/mnt/diskN/ im Pfad).
+
+Beispiele:
+    # Historie der letzten 90 Tage über die konfigurierte Tautulli-Instanz exportieren
+    python bench/simulate.py --config /config/config.json --fetch-history history.json --days 90
+
+    # Aktuelle Konfiguration gegen zwei Varianten vergleichen
+    python bench/simulate.py history.json --config /config/config.json \\
+        --snapshot /config/library_snapshot.json --cache-gb 24 \\
+        --policy '{"max_files_per_run": 100}' --policy hourly.json --out sim.json
+"""
+import os
+import re
+import sys
+import json
+import zlib
+import time
+import heapq
+import asyncio
+import argparse
+import tempfile
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Dict, Optional, Any, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MB = 1024 * 1024
+GB = 1024 * MB
+
+# Plex-Pfade auf Unraid: /mnt/diskN/... bzw. /mnt/user/... (dann per Hash)
+DISK_PATTERN = re.compile(r"/disk(\d+)/")
+
+
+def load_history(path: str) -> List[Dict[str, Any]]:
+    """Liest get_history-Zeilen (rohe API-Antwort, data-Objekt oder Liste)."""
+    with open(path, "r") as f:
+        data = json.load(f)
+    while isinstance(data, dict):
+        data = data.get("response") or data.get("data") or []
+    return [row for row in data if row.get("rating_key") and (row.get("started") or row.get("date"))]
+
+
+def _to_int(value: Any) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+# --- BIBLIOTHEKS-MODELL ---
+
+class SimLibrary:
+    """
+    Titel der Simulation: Filme, Serien und deren Episoden.
+
+    Stammt aus dem Bibliotheks-Snapshot (falls angegeben) und wird um alle
+    Titel der Historie ergänzt. Ohne Snapshot gilt der erste Start eines
+    Titels als Hinzufüge-Datum; ein Erscheinungsdatum fehlt dann.
+    """
+
+    def __init__(self, movie_gb: float, episode_gb: float, disks: int):
+        self.movie_bytes = int(movie_gb * GB)
+        self.episode_bytes = int(episode_gb * GB)
+        self.disks = disks
+        self.movies: Dict[str, Dict[str, Any]] = {}
+        self.shows: Dict[str, Dict[str, Any]] = {}
+        self.episodes: Dict[str, List[Tuple[int, int, str]]] = {}  # Serie -> (Staffel, Episode, Key)
+        self.kind: Dict[str, str] = {}  # Key -> movie/episode
+        self.show_of: Dict[str, str] = {}  # Episode -> Serie
+        self.disk: Dict[str, int] = {}
+
+    def _disk_for(self, key: str, path: str = "") -> int:
+        match = DISK_PATTERN.search(path or "")
+        if match:
+            return int(match.group(1))
+        # Serien liegen auf Unraid meist komplett auf einer Platte
+        return zlib.crc32(self.show_of.get(key, key).encode()) % self.disks + 1
+
+    def _add_episode(self, show_key: str, season: int, episode: int, key: str, path: str = ""):
+        if key in self.kind:
+            return
+        self.kind[key] = "episode"
+        self.show_of[key] = show_key
+        self.episodes.setdefault(show_key, []).append((season, episode, key))
+        self.disk[key] = self._disk_for(key, path)
+
+    def load_snapshot(self, path: str):
+        with open(path, "r") as f:
+            items = json.load(f).get("items", [])
+        for item in items:
+            key = item["rating_key"]
+            meta = {"added_at": item.get("added_at", 0), "released": item.get("originally_available_at", "")}
+            if item.get("media_type") == "movie":
+                self.movies[key] = meta
+                self.kind[key] = "movie"
+                self.disk[key] = self._disk_for(key, item.get("file", ""))
+            elif item.get("media_type") == "show":
+                self.shows[key] = meta
+            elif item.get("media_type") == "episode" and item.get("show_key"):
+                self._add_episode(item["show_key"], item.get("season", 0), item.get("episode", 0), key, item.get("file", ""))
+
+    def add_history(self, rows: List[Dict[str, Any]]):
+        for row in sorted(rows, key=lambda r: _to_int(r.get("started") or r.get("date"))):
+            key = str(row["rating_key"])
+            started = _to_int(row.get("started") or row.get("date"))
+            if row.get("media_type") == "episode" and row.get("grandparent_rating_key"):
+                show_key = str(row["grandparent_rating_key"])
+                self.shows.setdefault(show_key, {"added_at": started, "released": ""})
+                self._add_episode(show_key, _to_int(row.get("parent_media_index")), _to_int(row.get("media_index")), key)
+            elif key not in self.kind:
+                self.movies[key] = {"added_at": started, "released": str(row.get("originally_available_at") or "")}
+                self.kind[key] = "movie"
+                self.disk[key] = self._disk_for(key)
+        for eps in self.episodes.values():
+            eps.sort()
+
+    def size(self, key: str) -> int:
+        return self.movie_bytes if self.kind.get(key) == "movie" else self.episode_bytes
+
+    def first_episode(self, show_key: str) -> Optional[str]:
+        for season, episode, key in self.episodes.get(show_key, []):
+            if (season, episode) > (0, 0):
+                return key
+        return None
+
+    def next_episodes(self, key: str, count: int) -> List[str]:
+        """Die count Episoden nach key (staffelübergreifend)."""
+        eps = self.episodes.get(self.show_of.get(key, ""), [])
+        keys = [k for _, _, k in eps]
+        if key not in keys:
+            return []
+        index = keys.index(key)
+        return keys[index + 1:index + 1 + count]
+
+    def title_key(self, key: str) -> str:
+        """Film bzw. Serie eines Keys (für Meistgesehen)."""
+        return self.show_of.get(key, key)
+
+
+# --- PAGE-CACHE-MODELL ---
+
+class PageCache:
+    """LRU über (Key, Bereich) mit fester Kapazität in Bytes."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.used = 0
+        self.entries: "OrderedDict[Tuple[str, str], Tuple[int, str]]" = OrderedDict()
+
+    def get(self, key: str, region: str) -> Optional[str]:
+        """Quelle des Bereichs (und als benutzt markieren) oder None."""
+        entry = self.entries.get((key, region))
+        if entry is None:
+            return None
+        self.entries.move_to_end((key, region))
+        return entry[1]
+
+    def put(self, key: str, region: str, size: int, source: str):
+        old = self.entries.pop((key, region), None)
+        if old:
+            self.used -= old[0]
+        self.entries[(key, region)] = (size, source)
+        self.used += size
+        while self.used > self.capacity and self.entries:
+            _, (evicted, _) = self.entries.popitem(last=False)
+            self.used -= evicted
+
+
+# --- SIMULATION ---
+
+class PolicySimulation:
+    """Spielt Historie und Preload-Läufe einer Policy in zeitlicher Reihenfolge ab."""
+
+    def __init__(self, policy, library: SimLibrary, plays: List[Dict[str, Any]], args):
+        self.policy = policy
+        self.library = library
+        self.plays = plays
+        self.play_times = [p["ts"] for p in plays]
+        self.args = args
+        self.cache = PageCache(int(args.cache_gb * GB))
+        self.disk_seen: Dict[int, float] = {}
+        self.stats = {
+            "plays": 0, "start_hits": 0, "stalled_starts": 0, "preload_runs": 0, "files_warmed": 0,
+            "bytes_preload": 0, "bytes_playback": 0,
+            "wakeups": {"preload": 0, "playback": 0}, "hits_by_source": {},
+        }
+        # Sortierungen für Strategien einmal vorab
+        self.by_released = {
+            kind: sorted(items, key=lambda k: items[k]["released"], reverse=True)
+            for kind, items in (("movie", library.movies), ("show", library.shows))
+        }
+        self.by_added = {
+            kind: sorted(items, key=lambda k: items[k]["added_at"], reverse=True)
+            for kind, items in (("movie", library.movies), ("show", library.shows))
+        }
+        self.files_by_added = sorted(
+            library.kind,
+            key=lambda k: (library.movies.get(k) or library.shows.get(library.show_of.get(k, ""), {})).get("added_at", 0),
+            reverse=True
+        )
+
+    def _head_mb(self, ts: float) -> int:
+        """Preload-Größe zum Zeitpunkt ts (Zeitprofile wie Config.get_current_preload_size)."""
+        if self.policy.use_time_profiles:
+            hour = datetime.fromtimestamp(ts).hour
+            for profile in self.policy.time_profiles:
+                if profile.start_hour <= hour < profile.end_hour:
+                    return profile.preload_head_mb
+        return self.policy.preload_head_mb
+
+    def _disk_access(self, key: str, ts: float, cause: str, busy_until: float = 0) -> bool:
+        """Zugriff auf die Platte eines Titels; True wenn sie dafür anlaufen musste."""
+        disk = self.library.disk.get(key, 1)
+        last = self.disk_seen.get(disk)
+        woke = last is None or ts - last > self.args.spindown_minutes * 60
+        if woke:
+            self.stats["wakeups"][cause] += 1
+        self.disk_seen[disk] = max(ts, busy_until, last or 0)
+        return woke
+
+    def _warm(self, key: str, ts: float, source: str):
+        """Head (und Tail) einer Datei wärmen, sofern noch nicht im Cache."""
+        if self.cache.get(key, "head") is not None:
+            return
+        head = min(self._head_mb(ts) * MB, self.library.size(key))
+        tail = min(self.policy.preload_tail_mb * MB, self.library.size(key))
+        self.cache.put(key, "head", head, source)
+        if tail and self.cache.get(key, "tail") is None:
+            self.cache.put(key, "tail", tail, source)
+        self.stats["bytes_preload"] += head + tail
+        self.stats["files_warmed"] += 1
+        self._disk_access(key, ts, "preload")
+
+    def _play(self, play: Dict[str, Any]):
+        key, ts = play["key"], play["ts"]
+        self.stats["plays"] += 1
+        source = self.cache.get(key, "head")
+        disk = self.library.disk.get(key, 1)
+        asleep = disk not in self.disk_seen or ts - self.disk_seen[disk] > self.args.spindown_minutes * 60
+        if source is not None:
+            self.stats["start_hits"] += 1
+            self.stats["hits_by_source"][source] = self.stats["hits_by_source"].get(source, 0) + 1
+        elif asleep:
+            self.stats["stalled_starts"] += 1
+
+        # Wiedergabe liest den gesehenen Teil (Head zählt nur bei einem Fehlschlag)
+        size = self.library.size(key)
+        watched = int(size * play["fraction"])
+        head = min(self._head_mb(ts) * MB, size)
+        if source is None:
+            self.cache.put(key, "head", head, "playback")
+        body = max(watched - head, 0)
+        if body:
+            self.cache.put(key, "body", body, "playback")
+        self.stats["bytes_playback"] += body + (head if source is None else 0)
+        self._disk_access(key, ts, "playback", busy_until=play["stopped"])
+
+    def _most_watched(self, ts: float, kind: str, count: int) -> List[str]:
+        """Titel mit den meisten Starts in den 30 Tagen vor ts."""
+        counts: Dict[str, int] = {}
+        for play in self.plays[bisect_left(self.play_times, ts - 30 * 86400):bisect_left(self.play_times, ts)]:
+            title = self.library.title_key(play["key"])
+            if (kind == "movie") == (self.library.kind.get(play["key"]) == "movie"):
+                counts[title] = counts.get(title, 0) + 1
+        return sorted(counts, key=counts.get, reverse=True)[:count]
+
+    def _on_deck(self, ts: float) -> List[str]:
+        """Nächste Episode der zuletzt angefangenen Serien je User (wie Plex On Deck)."""
+        latest: Dict[Tuple[str, str], Tuple[float, str]] = {}
+        for play in self.plays[bisect_left(self.play_times, ts - 30 * 86400):bisect_left(self.play_times, ts)]:
+            if play["key"] in self.library.show_of:
+                latest[(play["user"], self.library.show_of[play["key"]])] = (play["ts"], play["key"])
+        on_deck = []
+        for _, key in sorted(latest.values(), reverse=True)[:self.args.on_deck]:
+            on_deck.extend(self.library.next_episodes(key, 1))
+        return on_deck
+
+    def _candidates(self, ts: float) -> List[Tuple[str, str]]:
+        """Kandidaten eines Laufs in der Reihenfolge von run_preload (Key, Quelle)."""
+        p, lib = self.policy, self.library
+        candidates: "OrderedDict[str, str]" = OrderedDict()
+
+        def add(keys: List[Optional[str]], source: str, count: Optional[int] = None):
+            added = 0
+            for key in keys:
+                if count is not None and added >= count:
+                    break
+                if key:
+                    candidates.setdefault(key, source)
+                    added += 1
+
+        def shows_first(show_keys):
+            return (lib.first_episode(k) for k in show_keys)
+
+        def existing(keys, items):
+            return (k for k in keys if items[k]["added_at"] <= ts)
+
+        if p.tautulli_enabled or p.library_sync_enabled:
+            if p.cache_recent_releases:
+                add(existing(self.by_released["movie"], lib.movies), "recent_movies", p.cache_recent_movies_count)
+                add(shows_first(existing(self.by_released["show"], lib.shows)), "recent_shows", p.cache_recent_shows_count)
+            if p.cache_most_watched:
+                add(self._most_watched(ts, "movie", p.cache_most_watched_movies_count), "watched_movies")
+                add(shows_first(self._most_watched(ts, "show", p.cache_most_watched_shows_count)), "watched_shows")
+            if p.cache_recently_added:
+                add(existing(self.by_added["movie"], lib.movies), "added_movies", p.cache_recently_added_movies_count)
+                add(shows_first(existing(self.by_added["show"], lib.shows)), "added_shows", p.cache_recently_added_shows_count)
+        if p.plex_enabled:
+            add(self._on_deck(ts), "on_deck")
+        add((k for k in self.files_by_added
+             if (lib.movies.get(k) or lib.shows.get(lib.show_of.get(k, ""), {})).get("added_at", 0) <= ts),
+            "filesystem", p.max_files_per_run)
+        return list(candidates.items())[:p.max_files_per_run]
+
+    def _run_times(self, start: float, end: float) -> List[float]:
+        if not self.policy.scheduler_enabled or not self.policy.cron_schedule:
+            return []
+        from apscheduler.triggers.cron import CronTrigger
+        trigger = CronTrigger.from_crontab(self.policy.cron_schedule)
+        times = []
+        now = datetime.fromtimestamp(start).astimezone()
+        fire = trigger.get_next_fire_time(None, now)
+        while fire and fire.timestamp() < end:
+            times.append(fire.timestamp())
+            fire = trigger.get_next_fire_time(fire, fire)
+        return times
+
+    def run(self) -> Dict[str, Any]:
+        if not self.plays:
+            return self.stats
+        start, end = self.plays[0]["ts"], self.plays[-1]["stopped"]
+        trigger = self.args.play_trigger
+        if trigger == "auto":
+            trigger = "live" if self.policy.live_monitoring_enabled else "none"
+        delay = {"webhook": 5, "live": self.policy.live_check_interval_seconds / 2}.get(trigger)
+
+        # Ereignisse: (Zeit, Reihenfolge, Art, Nutzlast)
+        events = [(ts, 0, "run", None) for ts in self._run_times(start, end)]
+        events += [(p["ts"], 1, "play", p) for p in self.plays]
+        heapq.heapify(events)
+        while events:
+            ts, _, kind, payload = heapq.heappop(events)
+            if kind == "run":
+                self.stats["preload_runs"] += 1
+                for key, source in self._candidates(ts):
+                    self._warm(key, ts, source)
+            elif kind == "play":
+                self._play(payload)
+                if delay is not None and payload["key"] in self.library.show_of:
+                    heapq.heappush(events, (ts + delay, 2, "live", payload["key"]))
+            else:
+                for key in self.library.next_episodes(payload, self.policy.live_episodes_to_preload):
+                    self._warm(key, ts, "live")
+
+        stats = dict(self.stats)
+        stats["start_hit_ratio"] = round(stats["start_hits"] / stats["plays"], 4) if stats["plays"] else 0.0
+        stats["stalled_ratio"] = round(stats["stalled_starts"] / stats["plays"], 4) if stats["plays"] else 0.0
+        stats["gb_preload"] = round(stats.pop("bytes_preload") / GB, 2)
+        stats["gb_playback"] = round(stats.pop("bytes_playback") / GB, 2)
+        stats["disk_wakeups"] = sum(stats["wakeups"].values())
+        return stats
+
+
+def _plays(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Normalisierte Starts (Zeit, Key, User, gesehener Anteil, Ende)."""
+    plays = []
+    for row in rows:
+        ts = _to_int(row.get("started") or row.get("date"))
+        stopped = _to_int(row.get("stopped")) or ts + (_to_int(row.get("duration")) or 3600)
+        fraction = _to_int(row.get("percent_complete")) / 100 if row.get("percent_complete") is not None else 1.0
+        plays.append({
+            "ts": ts,
+            "stopped": max(stopped, ts),
+            "key": str(row["rating_key"]),
+            "user": row.get("friendly_name") or row.get("user") or "",
+            "fraction": min(max(fraction, 0.0), 1.0),
+        })
+    plays.sort(key=lambda p: p["ts"])
+    return plays
+
+
+def _policies(preloader, base: Dict[str, Any], specs: List[str]) -> List[Tuple[str, Any]]:
+    """Basis-Konfiguration plus je --policy (Datei oder JSON) eine Variante."""
+    policies = [("base", preloader.Config(**base))]
+    for i, spec in enumerate(specs, 1):
+        if spec.lstrip().startswith("{"):
+            name, overrides = f"policy{i}", json.loads(spec)
+        else:
+            with open(spec, "r") as f:
+                name, overrides = os.path.splitext(os.path.basename(spec))[0], json.load(f)
+        policies.append((overrides.pop("name", name), preloader.Config(**{**base, **overrides})))
+    return policies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay watch history against preloader policies")
+    parser.add_argument("history", nargs="?", help="Tautulli get_history export (JSON)")
+    parser.add_argument("--config", help="base config.json (default: built-in defaults)")
+    parser.add_argument("--policy", action="append", default=[],
+                        help="config overrides as JSON file or inline JSON (repeatable)")
+    parser.add_argument("--snapshot", help="library_snapshot.json for release/added dates and disks")
+    parser.add_argument("--cache-gb", type=float, default=16, help="page cache capacity available for media")
+    parser.add_argument("--disks", type=int, default=4, help="array disks (when paths do not show /diskN/)")
+    parser.add_argument("--spindown-minutes", type=float, default=30)
+    parser.add_argument("--movie-gb", type=float, default=8)
+    parser.add_argument("--episode-gb", type=float, default=2)
+    parser.add_argument("--on-deck", type=int, default=20, help="titles Plex keeps On Deck")
+    parser.add_argument("--play-trigger", choices=("auto", "webhook", "live", "none"), default="auto",
+                        help="what warms next episodes after a play (auto: live if live_monitoring_enabled)")
+    parser.add_argument("--fetch-history", metavar="OUT", help="export history from the configured Tautulli and exit")
+    parser.add_argument("--days", type=int, default=90, help="history to export with --fetch-history")
+    parser.add_argument("--out", help="write the JSON report to this file (default: stdout)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("PRELOADER_CONFIG_DIR", tempfile.mkdtemp(prefix="preloader-sim-"))
+    sys.path.insert(0, REPO_ROOT)
+    from app import main as preloader  # erst nach PRELOADER_CONFIG_DIR importieren
+    preloader.logger.setLevel("WARNING")
+
+    base: Dict[str, Any] = {}
+    if args.config:
+        with open(args.config, "r") as f:
+            base = json.load(f)
+
+    if args.fetch_history:
+        import httpx
+        preloader.config = preloader.Config(**base)
+
+        async def fetch():
+            async with httpx.AsyncClient(timeout=60.0) as client:
+                return await preloader.fetch_tautulli_history(
+                    client, preloader.config.tautulli_url.rstrip('/'), time.time() - args.days * 86400
+                )
+        rows = asyncio.run(fetch())
+        with open(args.fetch_history, "w") as f:
+            json.dump(rows, f)
+        print(f"{len(rows)} history rows written to {args.fetch_history}", file=sys.stderr)
+        return
+
+    if not args.history:
+        parser.error("history file required (or --fetch-history)")
+
+    rows = load_history(args.history)
+    library = SimLibrary(args.movie_gb, args.episode_gb, args.disks)
+    if args.snapshot:
+        library.load_snapshot(args.snapshot)
+    library.add_history(rows)
+    plays = _plays(rows)
+
+    results = []
+    for name, policy in _policies(preloader, base, args.policy):
+        result = PolicySimulation(policy, library, plays, args).run()
+        results.append({"policy": name, **result})
+
+    report = {
+        "simulator": "video-preloader",
+        "version": preloader.VERSION,
+        "params": {k: v for k, v in vars(args).items() if k not in ("fetch_history", "days")},
+        "history": {
+            "plays": len(plays),
+            "from": datetime.fromtimestamp(plays[0]["ts"]).isoformat() if plays else None,
+            "to": datetime.fromtimestamp(plays[-1]["ts"]).isoformat() if plays else None,
+            "movies": len(library.movies),
+            "shows": len(library.shows),
+            "episodes": sum(len(e) for e in library.episodes.values()),
+        },
+        "policies": results,
+        "ranking": [r["policy"] for r in sorted(results, key=lambda r: (-r["start_hit_ratio"], r["disk_wakeups"]))],
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""
+Gemeinsame Fixtures.
+
+app.main liest PRELOADER_CONFIG_DIR beim Import; die Tests setzen es vorher
+auf ein temporäres Verzeichnis, damit /config unberührt bleibt.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("PRELOADER_CONFIG_DIR", tempfile.mkdtemp(prefix="preloader-test-"))
+
+
+@pytest.fixture(scope="session")
+def preloader():
+    from app import main
+    return main
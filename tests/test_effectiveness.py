@@ -0,0 +1,39 @@
+"""Trefferquoten von EffectivenessTracker.report."""
+import time
+
+
+def _event(ts, warm, source="", warmed_by="", evidence="ledger", channel="webhook"):
+    return {"ts": ts, "file": "/m/x.mkv", "rating_key": "", "user": "", "channel": channel,
+            "warm": warm, "source": source, "warmed_by": warmed_by, "evidence": evidence}
+
+
+def test_source_ratio_uses_plays_of_its_files(preloader):
+    tracker = preloader.EffectivenessTracker()
+    now = time.time()
+    tracker.events = [
+        _event(now - 10, True, "on_deck", "on_deck"),
+        _event(now - 9, False, warmed_by="on_deck"),        # zu spät gewärmt/verdrängt
+        _event(now - 8, True, "recent_releases", "recent_releases"),
+        _event(now - 7, False),                              # nie gewärmt
+        _event(now - 6, False, evidence="unknown", channel="history"),
+        _event(now - 5, False, evidence="none", channel="live"),
+    ]
+    report = tracker.report(1)
+
+    assert report["plays"] == 6
+    assert report["checked"] == 4
+    assert report["hit_ratio"] == 0.5
+    assert report["sources"]["on_deck"]["plays"] == 2
+    assert report["sources"]["on_deck"]["hit_ratio"] == 0.5
+    assert report["sources"]["recent_releases"]["hit_ratio"] == 1.0
+
+    day = report["daily"][-1]
+    assert (day["plays"], day["checked"], day["hit_ratio"]) == (6, 4, 0.5)
+    assert day["by_source"]["on_deck"] == {"plays": 2, "hits": 1, "hit_ratio": 0.5}
+
+
+def test_history_without_ledger_is_unknown(preloader):
+    tracker = preloader.EffectivenessTracker()
+    state = tracker._warm_state("/does/not/matter.mkv", time.time() - 3600, probe=False)
+    assert state["evidence"] == "unknown" and not state["warm"]
+    assert tracker._warm_state(None, time.time(), probe=True)["evidence"] == "none"
@@ -0,0 +1,38 @@
+"""/api/history/compare über die IDs des History-Stores."""
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def store(preloader, tmp_path, monkeypatch):
+    history = preloader.HistoryStore(str(tmp_path / "history.jsonl"))
+    monkeypatch.setattr(preloader, "history_store", history)
+    return history
+
+
+def _run(store, duration, stages, ts=1_700_000_000.0):
+    return store.append({"timestamp": "2024-01-01 00:00:00", "time": ts, "duration_seconds": duration,
+                         "bytes_read": 0, "mb_per_s": 0.0, "stages": stages})["id"]
+
+
+def test_compare_by_id(preloader, store):
+    first = _run(store, 1.0, {"warm": 1.0})
+    second = _run(store, 3.0, {"warm": 2.5, "score": 0.5})   # gleicher Zeitstempel
+    third = _run(store, 2.0, {"warm": 1.5})
+    client = TestClient(preloader.app)
+
+    latest = client.get("/api/history/compare").json()
+    assert (latest["a"]["id"], latest["b"]["id"]) == (second, third)
+    assert latest["delta"]["duration_seconds"] == -1.0
+
+    explicit = client.get(f"/api/history/compare?a={first}&b={second}").json()
+    assert explicit["delta"]["stages"] == {"score": 0.5, "warm": 1.5}
+    assert client.get(f"/api/history/compare?b={second}").json()["a"]["id"] == first
+    assert client.get(f"/api/history/compare?a={first}").json()["b"]["id"] == third
+
+    assert client.get("/api/history/compare?a=999").status_code == 404
+    assert client.get(f"/api/history/compare?b={first}").status_code == 404
+
+
+def test_compare_empty_store(preloader, store):
+    assert TestClient(preloader.app).get("/api/history/compare").status_code == 404
@@ -0,0 +1,87 @@
+"""MemoryGovernor gegen nachgebaute cgroup-v2- und PSI-Dateien."""
+import os
+
+import pytest
+
+
+def _write(directory, name, content):
+    with open(os.path.join(directory, name), "w") as f:
+        f.write(content)
+
+
+@pytest.fixture
+def cgroup(tmp_path):
+    _write(tmp_path, "memory.current", "6442450944\n")
+    _write(tmp_path, "memory.max", "8589934592\n")
+    _write(tmp_path, "memory.stat", "anon 1073741824\nfile 5368709120\ninactive_file 4294967296\nactive_file 1073741824\n")
+    _write(tmp_path, "memory.pressure",
+           "some avg10=0.00 avg60=0.00 avg300=0.00 total=0\nfull avg10=0.00 avg60=0.00 avg300=0.00 total=0\n")
+    return tmp_path
+
+
+@pytest.fixture
+def thresholds(preloader, monkeypatch):
+    monkeypatch.setattr(preloader.config, "ram_max_usage_percent", 80)
+    monkeypatch.setattr(preloader.config, "memory_psi_pace_threshold", 10.0)
+    monkeypatch.setattr(preloader.config, "memory_psi_suspend_threshold", 40.0)
+    monkeypatch.setattr(preloader.config, "memory_pace_max_delay_seconds", 2.0)
+
+
+def test_read_cgroup(preloader, cgroup):
+    governor = preloader.MemoryGovernor(str(cgroup), str(cgroup / "missing"))
+    assert governor.read_cgroup() == {
+        "current": 6442450944,
+        "max": 8589934592,
+        "anon": 1073741824,
+        "file": 5368709120,
+        "inactive_file": 4294967296,
+    }
+
+
+def test_read_cgroup_unlimited_and_missing(preloader, cgroup, tmp_path_factory):
+    _write(cgroup, "memory.max", "max\n")
+    assert preloader.MemoryGovernor(str(cgroup)).read_cgroup()["max"] is None
+    empty = tmp_path_factory.mktemp("no-cgroup")
+    assert preloader.MemoryGovernor(str(empty)).read_cgroup() is None
+
+
+def test_usage_excludes_inactive_file_cache(preloader, cgroup):
+    usage = preloader.MemoryGovernor(str(cgroup)).usage()
+    assert usage["scope"] == "cgroup"
+    # 6 GiB belegt, davon 4 GiB inaktiver Page-Cache -> 2 von 8 GiB
+    assert usage["percent"] == 25.0
+
+
+def test_read_psi_prefers_cgroup_file(preloader, cgroup, tmp_path_factory):
+    host = tmp_path_factory.mktemp("proc") / "memory"
+    host.write_text("some avg10=99.00 avg60=0.00 avg300=0.00 total=0\n")
+    _write(cgroup, "memory.pressure", "some avg10=1.50 avg60=2.25 avg300=0.10 total=12345\n")
+    psi = preloader.MemoryGovernor(str(cgroup), str(host)).read_psi()
+    assert psi == {"some": {"avg10": 1.5, "avg60": 2.25, "avg300": 0.1}}
+
+    os.remove(cgroup / "memory.pressure")
+    assert preloader.MemoryGovernor(str(cgroup), str(host)).read_psi()["some"]["avg10"] == 99.0
+
+
+def test_evaluate_run_pace_suspend(preloader, cgroup, thresholds):
+    governor = preloader.MemoryGovernor(str(cgroup), str(cgroup / "missing"))
+    assert governor.evaluate()["action"] == "run"
+
+    _write(cgroup, "memory.pressure", "some avg10=25.00 avg60=0.00 avg300=0.00 total=0\n")
+    verdict = governor.evaluate()
+    assert verdict["action"] == "pace"
+    assert 0 < verdict["delay"] <= 2.0
+
+    _write(cgroup, "memory.pressure", "some avg10=50.00 avg60=0.00 avg300=0.00 total=0\n")
+    assert governor.evaluate()["action"] == "suspend"
+
+    _write(cgroup, "memory.pressure",
+           "some avg10=12.00 avg60=0.00 avg300=0.00 total=0\nfull avg10=11.00 avg60=0.00 avg300=0.00 total=0\n")
+    assert governor.evaluate()["action"] == "suspend"
+
+
+def test_evaluate_suspends_on_anon_share(preloader, cgroup, thresholds):
+    _write(cgroup, "memory.stat", "anon 7516192768\nfile 0\ninactive_file 0\n")
+    verdict = preloader.MemoryGovernor(str(cgroup), str(cgroup / "missing")).evaluate()
+    assert verdict["action"] == "suspend"
+    assert "anon" in verdict["reason"]
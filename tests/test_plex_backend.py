@@ -0,0 +1,81 @@
+"""Anfragen je Backend gegen den Fake-Upstream der Benchmark-Suite."""
+import asyncio
+
+import httpx
+import pytest
+
+from bench.benchmark import PLEX_ROOT, FakeUpstream, SyntheticLibrary
+
+
+@pytest.fixture(scope="module")
+def library(tmp_path_factory):
+    root = tmp_path_factory.mktemp("media")
+    return SyntheticLibrary(str(root), movies=6, shows=2, seasons=2, episodes=3,
+                            file_mb=1, dense_files=0, dense_mb=0, seed=1).build()
+
+
+@pytest.fixture
+def upstream(preloader, library, monkeypatch):
+    fake = FakeUpstream(library, latency_ms=0, on_deck=2)
+    fake.start()
+    config = preloader.config
+    for key, value in {
+        "tautulli_enabled": True,
+        "tautulli_url": f"{fake.base_url}/tautulli",
+        "tautulli_api_key": "test",
+        "plex_enabled": True,
+        "plex_url": f"{fake.base_url}/plex",
+        "plex_token": "test",
+        "path_mappings": [f"{PLEX_ROOT}:{library.root}"],
+        "min_size_mb": 0,
+        "library_sync_enabled": False,
+        "upstream_result_ttl_seconds": 0,
+    }.items():
+        monkeypatch.setattr(config, key, value)
+    yield fake
+    fake.stop()
+
+
+def _next_episodes(preloader, backend, show_key):
+    async def run():
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            return await preloader.find_next_episodes(client, backend, show_key, 1, 1, 3)
+    return asyncio.run(run())
+
+
+def test_next_episodes_plex_single_request(preloader, library, upstream):
+    show_key = library.of_type("show")[0]["rating_key"]
+
+    upstream.reset()
+    via_tautulli = _next_episodes(preloader, "tautulli", show_key)
+    tautulli_requests = upstream.reset()
+
+    via_plex = _next_episodes(preloader, "plex", show_key)
+    plex_requests = upstream.reset()
+
+    assert via_plex == via_tautulli
+    assert [p.rsplit("/", 1)[-1] for p in via_plex] == [
+        "Show 0000 S01E02.mkv", "Show 0000 S01E03.mkv", "Show 0000 S02E01.mkv"
+    ]
+    assert plex_requests == {"plex:/library/metadata/:id/allLeaves": 1}
+    assert sum(tautulli_requests.values()) > sum(plex_requests.values())
+
+
+def test_strategies_plex_fewer_requests(preloader, upstream, monkeypatch):
+    config = preloader.config
+    for key in ("recent_releases", "recently_added"):
+        monkeypatch.setattr(config, f"cache_{key}", True)
+    monkeypatch.setattr(config, "cache_most_watched", False)
+
+    counts = {}
+    files = {}
+    for backend in ("tautulli", "plex"):
+        monkeypatch.setattr(config, "cache_recent_releases_backend", backend)
+        monkeypatch.setattr(config, "cache_recently_added_backend", backend)
+        upstream.reset()
+        data = asyncio.run(preloader.fetch_tautulli_data())
+        counts[backend] = sum(upstream.reset().values())
+        files[backend] = {path for paths in data.values() for path in paths}
+
+    assert files["plex"] and files["plex"] == files["tautulli"]
+    assert counts["plex"] < counts["tautulli"]
@@ -0,0 +1,71 @@
+"""PlexNotificationListener gegen einen lokalen Websocket-Stand-in."""
+import asyncio
+import json
+
+import pytest
+
+websockets = pytest.importorskip("websockets")
+
+
+def _playing(session_key, rating_key, state="playing"):
+    return json.dumps({"NotificationContainer": {
+        "type": "playing",
+        "PlaySessionStateNotification": [
+            {"sessionKey": session_key, "ratingKey": rating_key, "state": state, "viewOffset": 0}
+        ],
+    }})
+
+
+def test_listener_connects_handles_events_and_reconnects(preloader, monkeypatch):
+    monkeypatch.setattr(preloader.config, "plex_token", "test")
+    monkeypatch.setattr(preloader.config, "live_readahead_enabled", False)
+    preloader._webhook_recent_events.clear()
+
+    async def run():
+        paths = []
+        release = asyncio.Event()
+
+        async def handler(ws, *args):
+            paths.append(getattr(ws, "path", None) or ws.request.path)
+            await ws.send(json.dumps({"NotificationContainer": {"type": "timeline"}}))
+            await ws.send(_playing("7", "1001"))
+            await ws.send(_playing("7", "1001"))  # Duplikat, entprellt
+            await ws.send(_playing("8", "1002", state="paused"))
+            await release.wait()
+
+        async with websockets.serve(handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            monkeypatch.setattr(preloader.config, "plex_url", f"http://127.0.0.1:{port}")
+
+            listener = preloader.PlexNotificationListener()
+            started = []
+
+            async def fake_preload(session, rating_key):
+                started.append((session, rating_key))
+
+            listener._preload = fake_preload
+            task = asyncio.create_task(listener.run())
+            try:
+                for _ in range(100):
+                    if started:
+                        break
+                    await asyncio.sleep(0.02)
+                assert listener.connected
+                await asyncio.sleep(0.1)
+                assert started == [("7", "1001")]
+                assert listener.events == 1
+                assert paths[0].startswith("/:/websockets/notifications?X-Plex-Token=test")
+
+                # Server trennt: Polling übernimmt, Reconnect wird geplant
+                release.set()
+                for _ in range(100):
+                    if listener.reconnects:
+                        break
+                    await asyncio.sleep(0.02)
+                assert not listener.connected
+                assert listener.reconnects == 1
+            finally:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
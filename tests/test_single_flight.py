@@ -0,0 +1,43 @@
+"""SingleFlight: Bündelung gleichzeitiger Upstream-Anfragen."""
+import asyncio
+
+
+def test_waiter_timeout_does_not_break_leader(preloader):
+    flight = preloader.SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.2)
+        return {"ok": True}
+
+    async def run():
+        leader = asyncio.create_task(flight.do(("k",), fetch, 0))
+        await asyncio.sleep(0.01)
+        try:
+            await asyncio.wait_for(flight.do(("k",), fetch, 0), timeout=0.05)
+        except asyncio.TimeoutError:
+            pass
+        else:
+            raise AssertionError("waiter should have timed out")
+        return await leader
+
+    assert asyncio.run(run()) == {"ok": True}
+    assert calls == [1]
+    assert flight.stats["coalesced"] == 1
+
+
+def test_waiters_share_leader_result(preloader):
+    flight = preloader.SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return [1, 2]
+
+    async def run():
+        return await asyncio.gather(*(flight.do(("k",), fetch, 0) for _ in range(3)))
+
+    assert asyncio.run(run()) == [[1, 2]] * 3
+    assert calls == [1]